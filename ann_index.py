@@ -0,0 +1,210 @@
+"""
+🧭 IVF-FLAT ANN INDEKSI
+========================
+Katta korpuslar uchun taxminiy eng yaqin qo'shnilar qidiruvi (sof NumPy).
+
+- Vektorlar k-means markazlari (nlist ta klaster) bo'yicha guruhlanadi
+- So'rovda faqat eng yaqin nprobe ta klasterdagi qatorlar skorlanadi
+  (nprobe katta - recall yuqori, sekinroq; kichik - tezroq)
+- Yangi qatorlar mavjud markazlarga biriktiriladi (qayta o'qitishsiz);
+  baza o'qitilgandagidan ANN_RETRAIN_GROWTH marta o'sganda markazlar qayta hisoblanadi
+- MmapVectorStore persist() da qatorlar bilan birga ixchamlanadi va ivf.npz ga yoziladi
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+IVF_FILE = "ivf.npz"
+
+ANN_MIN_NLIST = 16
+ANN_MAX_NLIST = 4096
+ANN_RETRAIN_GROWTH = 2.0
+# k-means uchun har bir klasterga to'g'ri keladigan namuna qatorlari
+KMEANS_SAMPLES_PER_LIST = 64
+KMEANS_ITERATIONS = 10
+ASSIGN_BLOCK_ROWS = 65536
+
+
+def default_nlist(count: int) -> int:
+    """Klasterlar soni: ~4 * sqrt(n), [16, 4096] oralig'ida"""
+    return int(np.clip(4 * np.sqrt(max(count, 1)), ANN_MIN_NLIST, ANN_MAX_NLIST))
+
+
+class IVFIndex:
+    """Inverted file (IVF-flat) indeksi: qator -> klaster biriktirmalari"""
+
+    def __init__(self, nlist: int = 0):
+        self.nlist = nlist  # 0 - baza hajmidan avtomatik
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.empty(0, dtype=np.int32)
+        self.trained_count = 0
+        self._order: Optional[np.ndarray] = None
+        self._bounds: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return int(self.assignments.shape[0])
+
+    def needs_training(self, count: int) -> bool:
+        return not self.is_trained or count >= self.trained_count * ANN_RETRAIN_GROWTH
+
+    # ================= O'QITISH =================
+
+    def train(self, vectors: np.ndarray, seed: int = 0):
+        """
+        Markazlarni k-means (sferik, cosine) bilan hisoblash va barcha qatorlarni biriktirish.
+        vectors - (n x dim) matritsa yoki memmap (bloklab o'qiladi).
+        """
+        start = time.perf_counter()
+        count = vectors.shape[0]
+        nlist = min(self.nlist or default_nlist(count), count)
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(count, nlist * KMEANS_SAMPLES_PER_LIST)
+        sample_rows = np.sort(rng.choice(count, sample_size, replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            sizes = np.bincount(labels, minlength=nlist)
+            empty = sizes == 0
+            # Bo'sh klasterlar tasodifiy namunalar bilan qayta to'ldiriladi
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1, norms)
+
+        self.centroids = centroids.astype(np.float32)
+        self.assignments = self.assign(vectors)
+        self.trained_count = count
+        self._order = self._bounds = None
+        logger.info(
+            f"🧭 IVF indeksi o'qitildi: {count} ta qator, {nlist} ta klaster "
+            f"({time.perf_counter() - start:.1f} s)"
+        )
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Qatorlarni eng yaqin markazga biriktirish (bloklab)"""
+        parts = []
+        for start in range(0, vectors.shape[0], ASSIGN_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+            parts.append(np.argmax(block @ self.centroids.T, axis=1).astype(np.int32))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+
+    # ================= YANGILASH =================
+
+    def add(self, vectors: np.ndarray):
+        """Yangi qatorlarni mavjud markazlarga biriktirish (oxiriga qo'shiladi)"""
+        if len(vectors):
+            self.assignments = np.concatenate([self.assignments, self.assign(vectors)])
+            self._order = self._bounds = None
+
+    def compact(self, live_rows: List[int]):
+        """persist() dan keyin qatorlar raqamlari o'zgaradi - o'chirilganlarni tashlash"""
+        self.assignments = self.assignments[np.asarray(live_rows, dtype=np.int64)]
+        self._order = self._bounds = None
+
+    # ================= QIDIRUV =================
+
+    def _inverted_lists(self):
+        """Klaster bo'yicha tartiblangan qatorlar va chegaralar (kerak bo'lganda quriladi)"""
+        if self._order is None:
+            self._order = np.argsort(self.assignments, kind="stable").astype(np.int64)
+            sizes = np.bincount(self.assignments, minlength=self.centroids.shape[0])
+            self._bounds = np.concatenate([[0], np.cumsum(sizes)])
+        return self._order, self._bounds
+
+    def candidates(self, query_vector: np.ndarray, nprobe: int) -> np.ndarray:
+        """Eng yaqin nprobe ta klasterdagi qatorlar (o'sish tartibida - memmap uchun qulay)"""
+        order, bounds = self._inverted_lists()
+        nprobe = min(nprobe, self.centroids.shape[0])
+        lists = np.argpartition(-(self.centroids @ query_vector), nprobe - 1)[:nprobe]
+        rows = np.concatenate([order[bounds[i]:bounds[i + 1]] for i in lists])
+        return np.sort(rows)
+
+    # ================= SAQLASH =================
+
+    def save(self, path: Path):
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                assignments=self.assignments,
+                trained_count=np.int64(self.trained_count),
+                nlist=np.int64(self.nlist)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IVFIndex"]:
+        if not Path(path).exists():
+            return None
+        try:
+            with np.load(path) as data:
+                index = cls(nlist=int(data["nlist"]))
+                index.centroids = data["centroids"]
+                index.assignments = data["assignments"]
+                index.trained_count = int(data["trained_count"])
+            return index
+        except Exception as e:
+            logger.warning(f"IVF indeksini o'qishda xatolik: {e}")
+            return None
+
+
+# ================= BENCHMARK =================
+
+def benchmark(count: int = 50000, dim: int = 256, queries: int = 100, top_k: int = 10,
+              nprobes: tuple = (1, 4, 8, 16, 32)) -> List[Dict[str, Any]]:
+    """nprobe bo'yicha recall@k va so'rov vaqti (aniq qidiruvga nisbatan, sintetik vektorlar)"""
+    import tempfile
+
+    from llama_index.core.schema import TextNode
+    from llama_index.core.vector_stores.types import VectorStoreQuery
+
+    from vector_store import MmapVectorStore, _synthetic_vectors
+
+    # Klasterlar aniq ajralmagan va so'rovlar ikki qator orasida - eng og'ir holatga yaqin
+    vectors = _synthetic_vectors(count, dim, spread=1.5)
+    rng = np.random.default_rng(1)
+    query_vectors = vectors[rng.integers(0, count, queries)] + vectors[rng.integers(0, count, queries)]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = MmapVectorStore(persist_dir=tmp_dir, ann_nprobe=1, ann_min_rows=0)
+        store.add([TextNode(id_=str(i), text="", embedding=vector.tolist()) for i, vector in enumerate(vectors)])
+        store.persist()
+
+        def run(nprobe: int):
+            store.ann_nprobe = nprobe
+            found, start = [], time.perf_counter()
+            for q in query_vectors:
+                result = store.query(VectorStoreQuery(query_embedding=q.tolist(), similarity_top_k=top_k))
+                found.append(set(result.ids))
+            return found, (time.perf_counter() - start) / queries * 1000
+
+        exact, exact_ms = run(0)
+        results.append({"nprobe": "exact", f"recall@{top_k}": 1.0, "ms_per_query": round(exact_ms, 2)})
+        for nprobe in nprobes:
+            found, ms = run(nprobe)
+            recall = sum(len(a & b) for a, b in zip(found, exact)) / (top_k * queries)
+            results.append({"nprobe": nprobe, f"recall@{top_k}": round(recall, 4), "ms_per_query": round(ms, 2)})
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for row in benchmark():
+        print(row)
@@ -0,0 +1,493 @@
+"""
+📑 MODDA VA BANDLAR INDEKSI
+============================
+data/qonunlar/YHQ.txt va MJtK.txt ni modda/band birliklariga ajratish.
+
+- YHQ: bandlar (1-185), 1-ilova belgilar (3.20), 2-ilova chiziqlar (1.1), 3/4-ilovalar
+- MJtK: moddalar (128-modda, 128¹ -> "128-1")
+- Raqam -> matn jadvali: "YHQ 12-bandi", "MJtK 128-modda" kabi aniq
+  savollarga LLM chaqiruvisiz javob beriladi
+- Birliklar RAG uchun ham alohida dokument sifatida ishlatiladi
+  (chunklar modda chegarasidan o'tmaydi)
+"""
+
+import html
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from document_loaders import LOADERS, extract_law_id, iter_lines
+from transliteration import normalize_apostrophes
+
+logger = logging.getLogger(__name__)
+
+QONUNLAR_PATH = os.getenv("QONUNLAR_PATH", "./data/qonunlar")
+ARTICLE_ANSWER_MAX_CHARS = int(os.getenv("ARTICLE_ANSWER_MAX_CHARS", "3500"))
+
+# Qonun kodi -> fayl nomi (kengaytmasiz: .txt, bo'lmasa .doc) va lex.uz manzili
+LAW_FILES = {
+    "YHQ": {
+        "stem": "YHQ",
+        "name": "Yo'l harakati qoidalari",
+        "url": "https://lex.uz/uz/docs/5953883"
+    },
+    "MJtK": {
+        "stem": "MJtK",
+        "name": "Ma'muriy javobgarlik to'g'risidagi kodeks",
+        "url": "https://lex.uz/uz/docs/97664"
+    },
+}
+
+# lex.uz sahifasidan ko'chirilgan interfeys qatorlari
+BOILERPLATE_LINES = {
+    "Hujjatga taklif yuborish",
+    "Audioni tinglash",
+    "Hujjat elementidan havola olish",
+    "Keyingi tahrirga havola",
+    "ONLINE TRANSLATE",
+    "LexUZ шарҳи",
+    "Олдинги",
+    "таҳрирга қаранг.",
+}
+# Hujjat matni tugab, sahifa oynalari boshlanadigan qator
+FOOTER_LINE = "Yopish"
+
+# ================= FAYL TUZILMASI =================
+
+ANNEX_RE = re.compile(r"^(\d+)-ИЛОВА$")
+CHAPTER_RE = re.compile(r"^\d+(?:\s\d+)?-боб\.\s")
+YHQ_BAND_RE = re.compile(r"^(\d+)\.\s+\S")
+YHQ_SIGN_RE = re.compile(r"^(\d+\.\d+(?:\.\d+)?)\.\s+(?=[«\"A-ZА-ЯЁЎҚҒҲ])")
+YHQ_MARKING_RE = re.compile(r"^(\d+\.\d+(?:\.\d+)?)\s+(?=[—(-])")
+MJTK_ARTICLE_RE = re.compile(r"^(\d+)-модда\.$")
+# Kodeks oxiridagi rasmiy nashrlar ro'yxati (oxirgi moddaga tegishli emas)
+MJTK_PUBLICATIONS_PREFIX = "(Ўзбекистон Республикаси Олий Кенгашининг Ахборотномаси"
+MJTK_SECTION_RE = re.compile(r"^(?:[IVXLC]+(?:\s\d+)?\s+боб\.|[А-ЯЁЎҚҒҲ]+ БЎЛИМ$|[А-ЯЁЎҚҒҲ]+ ҚИСМ$)")
+
+# Matndagi o'zgartirish izohlari: "(128-modda ... — Qonunchilik ma'lumotlari milliy bazasi, ...-сон)"
+AMENDMENT_NOTE_RE = re.compile(
+    r"\([^()]*?(?:миллий базаси|ҚҲТ|Ахборотномаси)[^()]*\)"
+)
+# Matn ichidagi ustki indeksli havolalar: "128\n5\n-моддаси" -> "128-5-моддаси"
+SUPERSCRIPT_REF_RE = re.compile(r"(?<![\d.])(\d+)\n(\d{1,2})\n(?=-|,|ва\b)")
+SENTENCE_END = (".", ":", ";", "!", "?", "»")
+LIST_ITEM_RE = re.compile(r"^(?:\d+(?:\.\d+)*\.?\s|[а-яёўқғҳa-z]\)\s)")
+SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+
+# ================= SAVOLDAGI HAVOLALAR =================
+
+_NUM = r"(\d+(?:\.\d+){0,2})"
+QUERY_PATTERNS: List[Tuple[str, str, "re.Pattern"]] = [
+    ("MJtK", "modda", re.compile(r"(\d+)(?:\s*-?\s*(\d{1,2})|([⁰¹²³⁴⁵⁶⁷⁸⁹]{1,2}))?\s*-?\s*(?:modda|модда|статья|статьи)")),
+    ("MJtK", "modda", re.compile(r"(?:статья|статьи|ст\.)\s*(\d+)(?:\s*-\s*(\d{1,2})|([⁰¹²³⁴⁵⁶⁷⁸⁹]{1,2}))?")),
+    ("YHQ", "belgi", re.compile(_NUM + r"\s*-?\s*(?:belgi|белги|знак)")),
+    ("YHQ", "belgi", re.compile(r"знака?\s*" + _NUM)),
+    ("YHQ", "chiziq", re.compile(_NUM + r"\s*-?\s*(?:chiziq|чизиқ|разметк)")),
+    ("YHQ", "band", re.compile(_NUM + r"\s*-?\s*(?:band|банд|пункт)")),
+    ("YHQ", "band", re.compile(r"(?:пункт|п\.)\s*" + _NUM)),
+    ("YHQ", "ilova", re.compile(r"(\d)\s*-?\s*(?:ilova|илова|приложени)")),
+]
+LAW_NAME_RE = re.compile(
+    r"\b(?:yhq|йҳқ|пдд|mjtk|мжтк|коап|kodeks|кодекс\w*|qoidalari?|қоидалари?|правил\w*)\b"
+)
+QUERY_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+
+# Havola bilan birga kelganda savolni "aniq so'rov"dan chiqarmaydigan so'zlar
+FILLER_WORDS = {
+    "nima", "haqida", "deyilgan", "deyiladi", "mazmuni", "matni", "ko'rsat", "ber", "bering",
+    "bo'yicha", "ma'lumot", "yozilgan", "va", "hamda", "qanday", "o'qib", "mi", "nimani",
+    "нима", "ҳақида", "дейилган", "мазмуни", "матни", "бўйича",
+    "что", "о", "чем", "текст", "в", "и", "по", "говорится", "покажи", "ст",
+}
+MAX_EXTRA_WORDS = 2
+
+
+def _clean_lines(raw_lines: Iterable[str]) -> List[str]:
+    """Bo'sh va interfeys qatorlarini tashlab yuborish"""
+    lines = []
+    for raw in raw_lines:
+        line = " ".join(raw.split())  # NBSP va ortiqcha bo'shliqlar
+        if line == FOOTER_LINE:
+            break
+        if line and line not in BOILERPLATE_LINES:
+            lines.append(line)
+    return lines
+
+
+def _split_header(lines: List[str], url: str = "") -> Tuple[str, List[str]]:
+    """Fayl sarlavhasidan URL ni olish va tanani qaytarish"""
+    for i, line in enumerate(lines[:10]):
+        if line.startswith("URL:"):
+            url = line[4:].strip()
+        if line.startswith("====="):
+            return url, lines[i + 1:]
+    return url, lines
+
+
+def _join_text(lines: List[str]) -> str:
+    """Birlik qatorlarini o'qiladigan matnga aylantirish"""
+    text = SUPERSCRIPT_REF_RE.sub(r"\1-\2\n", "\n".join(lines))
+    text = re.sub(r"(?<=\d-\d)\n(?=-)|(?<=\d-\d\d)\n(?=-)", "", text)
+
+    # lex.uz havolalari jumlani bir necha qatorga bo'lib yuboradi - jumla tugamagan qatorlarni birlashtirish
+    merged: List[str] = []
+    for line in text.split("\n"):
+        if merged and (line[0] in ",.;:)»-" or not (merged[-1].endswith(SENTENCE_END) or LIST_ITEM_RE.match(line))):
+            separator = "" if line[0] in ",.;:)»-" or merged[-1].endswith(("(", "«")) else " "
+            merged[-1] += separator + line
+        else:
+            merged.append(line)
+
+    text = AMENDMENT_NOTE_RE.sub("", "\n".join(merged))
+    lines = [" ".join(line.split()) for line in text.split("\n")]
+    return "\n".join(line for line in lines if line)
+
+
+def _make_unit(law: str, kind: str, number: str, title: str, lines: List[str], url: str) -> Dict[str, Any]:
+    return {
+        "law": law,
+        "kind": kind,
+        "number": number,
+        "title": title,
+        "text": _join_text(lines),
+        "url": url,
+    }
+
+
+def parse_yhq(raw_lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """YHQ.txt/.doc qatorlari -> bandlar, belgilar, chiziqlar va ilovalar"""
+    url, lines = _split_header(_clean_lines(raw_lines), LAW_FILES["YHQ"]["url"])
+
+    # Mundarijada ham "1-боб. Умумий қоидалар" bor - oxirgisi qoidalar tanasining boshi
+    starts = [i for i, line in enumerate(lines) if line == "1-боб. Умумий қоидалар"]
+    if not starts:
+        return []
+
+    units: List[Dict[str, Any]] = []
+    annex = 0
+    chapter = ""
+    last_band = 0
+    current: Optional[Tuple[str, str, str]] = None
+    buffer: List[str] = []
+
+    def flush():
+        if current and buffer:
+            units.append(_make_unit("YHQ", current[0], current[1], current[2], buffer, url))
+
+    for line in lines[starts[-1]:]:
+        annex_match = ANNEX_RE.match(line)
+        if annex_match:
+            number = int(annex_match.group(1))
+            if number <= annex:
+                break  # qarorning o'z ilovalari (o'z kuchini yo'qotgan qarorlar ro'yxati)
+            flush()
+            annex, current, buffer = number, None, []
+            if annex >= 3:
+                current = ("ilova", str(annex), "")
+            continue
+
+        if annex == 0:
+            if CHAPTER_RE.match(line):
+                chapter = line
+                continue
+            band_match = YHQ_BAND_RE.match(line)
+            if band_match and last_band < int(band_match.group(1)) <= last_band + 5:
+                flush()
+                last_band = int(band_match.group(1))
+                current, buffer = ("band", str(last_band), chapter), []
+        elif annex in (1, 2):
+            pattern = YHQ_SIGN_RE if annex == 1 else YHQ_MARKING_RE
+            item_match = pattern.match(line)
+            if item_match:
+                flush()
+                name = re.search(r"«([^»]+)»", line)
+                current = ("belgi" if annex == 1 else "chiziq", item_match.group(1), name.group(1) if name else "")
+                buffer = []
+        elif current and not current[2]:
+            current = (current[0], current[1], line)
+
+        if current:
+            buffer.append(line)
+
+    flush()
+    return units
+
+
+def parse_mjtk(raw_lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """MJtK.txt/.doc qatorlari -> moddalar (ustki indeksli moddalar "128-1" ko'rinishida)"""
+    url, lines = _split_header(_clean_lines(raw_lines), LAW_FILES["MJtK"]["url"])
+
+    units: List[Dict[str, Any]] = []
+    current: Optional[Tuple[str, str]] = None
+    buffer: List[str] = []
+    awaiting_title = False
+
+    def flush():
+        if current and buffer:
+            units.append(_make_unit("MJtK", "modda", current[0], current[1], buffer, url))
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith(MJTK_PUBLICATIONS_PREFIX):
+            break
+        number = None
+        heading_match = MJTK_ARTICLE_RE.match(line)
+        if heading_match:
+            number, skip = heading_match.group(1), 1
+        elif (line.isdigit() and i + 2 < len(lines) and lines[i + 1].isdigit()
+              and lines[i + 2].startswith("-модда.")):
+            number, skip = f"{line}-{lines[i + 1]}", 3
+
+        if number:
+            flush()
+            # Ba'zan sarlavha "-модда.Sarlavha" ko'rinishida bir qatorda keladi
+            inline_title = lines[i + skip - 1].split("-модда.", 1)[1].strip()
+            current, buffer, awaiting_title = (number, inline_title), [], not inline_title
+            i += skip
+            continue
+
+        if current and not MJTK_SECTION_RE.match(line):
+            if awaiting_title:
+                current, awaiting_title = (current[0], line), False
+            else:
+                buffer.append(line)
+        i += 1
+
+    flush()
+    return units
+
+
+PARSERS = {"YHQ": parse_yhq, "MJtK": parse_mjtk}
+
+UNIT_LABELS = {
+    "modda": "{}-modda",
+    "band": "{}-band",
+    "belgi": "{} belgisi",
+    "chiziq": "{} chizig'i",
+    "ilova": "{}-ilova",
+}
+
+
+def unit_label(unit: Dict[str, Any]) -> str:
+    """Birlikning qisqa nomi: "MJtK 128-modda", "YHQ 3.20 belgisi" """
+    return f"{unit['law']} {UNIT_LABELS[unit['kind']].format(unit['number'])}"
+
+
+def parse_law_file(law: str, path: Path) -> List[Dict[str, Any]]:
+    """Bitta qonun faylini birliklarga ajratish"""
+    return PARSERS[law](iter_lines(Path(path)))
+
+
+def unit_to_document(unit: Dict[str, Any]) -> Dict[str, Any]:
+    """Birlik -> RAG dokumenti ({"text", "metadata", "doc_id"})"""
+    label = unit_label(unit)
+    title = f"{label}. {unit['title']}" if unit["title"] else label
+    return {
+        "text": f"# {title}\n\n{unit['text']}",
+        "metadata": {
+            "title": title,
+            "law_id": extract_law_id(unit["url"]) or unit["law"],
+            "law": unit["law"],
+            "article": f"{unit['kind']}:{unit['number']}",
+            "url": unit["url"],
+            "category": "qonunlar",
+            "source": "lex.uz"
+        },
+        "doc_id": f"{unit['law']}_{unit['kind']}_{unit['number']}"
+    }
+
+
+def load_article_law(law: str, path: str) -> List[Dict[str, Any]]:
+    """Qonun faylini modda/band dokumentlariga aylantirish (jarayonlar puli uchun)"""
+    documents: Dict[str, Dict[str, Any]] = {}
+    for unit in parse_law_file(law, Path(path)):
+        document = unit_to_document(unit)
+        documents.setdefault(document["doc_id"], document)
+    return list(documents.values())
+
+
+class ArticleIndex:
+    """Modda/band raqami -> matn jadvali"""
+
+    def __init__(self, qonunlar_path: str = QONUNLAR_PATH):
+        self.qonunlar_path = Path(qonunlar_path)
+        self.units: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._signatures: Dict[str, Tuple[str, float, int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    # ================= YUKLASH =================
+
+    def source_path(self, law: str) -> Optional[Path]:
+        """Qonun manba fayli: yuklovchilar tartibida birinchi mavjudi (.txt, keyin .doc)"""
+        for ext in LOADERS:
+            path = self.qonunlar_path / f"{LAW_FILES[law]['stem']}{ext}"
+            if path.exists():
+                return path
+        return None
+
+    def _current_signatures(self) -> Dict[str, Tuple[str, float, int]]:
+        signatures = {}
+        for law in LAW_FILES:
+            path = self.source_path(law)
+            if path is not None:
+                stat = path.stat()
+                signatures[law] = (path.name, stat.st_mtime, stat.st_size)
+        return signatures
+
+    def load(self) -> int:
+        """Fayllarni tahlil qilish (o'zgarmagan bo'lsa qayta o'qilmaydi)"""
+        with self._lock:
+            signatures = self._current_signatures()
+            if signatures == self._signatures and self.units:
+                return len(self.units)
+
+            units: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+            for law, (file_name, _, _) in signatures.items():
+                path = self.qonunlar_path / file_name
+                try:
+                    parsed = parse_law_file(law, path)
+                except Exception as e:
+                    logger.warning(f"Qonun faylini o'qishda xatolik: {path} - {e}")
+                    continue
+                for unit in parsed:
+                    # Takroriy raqamlarda birinchisi (asosiy matn) qoladi
+                    units.setdefault((unit["law"], unit["kind"], unit["number"]), unit)
+
+            self.units = units
+            self._signatures = signatures
+            logger.info(f"📑 Modda/band indeksi: {len(units)} ta birlik")
+            return len(units)
+
+    def covered_stems(self) -> List[str]:
+        """Modda darajasida tahlil qilinadigan fayl nomlari (umumiy yuklovchi ularni o'tkazib yuboradi)"""
+        return [LAW_FILES[law]["stem"] for law in LAW_FILES if self.source_path(law) is not None]
+
+    def iter_units(self) -> Iterator[Dict[str, Any]]:
+        """Barcha birliklar (RAG indekslash uchun)"""
+        self.load()
+        return iter(list(self.units.values()))
+
+    # ================= QIDIRUV =================
+
+    def get(self, law: str, kind: str, number: str) -> Optional[Dict[str, Any]]:
+        """
+        Aniq birlik; YHQ "12.1-band" topilmasa 12-bandga tushadi
+        (qaytgan birlik raqami so'ralganidan farq qiladi - answer buni foydalanuvchiga aytadi).
+        """
+        self.load()
+        unit = self.units.get((law, kind, number))
+        if unit is None and kind == "band" and "." in number:
+            unit = self.units.get((law, kind, number.split(".")[0]))
+        return unit
+
+    @staticmethod
+    def find_references(question: str) -> Tuple[List[Tuple[str, str, str]], str]:
+        """
+        Savoldagi aniq havolalar.
+        Qaytaradi: ([(qonun, tur, raqam)], havolalardan tozalangan qoldiq matn)
+        """
+        text = normalize_apostrophes(question.lower())
+        references: List[Tuple[str, str, str]] = []
+
+        for law, kind, pattern in QUERY_PATTERNS:
+            for match in pattern.finditer(text):
+                number = match.group(1)
+                if kind == "modda":
+                    sub = match.group(2) or (match.group(3) or "").translate(SUPERSCRIPTS)
+                    if sub:
+                        number = f"{number}-{sub}"
+                reference = (law, kind, number)
+                if reference not in references:
+                    references.append(reference)
+            text = pattern.sub(" ", text)
+
+        return references, LAW_NAME_RE.sub(" ", text)
+
+    @staticmethod
+    def _is_reference_only(rest: str) -> bool:
+        """Havoladan tashqari savolda mazmunli so'zlar deyarli yo'q"""
+        extra = [w for w in QUERY_WORD_RE.findall(rest) if w not in FILLER_WORDS]
+        return len(extra) <= MAX_EXTRA_WORDS
+
+    @staticmethod
+    def format_unit(unit: Dict[str, Any], max_chars: int = ARTICLE_ANSWER_MAX_CHARS,
+                    requested: Optional[str] = None) -> str:
+        """
+        Telegram (HTML) uchun birlik matni.
+        requested - so'ralgan raqam; u topilmay yuqori birlik berilgan bo'lsa (12.1 -> 12) bu aytiladi.
+        """
+        header = f"📖 <b>{unit_label(unit)}</b>"
+        if unit["title"]:
+            header += f"\n<i>{html.escape(unit['title'])}</i>"
+        if requested is not None and requested != unit["number"]:
+            requested_label = UNIT_LABELS[unit["kind"]].format(requested)
+            header = (f"ℹ️ {html.escape(requested_label)} alohida ajratilmagan - "
+                      f"u kiradigan {html.escape(unit_label(unit))} to'liq keltirildi.\n\n{header}")
+
+        body = unit["text"]
+        if len(body) > max_chars:
+            body = body[:max_chars].rsplit("\n", 1)[0] + "\n..."
+        result = f"{header}\n\n{html.escape(body)}"
+        if unit["url"]:
+            result += f"\n\n🔗 {unit['url']}"
+        return result
+
+    def answer(self, question: str) -> Optional[str]:
+        """
+        Aniq modda/band so'rovi bo'lsa jadvaldan javob, aks holda None
+        (savol odatdagi LLM yo'lidan ketadi).
+        """
+        references, rest = self.find_references(question)
+        if not references or not self._is_reference_only(rest):
+            return None
+
+        found = [(self.get(*reference), reference[2]) for reference in references]
+        found = [(unit, number) for unit, number in found if unit is not None]
+        if not found:
+            return None
+
+        self.hits += 1
+        max_chars = ARTICLE_ANSWER_MAX_CHARS // len(found)
+        return "\n\n➖➖➖\n\n".join(
+            self.format_unit(unit, max_chars, requested=number) for unit, number in found
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Indeks statistikasi"""
+        counts: Dict[str, int] = {}
+        for law, kind, _ in self.units:
+            counts[f"{law}:{kind}"] = counts.get(f"{law}:{kind}", 0) + 1
+        return {"units": len(self.units), "by_kind": counts, "hits": self.hits}
+
+
+# Singleton instance
+_article_index = None
+
+
+def get_article_index() -> ArticleIndex:
+    """Modda indeksi singleton"""
+    global _article_index
+    if _article_index is None:
+        _article_index = ArticleIndex()
+    return _article_index
+
+
+if __name__ == "__main__":
+    import time
+
+    logging.basicConfig(level=logging.INFO)
+    index = get_article_index()
+    index.load()
+    print(index.get_stats())
+
+    for q in ["YHQ 12.1-bandi nima haqida?", "MJtK 128-modda", "128¹-modda", "3.20 belgisi",
+              "1.1 chiziq", "Qizil chiroqqa o'tsam jarima qancha?"]:
+        start = time.perf_counter()
+        result = index.answer(q)
+        elapsed = (time.perf_counter() - start) * 1e6
+        print(f"\n=== {q} ({elapsed:.0f} µs)\n{result[:300] if result else None}")
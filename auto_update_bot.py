@@ -1,11 +1,13 @@
 import asyncio
 import logging
 import hashlib
+import json
 from datetime import datetime, timedelta
 from typing import List, Dict
 from pathlib import Path
 
 from enhanced_law_scraper import SmartLawScraper
+from semantic_cache import get_semantic_cache
 
 # Logger sozlash
 logger = logging.getLogger(__name__)
@@ -55,6 +57,8 @@ class AutoUpdateBot:
     async def update_rag_system(self, updates: List[Dict]):
         """RAG tizimini yangilash"""
         logger.info("🔄 RAG tizimi yangilanmoqda...")
+        updated_versions = []
+        documents = []
         for update in updates:
             law_id = update["law_id"]
             
@@ -77,14 +81,25 @@ class AutoUpdateBot:
                         },
                         doc_id=f"law_{law_id}_v{law_data.get('metadata', {}).get('version', 1)}"
                     )
-                    
-                    # RAG ga qo'shish
-                    self.rag_engine.index.insert(doc)
-                    self.rag_engine.index.storage_context.persist()
-                    logger.info(f"✅ RAG ga qo'shildi: {law_data['title']}")
+                    documents.append(doc)
+                    updated_versions.append(f"{law_id}:v{update.get('new_version', '?')}")
                 except Exception as e:
                     logger.error(f"❌ RAG yangilashda xatolik: {e}")
         
+        # Yangi snapshot fonda quriladi va tayyor bo'lgach almashtiriladi
+        # (xizmat qilayotgan indeks va undagi so'rovlarga tegilmaydi)
+        if documents and self.rag_engine is not None:
+            try:
+                added = await asyncio.to_thread(self.rag_engine.add_documents, documents)
+                logger.info(f"✅ RAG ga qo'shildi: {added} ta dokument")
+            except Exception as e:
+                logger.error(f"❌ RAG yangilashda xatolik: {e}")
+                updated_versions = []
+        
+        # Qonun versiyasi o'zgardi - eski keshlangan javoblar endi noto'g'ri bo'lishi mumkin
+        if updated_versions:
+            get_semantic_cache().bump_version(f"({', '.join(updated_versions)})")
+        
         logger.info("✅ RAG tizimi yangilandi")
     
     async def notify_updates(self, updates: List[Dict]):
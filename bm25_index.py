@@ -0,0 +1,161 @@
+"""
+🔎 BM25 KALIT SO'Z INDEKSI
+===========================
+RAG chunklari ustidan jarayon ichidagi inverted indeks (BM25 skorlash).
+
+Modda raqamlari va belgi nomlari ("3.20 belgisi", "128-modda") kabi aniq
+iboralar vektor qidiruvda yomon reytinglanadi - BM25 ularni tarmoq
+chaqiruvisiz topadi. Natijalar vektor qidiruv bilan RRF orqali birlashtiriladi.
+"""
+
+import gzip
+import logging
+import math
+import os
+import pickle
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from transliteration import normalize_apostrophes
+
+logger = logging.getLogger(__name__)
+
+BM25_FILE = "bm25.pkl.gz"
+
+# Raqamlar (3.20, 12.1) yoki so'zlar (lotin/kirill, apostrof bilan)
+TOKEN_RE = re.compile(r"\d+(?:\.\d+)*|[^\W\d_]+(?:'[^\W\d_]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Matnni BM25 tokenlariga bo'lish"""
+    return TOKEN_RE.findall(normalize_apostrophes(text.lower()))
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Bir nechta reytingni RRF bilan birlashtirish: sum(1 / (k + o'rin))"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking):
+            scores[item_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Inkremental yangilanadigan BM25 indeks (node_id darajasida)"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)  # term -> {doc: tf}
+        self.doc_lengths: Dict[int, int] = {}
+        self.node_ids: Dict[int, str] = {}
+        self.ref_doc_ids: Dict[int, str] = {}
+        self.total_length = 0
+        self._next_doc = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, node_id: str, ref_doc_id: str, text: str):
+        """Chunk qo'shish"""
+        tokens = tokenize(text)
+        doc = self._next_doc
+        self._next_doc += 1
+
+        for term, tf in Counter(tokens).items():
+            self.postings[term][doc] = tf
+        self.doc_lengths[doc] = len(tokens)
+        self.node_ids[doc] = node_id
+        self.ref_doc_ids[doc] = ref_doc_id
+        self.total_length += len(tokens)
+
+    def remove_ref_doc(self, ref_doc_id: str) -> int:
+        """Dokumentga tegishli barcha chunklarni o'chirish"""
+        docs = {doc for doc, ref_id in self.ref_doc_ids.items() if ref_id == ref_doc_id}
+        if not docs:
+            return 0
+
+        for term in list(self.postings):
+            posting = self.postings[term]
+            for doc in docs & posting.keys():
+                del posting[doc]
+            if not posting:
+                del self.postings[term]
+
+        for doc in docs:
+            self.total_length -= self.doc_lengths.pop(doc)
+            del self.node_ids[doc]
+            del self.ref_doc_ids[doc]
+        return len(docs)
+
+    def search(self, query: str, top_k: int = 10,
+               allowed: Optional[Set[str]] = None) -> List[Tuple[str, float, float]]:
+        """
+        BM25 qidiruv. allowed berilsa faqat shu node_id lar (metadata filtri) reytinglanadi.
+        Qaytaradi: [(node_id, skor, qamrov)] - qamrov = topilgan so'rov tokenlari ulushi.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.doc_lengths:
+            return []
+
+        n_docs = len(self.doc_lengths)
+        avg_length = self.total_length / n_docs
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / avg_length)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc] += 1
+
+        if allowed is not None:
+            scores = {doc: score for doc, score in scores.items() if self.node_ids[doc] in allowed}
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(self.node_ids[doc], score, matched[doc] / len(terms)) for doc, score in ranked]
+
+    # ================= SAQLASH =================
+
+    def save(self, path: Path):
+        """Indeksni siqilgan holda saqlash (atomar)"""
+        state = {
+            "k1": self.k1,
+            "b": self.b,
+            "postings": dict(self.postings),
+            "doc_lengths": self.doc_lengths,
+            "node_ids": self.node_ids,
+            "ref_doc_ids": self.ref_doc_ids,
+            "total_length": self.total_length,
+            "next_doc": self._next_doc
+        }
+        tmp_path = Path(f"{path}.tmp")
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BM25Index"]:
+        """Saqlangan indeksni yuklash (fayl bo'lmasa None)"""
+        if not Path(path).exists():
+            return None
+        try:
+            with gzip.open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"BM25 indeksini o'qishda xatolik: {e}")
+            return None
+
+        index = cls(k1=state["k1"], b=state["b"])
+        index.postings = defaultdict(dict, state["postings"])
+        index.doc_lengths = state["doc_lengths"]
+        index.node_ids = state["node_ids"]
+        index.ref_doc_ids = state["ref_doc_ids"]
+        index.total_length = state["total_length"]
+        index._next_doc = state["next_doc"]
+        return index
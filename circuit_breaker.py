@@ -0,0 +1,181 @@
+"""
+🔌 CIRCUIT BREAKER - LLM PROVAYDERLARI UCHUN
+=============================================
+Har bir provayder (Assistant, RAG qidiruvi, Gemini, OpenAI chat) bo'yicha oxirgi
+chaqiruvlarning xatolik ulushi va kechikishi kuzatiladi.
+
+Holatlar:
+- closed    - oddiy ish, natijalar oynaga yoziladi
+- open      - xatolar ko'p: provayder chaqirilmaydi (darhol keyingisiga o'tiladi)
+- half_open - open_seconds o'tgach bitta sinov chaqiruvi; muvaffaqiyatli bo'lsa
+              closed, aks holda yana open
+
+Sekin chaqiruv (slow_call_seconds dan uzoq) ham xato hisoblanadi - provayder
+"ishlayapti, lekin timeoutgacha kuttiradi" holatida ham o'chiriladi.
+
+Sozlash (env): BREAKER_WINDOW, BREAKER_MIN_CALLS, BREAKER_FAILURE_RATE,
+BREAKER_OPEN_SECONDS, BREAKER_SLOW_CALL_<NOM> (masalan BREAKER_SLOW_CALL_GEMINI=20)
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Xatolik ulushi hisoblanadigan oxirgi chaqiruvlar soni
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+# Shuncha chaqiruvdan kam bo'lsa breaker ochilmaydi (bitta xato - tasodif)
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+# Open holatida turish vaqti (keyin half_open sinovi)
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Bitta provayderning sog'ligi (event loop ichida ishlatiladi)"""
+
+    def __init__(self, name: str, window: int = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 failure_rate: float = BREAKER_FAILURE_RATE, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 slow_call_seconds: Optional[float] = None):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.state = CLOSED
+        # (muvaffaqiyatli, kechikish soniyada)
+        self.calls: deque = deque(maxlen=window)
+        self.opened_at: Optional[float] = None
+        self.probe_at: Optional[float] = None
+        self.trips = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, name: str, slow_call_seconds: Optional[float] = None) -> "CircuitBreaker":
+        slow = os.getenv(f"BREAKER_SLOW_CALL_{name.upper()}")
+        return cls(name, slow_call_seconds=float(slow) if slow else slow_call_seconds)
+
+    # ---------- holat ----------
+
+    @property
+    def is_open(self) -> bool:
+        """Open va kutish vaqti hali tugamagan (holatni o'zgartirmaydi)"""
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.open_seconds
+
+    def allow(self) -> bool:
+        """Chaqiruv qilish mumkinmi (half_open da bir vaqtda faqat bitta sinov)"""
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            self.probe_at = None
+            logger.info(f"🔌 {self.name}: half_open - sinov chaqiruvi ruxsat etildi")
+
+        if self.state == CLOSED:
+            return True
+        # Sinov natijasi kelmay qolsa (masalan task boshlanmasdan bekor qilindi) - yangi sinov
+        if self.state == HALF_OPEN and (self.probe_at is None or now - self.probe_at >= self.open_seconds):
+            self.probe_at = now
+            return True
+        self.rejected += 1
+        return False
+
+    def _trip(self, reason: str):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probe_at = None
+        self.trips += 1
+        logger.warning(f"🔌 {self.name}: OPEN ({reason}) - {self.open_seconds:.0f} s chaqirilmaydi")
+
+    def _close(self):
+        self.state = CLOSED
+        self.opened_at = None
+        self.probe_at = None
+        self.calls.clear()
+        logger.info(f"🔌 {self.name}: closed - provayder tiklandi")
+
+    # ---------- natijalar ----------
+
+    def record_success(self, latency: float):
+        if self.slow_call_seconds is not None and latency >= self.slow_call_seconds:
+            self.record_failure(f"sekin javob: {latency:.1f} s", latency)
+            return
+        if self.state == HALF_OPEN:
+            self._close()
+            return
+        self.calls.append((True, latency))
+
+    def record_failure(self, error: Any = None, latency: float = 0.0):
+        self.last_error = str(error)[:200] if error is not None else None
+        if self.state == HALF_OPEN:
+            self._trip(f"sinov muvaffaqiyatsiz: {self.last_error}")
+            return
+        if self.state == OPEN:
+            return
+        self.calls.append((False, latency))
+        failures = sum(1 for ok, _ in self.calls if not ok)
+        if len(self.calls) >= self.min_calls and failures / len(self.calls) >= self.failure_rate:
+            self._trip(f"{failures}/{len(self.calls)} xato")
+
+    def release(self):
+        """Natijasiz tugagan chaqiruv (bekor qilindi) - half_open sinovi bo'shatiladi"""
+        if self.state == HALF_OPEN:
+            self.probe_at = None
+
+    def reset(self):
+        """Admin: majburan closed holatiga qaytarish"""
+        self._close()
+        self.rejected = 0
+        self.last_error = None
+
+    def get_state(self) -> Dict[str, Any]:
+        calls = list(self.calls)
+        failures = sum(1 for ok, _ in calls if not ok)
+        latencies = sorted(latency for _, latency in calls)
+        state: Dict[str, Any] = {
+            "state": self.state,
+            "calls": len(calls),
+            "failure_rate": round(failures / len(calls), 3) if calls else 0.0,
+            "p50_latency": round(latencies[len(latencies) // 2], 2) if latencies else None,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
+        if self.state == OPEN:
+            state["retry_in"] = round(max(0.0, self.opened_at + self.open_seconds - time.monotonic()), 1)
+        return state
+
+
+# Provayder nomi -> breaker (jarayon bo'yicha umumiy)
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, slow_call_seconds: Optional[float] = None) -> CircuitBreaker:
+    """Breaker singleton (birinchi chaqiruvda env sozlamalari bilan yaratiladi)"""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker.from_env(name, slow_call_seconds)
+    return _breakers[name]
+
+
+def get_breakers_state() -> Dict[str, Dict[str, Any]]:
+    """Barcha breakerlar holati (health endpoint va /breakers uchun)"""
+    return {name: breaker.get_state() for name, breaker in sorted(_breakers.items())}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    breaker = CircuitBreaker("demo", min_calls=3, open_seconds=0.5)
+    for _ in range(3):
+        breaker.record_failure("timeout", 30.0)
+    print(breaker.allow(), breaker.get_state())
+    time.sleep(0.6)
+    print(breaker.allow(), breaker.allow())
+    breaker.record_success(1.2)
+    print(breaker.get_state())
@@ -0,0 +1,272 @@
+"""
+🧹 INGEST TOZALASH
+===================
+Indekslashdan oldin takroriy matnni olib tashlash.
+
+- BoilerplateLearner: ko'p manba fayllarda takrorlanadigan qatorlarni
+  (lex.uz navigatsiyasi: "Keyingi tahrirga havola", "ONLINE TRANSLATE",
+  til tugmalari) korpusdan o'rganadi va dokumentlardan olib tashlaydi
+- NearDuplicateFilter: chunklarning 64-bitli SimHash imzolari; Hamming
+  masofasi kichik bo'lgan (deyarli bir xil) chunklar embed qilinmaydi.
+  Qaysi dokument qaysi dokument tufayli chunk yo'qotgani saqlanadi - asl
+  dokument o'chirilsa, unga bog'liqlar qayta indekslanishi kerak (pop_dependents)
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from bm25_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+BOILERPLATE_FILE = "boilerplate.json"
+SIMHASH_FILE = "simhash.pkl.gz"
+
+# Qator kamida shuncha manba faylda (va fayllarning shuncha ulushida) uchrasa - boilerplate
+BOILERPLATE_MIN_FILES = int(os.getenv("BOILERPLATE_MIN_FILES", "3"))
+BOILERPLATE_MIN_FILE_FRACTION = float(os.getenv("BOILERPLATE_MIN_FILE_FRACTION", "0.3"))
+BOILERPLATE_MAX_LINE_CHARS = 120
+# Hujjat tuzilmasi qatorlari hech qachon boilerplate emas: raqamlash ("1.", "3"),
+# sarlavhalar ("ILOVA", "12-modda"), kichik harf bilan boshlangan (gap davomi) qatorlar
+STRUCTURAL_LINE_RE = re.compile(
+    r"^(?:[\W\d_]+|[\w.-]*\s*(?:ilova|modda|bob|bo'lim|band|илова|модда|боб|бўлим)\b.*)$",
+    re.IGNORECASE
+)
+
+# Chunklar: Hamming masofasi <= 3 bo'lsa dublikat; qisqa chunklar solishtirilmaydi
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "3"))
+SIMHASH_MIN_TOKENS = int(os.getenv("SIMHASH_MIN_TOKENS", "20"))
+SIMHASH_BANDS = 4  # 64 bit = 4 x 16 bit; masofa <= 3 bo'lsa kamida bitta band mos keladi
+
+
+def _line_key(line: str) -> str:
+    return " ".join(line.split())
+
+
+# ================= BOILERPLATE =================
+
+class BoilerplateLearner:
+    """Manba fayllar bo'yicha takrorlanadigan qatorlarni o'rganish va olib tashlash"""
+
+    def __init__(self, min_files: int = BOILERPLATE_MIN_FILES,
+                 min_file_fraction: float = BOILERPLATE_MIN_FILE_FRACTION):
+        self.min_files = min_files
+        self.min_file_fraction = min_file_fraction
+        self.lines: Set[str] = set()
+
+    @staticmethod
+    def _is_candidate(key: str) -> bool:
+        if not key or len(key) > BOILERPLATE_MAX_LINE_CHARS or key.startswith("#"):
+            return False
+        return not key[0].islower() and not STRUCTURAL_LINE_RE.match(key)
+
+    def learn(self, files: Iterable[Iterable[str]]) -> int:
+        """
+        files: har bir manba fayl uchun uning dokument matnlari.
+        Bitta fayl ichidagi takrorlar hisobga olinmaydi (modda matnidagi qonuniy takrorlar
+        boilerplate bo'lib qolmasligi uchun) - faqat fayllar orasidagi takrorlar.
+        """
+        file_counts: Counter = Counter()
+        total_files = 0
+        for texts in files:
+            total_files += 1
+            seen = set()
+            for text in texts:
+                for line in text.splitlines():
+                    key = _line_key(line)
+                    if self._is_candidate(key):
+                        seen.add(key)
+            file_counts.update(seen)
+
+        threshold = max(self.min_files, int(total_files * self.min_file_fraction))
+        self.lines = {line for line, count in file_counts.items() if count >= threshold}
+        logger.info(f"🧹 Boilerplate: {len(self.lines)} ta qator o'rganildi ({total_files} ta fayl)")
+        return len(self.lines)
+
+    def strip(self, text: str) -> Tuple[str, int]:
+        """Boilerplate qatorlarni olib tashlash. Qaytaradi: (matn, olib tashlangan baytlar)"""
+        if not self.lines:
+            return text, 0
+        kept = []
+        removed_bytes = 0
+        for line in text.splitlines():
+            if _line_key(line) in self.lines:
+                removed_bytes += len(line.encode("utf-8")) + 1
+            else:
+                kept.append(line)
+        return "\n".join(kept), removed_bytes
+
+    def save(self, path: Path):
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"lines": sorted(self.lines)}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BoilerplateLearner":
+        learner = cls()
+        if Path(path).exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    learner.lines = set(json.load(f)["lines"])
+            except Exception as e:
+                logger.warning(f"Boilerplate faylini o'qishda xatolik: {e}")
+        return learner
+
+
+# ================= SIMHASH =================
+
+def simhash(text: str) -> Optional[int]:
+    """64-bitli SimHash (token 2-shingllari bo'yicha); qisqa matnlar uchun None"""
+    tokens = tokenize(text)
+    if len(tokens) < SIMHASH_MIN_TOKENS:
+        return None
+
+    shingles = Counter(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+         for s in shingles],
+        dtype=np.uint64
+    )
+    weights = np.array(list(shingles.values()), dtype=np.float64)
+
+    # (n, 64) bit matritsasi: har bir bit uchun +vazn / -vazn yig'indisi
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    totals = weights @ (bits.astype(np.float64) * 2 - 1)
+    packed = np.packbits(totals > 0, bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+class NearDuplicateFilter:
+    """Chunk imzolari indeksi (band bo'yicha qidiruv + Hamming masofasi)"""
+
+    def __init__(self, max_distance: int = SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.signatures: Dict[str, Tuple[str, int]] = {}  # node_id -> (ref_doc_id, imzo)
+        self.bands: List[Dict[int, Set[str]]] = [defaultdict(set) for _ in range(SIMHASH_BANDS)]
+        # asl ref_doc_id -> chunklari uning dublikati deb tashlangan boshqa dokumentlar
+        self.dependents: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    @staticmethod
+    def _band_keys(signature: int) -> List[int]:
+        return [(signature >> (16 * i)) & 0xFFFF for i in range(SIMHASH_BANDS)]
+
+    def find_duplicate(self, signature: int) -> Optional[str]:
+        """Deyarli bir xil chunkning node_id si (bo'lmasa None)"""
+        for band, key in zip(self.bands, self._band_keys(signature)):
+            for node_id in band.get(key, ()):
+                if bin(self.signatures[node_id][1] ^ signature).count("1") <= self.max_distance:
+                    return node_id
+        return None
+
+    def add(self, node_id: str, ref_doc_id: str, signature: int):
+        self.signatures[node_id] = (ref_doc_id, signature)
+        for band, key in zip(self.bands, self._band_keys(signature)):
+            band[key].add(node_id)
+
+    def remove_ref_doc(self, ref_doc_id: str) -> int:
+        node_ids = [node_id for node_id, (ref_id, _) in self.signatures.items() if ref_id == ref_doc_id]
+        for node_id in node_ids:
+            _, signature = self.signatures.pop(node_id)
+            for band, key in zip(self.bands, self._band_keys(signature)):
+                band[key].discard(node_id)
+                if not band[key]:
+                    del band[key]
+        return len(node_ids)
+
+    def pop_dependents(self, ref_doc_id: str) -> Set[str]:
+        """
+        Chunklari ref_doc_id dagi chunklar tufayli tashlab yuborilgan dokumentlar
+        (ref_doc_id o'chirilganda - ular endi to'liq emas, qayta indekslanishi kerak).
+        """
+        dependents = self.dependents.pop(ref_doc_id, set())
+        for doc_ids in self.dependents.values():
+            doc_ids.discard(ref_doc_id)
+        return dependents
+
+    def filter_nodes(self, nodes: List[Any]) -> Tuple[List[Any], Dict[str, int]]:
+        """
+        Deyarli dublikat chunklarni tashlab yuborish (indeksdagilar va shu partiyadagilar bilan solishtiriladi).
+        Qaytaradi: (qolgan chunklar, {"chunks_removed", "bytes_removed"})
+        """
+        kept = []
+        stats = {"chunks_removed": 0, "bytes_removed": 0}
+        for node in nodes:
+            signature = simhash(node.text)
+            if signature is None:
+                kept.append(node)
+                continue
+            duplicate = self.find_duplicate(signature)
+            if duplicate is not None:
+                owner = self.signatures[duplicate][0]
+                if owner != node.ref_doc_id:
+                    self.dependents[owner].add(node.ref_doc_id)
+                stats["chunks_removed"] += 1
+                stats["bytes_removed"] += len(node.text.encode("utf-8"))
+                continue
+            self.add(node.node_id, node.ref_doc_id, signature)
+            kept.append(node)
+        return kept, stats
+
+    def add_nodes(self, nodes: List[Any]):
+        """Mavjud chunklarni filtrsiz qo'shish (indeksdan qayta qurishda)"""
+        for node in nodes:
+            signature = simhash(node.text)
+            if signature is not None:
+                self.add(node.node_id, node.ref_doc_id, signature)
+
+    # ================= SAQLASH =================
+
+    def save(self, path: Path):
+        tmp_path = Path(f"{path}.tmp")
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            pickle.dump({"max_distance": self.max_distance, "signatures": self.signatures,
+                         "dependents": {doc_id: sorted(ids) for doc_id, ids in self.dependents.items() if ids}},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["NearDuplicateFilter"]:
+        if not Path(path).exists():
+            return None
+        try:
+            with gzip.open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"SimHash indeksini o'qishda xatolik: {e}")
+            return None
+
+        dedup = cls(max_distance=state["max_distance"])
+        for node_id, (ref_doc_id, signature) in state["signatures"].items():
+            dedup.add(node_id, ref_doc_id, signature)
+        for ref_doc_id, doc_ids in state.get("dependents", {}).items():
+            dedup.dependents[ref_doc_id].update(doc_ids)
+        return dedup
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    from rag_engine import RAGEngine
+
+    engine = RAGEngine()
+    documents = engine.load_documents_from_files()
+    print(f"🧹 Boilerplate: {engine.last_cleanup_stats}")
+
+    from llama_index.core import Settings
+    nodes = Settings.node_parser.get_nodes_from_documents(documents)
+    kept, stats = NearDuplicateFilter().filter_nodes(nodes)
+    print(f"🧹 Near-duplicate: {len(nodes)} -> {len(kept)} chunk, {stats}")
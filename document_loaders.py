@@ -0,0 +1,363 @@
+"""
+📂 HUJJAT YUKLOVCHILARI
+========================
+data/qonunlar dagi matnli (.txt) va eski Word (.doc) fayllarni o'qish.
+
+- Kengaytma bo'yicha ro'yxatdan o'tkaziladigan (pluggable) yuklovchilar
+- Fayllar qatorma-qator oqim bilan o'qiladi (butun fayl xotiraga olinmaydi)
+- Kodirovka avtomatik aniqlanadi (BOM, UTF-8, charset_normalizer, CP1251)
+- lex.uz dan saqlangan ".doc" aslida HTML - teglar oqim bilan tozalanadi;
+  haqiqiy OLE .doc uchun antiword ishlatiladi (o'rnatilgan bo'lsa)
+- Katta fayllar bo'limlarga bo'linib, law_id/category metadatasi bilan qaytariladi
+"""
+
+import codecs
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# charset_normalizer ixtiyoriy (requests bilan birga odatda o'rnatilgan bo'ladi)
+try:
+    from charset_normalizer import from_bytes
+    CHARSET_DETECTION_AVAILABLE = True
+except ImportError:
+    CHARSET_DETECTION_AVAILABLE = False
+
+READ_CHUNK_SIZE = 64 * 1024
+ENCODING_SAMPLE_SIZE = 64 * 1024
+DOCUMENT_SECTION_CHARS = int(os.getenv("DOCUMENT_SECTION_CHARS", "200000"))
+FALLBACK_ENCODING = "cp1251"
+# UTF-8 bo'lmagan fayllar uchun ehtimoliy kodirovkalar (kirill matnlar ko'p)
+CANDIDATE_ENCODINGS = ["cp1251", "koi8_r", "cp866", "utf_16", "latin_1"]
+
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+LEX_URL_RE = re.compile(r"lex\.uz/(?:\w+/)?docs/(-?\d+)")
+
+# Kengaytma -> qatorlar oqimini qaytaruvchi funksiya
+LineLoader = Callable[[Path], Iterator[str]]
+LOADERS: Dict[str, LineLoader] = {}
+
+
+def register_loader(*extensions: str):
+    """Yangi fayl turi uchun yuklovchini ro'yxatdan o'tkazish (dekorator)"""
+    def decorator(func: LineLoader) -> LineLoader:
+        for ext in extensions:
+            LOADERS[ext.lower()] = func
+        return func
+    return decorator
+
+
+def supported_extensions() -> List[str]:
+    return sorted(LOADERS)
+
+
+# ================= KODIROVKA =================
+
+def detect_encoding(path: Path, sample_size: int = ENCODING_SAMPLE_SIZE) -> str:
+    """Fayl boshidagi namunaga qarab kodirovkani aniqlash"""
+    with open(path, "rb") as f:
+        sample = f.read(sample_size)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    try:
+        # final=False: namuna oxirida uzilib qolgan ko'p baytli belgi xato hisoblanmaydi
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    if CHARSET_DETECTION_AVAILABLE:
+        best = from_bytes(sample, cp_isolation=CANDIDATE_ENCODINGS).best()
+        if best is not None:
+            return best.encoding
+    return FALLBACK_ENCODING
+
+
+def _iter_decoded_chunks(path: Path, encoding: str) -> Iterator[str]:
+    """Faylni bo'laklab o'qib, inkremental dekodlash"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield decoder.decode(chunk)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+# ================= YUKLOVCHILAR =================
+
+@register_loader(".txt")
+def iter_text_lines(path: Path) -> Iterator[str]:
+    """Oddiy matnli fayl"""
+    encoding = detect_encoding(path)
+    with open(path, "r", encoding=encoding, errors="replace") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """HTML dan ko'rinadigan matnni qatorlar bo'yicha ajratish (oqim rejimida)"""
+
+    BLOCK_TAGS = {
+        "address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "h1", "h2",
+        "h3", "h4", "h5", "h6", "hr", "li", "ol", "p", "pre", "section", "table",
+        "td", "th", "title", "tr", "ul",
+    }
+    SKIP_TAGS = {"head", "script", "style", "noscript", "template", "svg"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._current: List[str] = []
+        self.lines: List[str] = []
+
+    def _break_line(self):
+        line = " ".join("".join(self._current).split())
+        if line:
+            self.lines.append(line)
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._break_line()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self._break_line()
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._break_line()
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._current.append(data)
+
+    def drain(self) -> List[str]:
+        """Tayyor qatorlarni olish (ichki bufer bo'shatiladi)"""
+        lines, self.lines = self.lines, []
+        return lines
+
+    def close(self):
+        super().close()
+        self._break_line()
+
+
+def _iter_html_lines(path: Path) -> Iterator[str]:
+    parser = _HTMLTextExtractor()
+    for chunk in _iter_decoded_chunks(path, detect_encoding(path)):
+        parser.feed(chunk)
+        yield from parser.drain()
+    parser.close()
+    yield from parser.drain()
+
+
+def _iter_ole_doc_lines(path: Path) -> Iterator[str]:
+    """Haqiqiy Word 97-2003 fayli - antiword orqali"""
+    antiword = shutil.which("antiword")
+    if not antiword:
+        logger.warning(f"⚠️ {path.name}: OLE .doc uchun antiword o'rnatilmagan, o'tkazib yuborildi")
+        return
+
+    process = subprocess.Popen(
+        [antiword, "-w", "0", str(path)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        for raw in process.stdout:
+            yield raw.decode("utf-8", errors="replace").rstrip("\r\n")
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+@register_loader(".doc", ".htm", ".html")
+def iter_doc_lines(path: Path) -> Iterator[str]:
+    """Eski .doc: lex.uz eksporti (HTML) yoki OLE formatidagi Word fayli"""
+    with open(path, "rb") as f:
+        head = f.read(len(OLE_MAGIC))
+    if head == OLE_MAGIC:
+        yield from _iter_ole_doc_lines(path)
+    else:
+        yield from _iter_html_lines(path)
+
+
+def iter_lines(path: Path) -> Iterator[str]:
+    """Fayl qatorlarini mos yuklovchi orqali o'qish"""
+    loader = LOADERS.get(path.suffix.lower())
+    if loader is None:
+        raise ValueError(f"Qo'llab-quvvatlanmaydigan fayl turi: {path.suffix}")
+    return loader(path)
+
+
+# ================= DOKUMENTLAR =================
+
+def extract_law_id(text: str) -> Optional[str]:
+    """Matndagi lex.uz havolasidan hujjat ID sini olish"""
+    match = LEX_URL_RE.search(text)
+    return match.group(1) if match else None
+
+
+def iter_law_documents(path: Path, category: Optional[str] = None,
+                       section_chars: int = DOCUMENT_SECTION_CHARS) -> Iterator[Dict[str, Any]]:
+    """
+    Faylni RAG dokumentlariga aylantirish.
+    Har bir bo'lim section_chars dan oshmaydi - xotira fayl hajmiga emas, bo'lim hajmiga bog'liq.
+    Qaytaradi: {"text", "metadata", "doc_id"} lug'atlari.
+    """
+    path = Path(path)
+    category = category or path.parent.name
+    title = path.stem
+    url = ""
+    law_id = None
+
+    def make_document(lines: List[str], part: int) -> Dict[str, Any]:
+        part_title = title if part == 1 else f"{title} ({part}-qism)"
+        return {
+            "text": f"# {part_title}\n\n" + "\n".join(lines),
+            "metadata": {
+                "title": title,
+                "law_id": law_id or path.stem,
+                "url": url,
+                "category": category,
+                "source": "lex.uz" if url else "local_file",
+                "file": path.name,
+                "part": part
+            },
+            "doc_id": f"file_{category}_{path.stem}_{path.suffix.lstrip('.')}_{part}"
+        }
+
+    buffer: List[str] = []
+    size = 0
+    part = 1
+    for line_no, raw in enumerate(iter_lines(path)):
+        line = raw.strip()
+        if not line:
+            continue
+
+        # Scraper sarlavhasi: "SARLAVHA", "Sarlavha: ...", "URL: ..."
+        if line_no < 10 and line.startswith("URL:"):
+            url = line[4:].strip()
+            law_id = extract_law_id(url)
+            continue
+        if line_no < 10 and line.startswith("Sarlavha:"):
+            title = line[len("Sarlavha:"):].strip()
+            continue
+        if law_id is None:
+            law_id = extract_law_id(line)
+
+        buffer.append(line)
+        size += len(line) + 1
+        if size >= section_chars:
+            yield make_document(buffer, part)
+            buffer, size, part = [], 0, part + 1
+
+    if buffer:
+        yield make_document(buffer, part)
+
+
+def select_directory_files(directory: Path, skip_stems: Iterable[str] = ()) -> List[Path]:
+    """
+    Papkadagi qo'llab-quvvatlanadigan fayllar.
+    Bir xil nomli fayllardan (YHQ.txt / YHQ.doc) faqat bittasi - LOADERS tartibidagi birinchisi olinadi.
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+
+    skip = set(skip_stems)
+    preference = {ext: i for i, ext in enumerate(LOADERS)}
+    chosen: Dict[str, Path] = {}
+    for path in sorted(directory.iterdir()):
+        ext = path.suffix.lower()
+        if not path.is_file() or ext not in LOADERS or path.stem in skip:
+            continue
+        current = chosen.get(path.stem)
+        if current is None or preference[ext] < preference[current.suffix.lower()]:
+            chosen[path.stem] = path
+    return list(chosen.values())
+
+
+def iter_directory_documents(directory: Path, skip_stems: Iterable[str] = ()) -> Iterator[Dict[str, Any]]:
+    """Papkadagi barcha qo'llab-quvvatlanadigan fayllardan dokumentlar"""
+    for path in select_directory_files(directory, skip_stems):
+        try:
+            yield from iter_law_documents(path)
+        except Exception as e:
+            logger.warning(f"Faylni o'qishda xatolik: {path} - {e}")
+
+
+# ================= FAYL -> DOKUMENTLAR (jarayonlar puli uchun) =================
+# Modul darajasidagi funksiyalar - ProcessPoolExecutor ularni pickle qila oladi.
+# Natija oddiy lug'atlar ro'yxati: {"text", "metadata", "doc_id"}
+
+def load_json_law(path: str) -> List[Dict[str, Any]]:
+    """Scraper saqlagan JSON qonun fayli"""
+    json_file = Path(path)
+    with open(json_file, "rb") as f:
+        law_data = json.loads(f.read())
+
+    content = law_data.get("content", "") if isinstance(law_data, dict) else ""
+    if not content or len(content) < 50:
+        return []
+
+    title = law_data.get("title", "Noma'lum")
+    law_id = law_data.get("id", "")
+    return [{
+        "text": f"# {title}\n\n{content}",
+        "metadata": {
+            "title": title,
+            "law_id": law_id,
+            "url": law_data.get("url", ""),
+            "category": json_file.parent.name,
+            "source": "lex.uz",
+            "date": str(law_data.get("fetched_at", ""))[:10]
+        },
+        "doc_id": f"law_{law_id}_{json_file.stem}"
+    }]
+
+
+def load_pdf_law(path: str) -> List[Dict[str, Any]]:
+    """Qo'lda yuklangan PDF (pdfplumber bilan, sahifalar ro'yxat orqali birlashtiriladi)"""
+    import pdfplumber
+
+    pdf_file = Path(path)
+    with pdfplumber.open(pdf_file) as pdf:
+        text = "".join(page.extract_text() or "" for page in pdf.pages)
+
+    if len(text) < 100:
+        return []
+    return [{
+        "text": f"# {pdf_file.stem}\n\n{text}",
+        "metadata": {
+            "title": pdf_file.stem,
+            "law_id": f"pdf_{pdf_file.stem}",
+            "source": "manual_upload"
+        },
+        "doc_id": f"pdf_{pdf_file.stem}"
+    }]
+
+
+def load_text_law(path: str) -> List[Dict[str, Any]]:
+    """.txt/.doc fayl (bo'limlarga bo'lingan)"""
+    return list(iter_law_documents(Path(path)))
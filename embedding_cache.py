@@ -0,0 +1,218 @@
+"""
+💾 EMBEDDING KESHI
+===================
+Chunk embeddinglarini diskda (SQLite) saqlash.
+
+Kalit: model nomi + normallashtirilgan chunk matnining SHA-256 hashi.
+O'zgarmagan hujjatlarni qayta indekslashda embedding API chaqirilmaydi.
+
+Savol (query) embeddinglari diskka yozilmaydi: har bir noyob savol bazani
+cheksiz o'stirardi - ular xotiradagi cheklangan LRU da (QUERY_EMBEDDING_CACHE_SIZE).
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.db")
+# Xotirada saqlanadigan savol embeddinglari soni
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1000"))
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Kesh kaliti uchun matnni normallashtirish (NFC, bo'shliqlar)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """SQLite asosidagi embedding keshi (thread-safe)"""
+
+    def __init__(self, db_path: str = EMBEDDING_CACHE_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, text: str, kind: str = "text") -> str:
+        """model + tur + normallashtirilgan matn -> kesh kaliti"""
+        payload = f"{model_name}\0{kind}\0{normalize_chunk_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Bir nechta kalit bo'yicha embeddinglarni olish"""
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite parametrlar chegarasi (999) uchun bo'laklab so'rash
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """Embeddinglarni keshga yozish"""
+        if not items:
+            return
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss hisoblagichlari"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "path": str(self.db_path)
+        }
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Istalgan LlamaIndex embedding modelini keshlar bilan o'rash:
+    chunk embeddinglari - diskda, savol embeddinglari - xotiradagi LRU da.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+    _queries: Any = PrivateAttr()
+    _query_lock: Any = PrivateAttr()
+    _query_cache_size: int = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, cache: EmbeddingCache,
+                 query_cache_size: int = QUERY_EMBEDDING_CACHE_SIZE, **kwargs: Any):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs
+        )
+        self._inner = inner
+        self._cache = cache
+        self._queries = OrderedDict()
+        self._query_lock = threading.Lock()
+        self._query_cache_size = query_cache_size
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def inner(self) -> BaseEmbedding:
+        return self._inner
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    def _split(self, texts: List[str], kind: str):
+        """Keshdan topilganlarni va API ga yuborilishi kerak bo'lganlarni ajratish"""
+        keys = [EmbeddingCache.make_key(self.model_name, text, kind) for text in texts]
+        found = self._cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        return keys, found, missing
+
+    def _merge(self, keys: List[str], found: Dict[str, List[float]],
+               missing: List[int], embeddings: List[List[float]]) -> List[List[float]]:
+        new_items = {keys[i]: emb for i, emb in zip(missing, embeddings)}
+        self._cache.put_many(new_items)
+        found.update(new_items)
+        return [found[key] for key in keys]
+
+    # ================= MATN (chunk) EMBEDDINGLARI =================
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split(texts, "text")
+        embeddings = self._inner._get_text_embeddings([texts[i] for i in missing]) if missing else []
+        return self._merge(keys, found, missing, embeddings)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        # SQLite o'qish/yozish event loopni bloklamasin
+        keys, found, missing = await asyncio.to_thread(self._split, texts, "text")
+        embeddings = await self._inner._aget_text_embeddings([texts[i] for i in missing]) if missing else []
+        return await asyncio.to_thread(self._merge, keys, found, missing, embeddings)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    # ================= SAVOL (query) EMBEDDINGLARI =================
+
+    def _query_get(self, key: str) -> Optional[List[float]]:
+        with self._query_lock:
+            embedding = self._queries.get(key)
+            if embedding is not None:
+                self._queries.move_to_end(key)
+            return embedding
+
+    def _query_put(self, key: str, embedding: List[float]):
+        with self._query_lock:
+            self._queries[key] = embedding
+            self._queries.move_to_end(key)
+            while len(self._queries) > self._query_cache_size:
+                self._queries.popitem(last=False)
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        key = EmbeddingCache.make_key(self.model_name, query, "query")
+        embedding = self._query_get(key)
+        if embedding is None:
+            embedding = self._inner._get_query_embedding(query)
+            self._query_put(key, embedding)
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        key = EmbeddingCache.make_key(self.model_name, query, "query")
+        embedding = self._query_get(key)
+        if embedding is None:
+            embedding = await self._inner._aget_query_embedding(query)
+            self._query_put(key, embedding)
+        return embedding
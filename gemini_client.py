@@ -0,0 +1,276 @@
+"""
+♊ GEMINI KLIENTI
+=================
+Bot ishga tushganda bir marta yaratiladigan Gemini klienti.
+
+- genai.configure va GenerativeModel bir marta (har so'rovda emas): configure
+  ichki klientlarni qayta yaratadi, ya'ni har safar yangi ulanish ochilardi
+- Faqat asinxron API (generate_content_async) - event loop bloklanmaydi
+- Har bir chaqiruvga timeout (GEMINI_TIMEOUT) va bir vaqtdagi chaqiruvlar
+  soniga chegara (GEMINI_MAX_CONCURRENCY)
+- on_text berilsa javob oqim bilan (stream=True) olinadi
+- Prompt shabloni (prompt_templates.py) berilsa uning statik qismi va pinned qonun
+  matnlari context caching bilan bir marta yuklanadi (CachedContent, GEMINI_CACHE_TTL);
+  so'rovda faqat dinamik qism yuboriladi. Kesh yaratilmasa (model minimal hajmidan
+  kichik, model qo'llamaydi) faqat statik qism system_instruction bo'ladi - pinned
+  matnlar har so'rovda keshsiz yuborilmaydi (OpenAI chat prompti bilan bir xil)
+
+Ishlatish:
+    client = get_gemini_client()
+    text = await client.generate(prompt)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+# Bitta javob uchun chegara (soniya), oqim bo'lsa - butun oqim uchun
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+# Context caching (statik prompt + pinned qonun matnlari)
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "1") == "1"
+# Keshlash versiyali model nomini talab qiladi
+GEMINI_CACHE_MODEL = os.getenv("GEMINI_CACHE_MODEL", f"models/{GEMINI_MODEL}-002")
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", "3600"))
+# Bundan kichik kontekst keshlanmaydi (API minimal hajmni talab qiladi);
+# berilmasa - model bo'yicha (GEMINI_CACHE_MIN_TOKENS_BY_MODEL)
+GEMINI_CACHE_MIN_TOKENS = os.getenv("GEMINI_CACHE_MIN_TOKENS")
+# Explicit CachedContent uchun minimal kirish tokenlari (model nomi prefiksi bo'yicha)
+GEMINI_CACHE_MIN_TOKENS_BY_MODEL = (
+    ("gemini-1.5", 32768),
+    ("gemini-2.5-pro", 4096),
+    ("gemini-2.5-flash", 1024),
+    ("gemini-2.0", 4096),
+)
+# Kesh tugashiga shuncha qolganda muddati uzaytiriladi
+GEMINI_CACHE_REFRESH_BEFORE = 300
+
+def cache_min_tokens(model: str = GEMINI_CACHE_MODEL) -> int:
+    """Model keshlay oladigan eng kichik kontekst (noma'lum model - eng qattiq chegara)"""
+    if GEMINI_CACHE_MIN_TOKENS:
+        return int(GEMINI_CACHE_MIN_TOKENS)
+    name = model.split("/")[-1]
+    for prefix, tokens in GEMINI_CACHE_MIN_TOKENS_BY_MODEL:
+        if name.startswith(prefix):
+            return tokens
+    return max(tokens for _, tokens in GEMINI_CACHE_MIN_TOKENS_BY_MODEL)
+
+
+try:
+    import google.generativeai as genai
+    from google.generativeai import caching
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+
+class GeminiClient:
+    """Uzoq yashaydigan Gemini modeli (ulanishlar so'rovlar orasida qayta ishlatiladi)"""
+
+    def __init__(self, api_key: Optional[str] = GOOGLE_API_KEY, model_name: str = GEMINI_MODEL,
+                 timeout: float = GEMINI_TIMEOUT, max_concurrency: int = GEMINI_MAX_CONCURRENCY):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.stats: Dict[str, int] = defaultdict(int)
+        self.model = None
+        # shablon nomi -> (keshlangan model, CachedContent, tugash vaqti monotonic)
+        self.contexts: Dict[str, Tuple[Any, Any, float]] = {}
+        # shablon nomi -> statik qism system_instruction bo'lgan model (kesh bo'lmasa)
+        self.system_models: Dict[str, Any] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        # Kesh yaratilmagan shablonlar uchun keyingi urinish vaqti
+        self._cache_retry_at: Dict[str, float] = {}
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.model is not None
+
+    def start(self) -> bool:
+        """Klientni sozlash (bot ishga tushganda bir marta)"""
+        if self.model is not None:
+            return True
+        if not GENAI_AVAILABLE:
+            logger.warning("⚠️ google-generativeai o'rnatilmagan - Gemini o'chirilgan")
+            return False
+        if not self.api_key:
+            logger.warning("⚠️ GOOGLE_API_KEY topilmadi - Gemini o'chirilgan")
+            return False
+        genai.configure(api_key=self.api_key)
+        self.model = genai.GenerativeModel(self.model_name)
+        logger.info(f"♊ Gemini klienti tayyor: {self.model_name} "
+                    f"(timeout {self.timeout:.0f} s, parallel {self.max_concurrency})")
+        return True
+
+    # ---------- context caching ----------
+
+    def _create_or_extend_cache(self, template) -> Tuple[Any, Any]:
+        """Sinxron (thread ichida): mavjud kesh muddatini uzaytirish yoki yangisini yaratish"""
+        entry = self.contexts.get(template.name)
+        ttl = timedelta(seconds=GEMINI_CACHE_TTL)
+        if entry is not None:
+            model, cache, _ = entry
+            try:
+                cache.update(ttl=ttl)
+                return model, cache
+            except Exception as e:
+                logger.info(f"♊ {template.name} keshi uzaytirilmadi, qayta yaratiladi: {e}")
+
+        pinned = template.pinned
+        cache = caching.CachedContent.create(
+            model=GEMINI_CACHE_MODEL,
+            display_name=f"yurist-{template.name}",
+            system_instruction=template.static,
+            contents=[pinned] if pinned else None,
+            ttl=ttl,
+        )
+        return genai.GenerativeModel.from_cached_content(cache), cache
+
+    async def prepare_context(self, template) -> bool:
+        """
+        Shablon kontekstini Gemini keshiga yuklash (bot ishga tushganda va muddati tugashidan oldin).
+        Qaytaradi: True - kesh tayyor.
+        """
+        if not GEMINI_CONTEXT_CACHE or not self.start():
+            return False
+        # Keyingi urinish (muvaffaqiyatsiz bo'lsa) - bir TTL dan keyin
+        self._cache_retry_at[template.name] = time.monotonic() + GEMINI_CACHE_TTL
+        # pinned matn article_index dan o'qiladi - event loop bloklanmasin
+        await asyncio.to_thread(lambda: template.pinned)
+        size = template.static_tokens + template.stats["pinned_tokens"]
+        min_tokens = cache_min_tokens()
+        if size < min_tokens:
+            # Hajm o'zgarmaydi - qayta urinilmaydi, system_instruction ishlatiladi
+            self._cache_retry_at[template.name] = float("inf")
+            logger.info(f"♊ {template.name}: {size} token < {min_tokens} ({GEMINI_CACHE_MODEL} minimumi) - "
+                        f"keshlanmaydi, system_instruction ishlatiladi")
+            return False
+        try:
+            model, cache = await asyncio.to_thread(self._create_or_extend_cache, template)
+        except Exception as e:
+            self.stats["cache_errors"] += 1
+            logger.warning(f"⚠️ Gemini context cache yaratilmadi ({template.name}): {e}")
+            return False
+        self._cache_retry_at.pop(template.name, None)
+        self.contexts[template.name] = (model, cache, time.monotonic() + GEMINI_CACHE_TTL)
+        logger.info(f"♊ {template.name} konteksti keshlandi: ~{size} token, {GEMINI_CACHE_TTL} s")
+        return True
+
+    async def _model_for(self, template) -> Any:
+        """
+        Shablon uchun model: kesh muddati tugashiga oz qolsa - fonda yangilanadi.
+        Kesh bo'lmasa faqat statik qism system_instruction sifatida (pinned matnlar
+        keshsiz har so'rov narxini oshiradi).
+        """
+        entry = self.contexts.get(template.name)
+        now = time.monotonic()
+        if GEMINI_CONTEXT_CACHE and (entry is None or entry[2] - now < GEMINI_CACHE_REFRESH_BEFORE):
+            task = self._refreshing.get(template.name)
+            if (task is None or task.done()) and now >= self._cache_retry_at.get(template.name, 0.0):
+                self._refreshing[template.name] = asyncio.create_task(self.prepare_context(template))
+        if entry is not None and entry[2] > now:
+            self.stats["cached_requests"] += 1
+            return entry[0]
+        if template.name not in self.system_models:
+            self.system_models[template.name] = genai.GenerativeModel(
+                self.model_name, system_instruction=template.static
+            )
+        return self.system_models[template.name]
+
+    # ---------- generatsiya ----------
+
+    async def generate(self, prompt: str, on_text: Optional[Callable[[str], None]] = None,
+                       timeout: Optional[float] = None, template=None) -> str:
+        """
+        Javob matni. on_text - oqimda har bir bo'lakdan keyin jami matn bilan chaqiriladi.
+        template (PromptTemplate) berilsa prompt faqat dinamik qism bo'lishi kerak -
+        statik qism keshdan yoki system_instruction dan olinadi.
+        Xatolar: RuntimeError (sozlanmagan), asyncio.TimeoutError, API istisnolari.
+        """
+        if not self.start():
+            raise RuntimeError("Gemini klienti sozlanmagan")
+        timeout = timeout or self.timeout
+        model = await self._model_for(template) if template is not None else self.model
+
+        async with self.semaphore:
+            self.stats["requests"] += 1
+            try:
+                return await asyncio.wait_for(self._generate(model, prompt, on_text, timeout, template), timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                logger.warning(f"⏱ Gemini {timeout:.0f} s ichida javob bermadi")
+                raise
+            except asyncio.CancelledError:
+                self.stats["cancelled"] += 1
+                raise
+            except Exception:
+                self.stats["failed"] += 1
+                raise
+
+    async def _generate(self, model, prompt: str, on_text: Optional[Callable[[str], None]],
+                        timeout: float, template=None) -> str:
+        request_options = {"timeout": timeout}
+        if on_text is None:
+            response = await model.generate_content_async(prompt, request_options=request_options)
+            text = response.text
+        else:
+            text = ""
+            response = await model.generate_content_async(prompt, stream=True, request_options=request_options)
+            async for chunk in response:
+                text += chunk.text
+                on_text(text)
+
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and template is not None:
+            template.record_usage("gemini", usage.prompt_token_count, usage.cached_content_token_count)
+        return text
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "model": self.model_name,
+            "initialized": self.is_initialized,
+            "cached_contexts": sorted(self.contexts),
+            "in_flight": self.max_concurrency - self.semaphore._value,
+        }
+
+
+# Singleton
+_gemini_client: Optional[GeminiClient] = None
+
+
+def get_gemini_client() -> GeminiClient:
+    """Gemini klienti singleton olish"""
+    global _gemini_client
+    if _gemini_client is None:
+        _gemini_client = GeminiClient()
+    return _gemini_client
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    async def demo():
+        client = get_gemini_client()
+        questions = ["Qizil chiroqqa o'tish jarimasi qancha?", "Haydovchilik guvohnomasi muddati?"]
+        answers = await asyncio.gather(*(client.generate(q) for q in questions), return_exceptions=True)
+        for question, answer in zip(questions, answers):
+            print(f"❓ {question}\n💬 {answer}\n")
+        print(client.get_stats())
+
+    asyncio.run(demo())
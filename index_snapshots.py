@@ -0,0 +1,148 @@
+"""
+📸 INDEKS SNAPSHOTLARI
+=======================
+RAG indeksining versiyalangan nusxalari (zero-downtime qayta qurish).
+
+Tuzilma (INDEX_PATH ichida):
+- snapshots/<nom>/  - to'liq indeks (vektorlar, BM25, manifestlar)
+- snapshots/<nom>/READY - snapshot to'liq yozilgan belgisi
+- CURRENT          - hozir xizmat qilayotgan snapshot nomi (atomar almashtiriladi)
+
+Yangi indeks doim yangi papkada quriladi (joriy snapshotdan nusxa olinadi),
+tayyor bo'lgach CURRENT almashtiriladi. Eski snapshotlar tezkor rollback
+uchun saqlanadi (SNAPSHOT_KEEP ta).
+
+CURRENT bo'lmasa (eski tuzilma) indeks to'g'ridan-to'g'ri INDEX_PATH da deb
+hisoblanadi; birinchi qayta qurishda u snapshotga ko'chiriladi.
+"""
+
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+READY_FILE = "READY"
+
+# Joriy snapshotdan tashqari nechta oldingisi saqlanadi
+SNAPSHOT_KEEP = int(os.getenv("RAG_SNAPSHOT_KEEP", "2"))
+
+# Bu fayllar faqat os.replace bilan yoziladi - nusxalash o'rniga hard link yetarli
+# (yangi snapshotga yozish eski snapshotdagi faylni o'zgartirmaydi)
+LINKABLE_SUFFIXES = (".bin", ".idx", ".npz", ".gz")
+
+
+class SnapshotManager:
+    """Snapshot papkalari, CURRENT ko'rsatkichi va eski nusxalarni tozalash"""
+
+    def __init__(self, root: Path, keep: int = SNAPSHOT_KEEP):
+        self.root = Path(root)
+        self.snapshots_path = self.root / SNAPSHOTS_DIR
+        self.keep = keep
+        # Shu jarayonda hozir qurilayotgan (create qilingan, hali activate/discard qilinmagan) snapshotlar
+        self.building: Set[str] = set()
+
+    # ================= HOLAT =================
+
+    def current_name(self) -> Optional[str]:
+        """Xizmat qilayotgan snapshot nomi (eski tuzilmada None)"""
+        try:
+            name = (self.root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        if name and self.is_ready(name):
+            return name
+        logger.warning(f"⚠️ CURRENT snapshoti topilmadi: {name}")
+        return None
+
+    def path(self, name: Optional[str]) -> Path:
+        """Snapshot papkasi (None - eski tuzilma, INDEX_PATH ning o'zi)"""
+        return self.snapshots_path / name if name else self.root
+
+    def is_ready(self, name: str) -> bool:
+        return (self.snapshots_path / name / READY_FILE).exists()
+
+    def list(self) -> List[str]:
+        """Tayyor snapshotlar (eskidan yangiga)"""
+        if not self.snapshots_path.exists():
+            return []
+        return sorted(p.name for p in self.snapshots_path.iterdir() if p.is_dir() and self.is_ready(p.name))
+
+    # ================= QURISH =================
+
+    @staticmethod
+    def _new_name() -> str:
+        """Vaqt bo'yicha tartiblanadigan nom (mikrosekundgacha)"""
+        return f"v{datetime.now():%Y%m%d-%H%M%S-%f}"
+
+    def create(self, base: Optional[Path] = None) -> str:
+        """
+        Yangi (hali tayyor emas) snapshot papkasi.
+        base berilsa uning fayllari ko'chiriladi (katta binar fayllar - hard link).
+        """
+        name = self._new_name()
+        target = self.snapshots_path / name
+        target.mkdir(parents=True)
+        self.building.add(name)
+
+        if base is not None and base.exists():
+            for source in base.iterdir():
+                if not source.is_file() or source.name in (CURRENT_FILE, READY_FILE) or source.suffix == ".tmp":
+                    continue
+                destination = target / source.name
+                if source.suffix in LINKABLE_SUFFIXES:
+                    try:
+                        os.link(source, destination)
+                        continue
+                    except OSError:
+                        pass
+                shutil.copy2(source, destination)
+        return name
+
+    def discard(self, name: str):
+        """Muvaffaqiyatsiz qurilgan snapshotni o'chirish"""
+        self.building.discard(name)
+        shutil.rmtree(self.snapshots_path / name, ignore_errors=True)
+
+    def activate(self, name: str):
+        """Snapshotni tayyor deb belgilash va CURRENT ni atomar almashtirish"""
+        (self.snapshots_path / name / READY_FILE).write_text(datetime.now().isoformat(), encoding="utf-8")
+        tmp_path = self.root / f"{CURRENT_FILE}.tmp"
+        tmp_path.write_text(name, encoding="utf-8")
+        os.replace(tmp_path, self.root / CURRENT_FILE)
+        self.building.discard(name)
+        logger.info(f"📸 Snapshot faollashtirildi: {name}")
+
+    def prune(self):
+        """Joriy va oxirgi `keep` ta snapshotdan tashqarisini (va chala qurilganlarni) o'chirish"""
+        if not self.snapshots_path.exists():
+            return
+        current = self.current_name()
+        ready = [name for name in self.list() if name != current]
+        stale = ready[:max(len(ready) - self.keep, 0)]
+
+        # Chala qolgan papkalar (qurish vaqtida to'xtagan jarayon) - nomidan qat'i nazar,
+        # faqat hozir qurilayotgani qoldiriladi
+        for path in self.snapshots_path.iterdir():
+            if (path.is_dir() and path.name != current and path.name not in self.building
+                    and not self.is_ready(path.name)):
+                stale.append(path.name)
+
+        for name in stale:
+            shutil.rmtree(self.snapshots_path / name, ignore_errors=True)
+        if stale:
+            logger.info(f"🗑 {len(stale)} ta eski snapshot o'chirildi")
+
+    def previous(self, steps: int = 1) -> Optional[str]:
+        """Joriydan `steps` ta oldingi tayyor snapshot (rollback uchun)"""
+        names = self.list()
+        current = self.current_name()
+        if current not in names:
+            return None
+        position = names.index(current) - steps
+        return names[position] if position >= 0 else None
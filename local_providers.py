@@ -0,0 +1,175 @@
+"""
+🧪 LOKAL PROVAYDERLAR
+======================
+Gemini kalitlarisiz (CI, benchmark) ishlaydigan deterministik o'rinbosarlar.
+
+- HashingEmbedding: token va belgi n-grammlarining feature hashing embeddingi
+  (tarmoq yo'q, bir xil matn - doim bir xil vektor)
+- ExtractiveLLM: promptdagi kontekstdan savolga eng mos gaplarni qaytaradi
+  (mode="echo" - savolning o'zini)
+
+Tanlash (rag_engine.py): RAG_EMBED_PROVIDER=hashing, RAG_LLM_PROVIDER=extractive|echo
+"""
+
+import logging
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Any, List
+
+import numpy as np
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.base.llms.types import (
+    CompletionResponse,
+    CompletionResponseGen,
+    LLMMetadata,
+)
+from llama_index.core.llms.callbacks import llm_completion_callback
+from llama_index.core.llms.custom import CustomLLM
+
+from bm25_index import tokenize
+from transliteration import normalize_text
+
+logger = logging.getLogger(__name__)
+
+LOCAL_EMBED_DIM = int(os.getenv("RAG_LOCAL_EMBED_DIM", "256"))
+# Belgi n-grammlari uzunligi (so'z shakllari - qo'shimchalar - bir-biriga yaqin bo'lishi uchun)
+CHAR_NGRAM = 4
+LOCAL_LLM_SENTENCES = int(os.getenv("RAG_LOCAL_LLM_SENTENCES", "3"))
+
+# LlamaIndex QA promptidagi kontekst va savol (compact/refine rejimlari ham shu tuzilmada)
+CONTEXT_RE = re.compile(r"-{5,}\n(.*?)\n-{5,}", re.DOTALL)
+QUERY_RE = re.compile(r"Query: (.*?)\n", re.DOTALL)
+SENTENCE_RE = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+
+# ================= EMBEDDING =================
+
+def _features(text: str) -> Counter:
+    """So'z tokenlari + so'z ichidagi belgi n-grammlari"""
+    features: Counter = Counter()
+    for token in tokenize(normalize_text(text)):
+        features[token] += 1
+        padded = f"#{token}#"
+        for i in range(max(len(padded) - CHAR_NGRAM + 1, 1)):
+            features["#" + padded[i:i + CHAR_NGRAM]] += 1
+    return features
+
+
+def hashing_vector(text: str, dim: int = LOCAL_EMBED_DIM) -> np.ndarray:
+    """Feature hashing (crc32 - jarayonlar orasida barqaror), log(1 + tf) vazn, L2 normallangan"""
+    vector = np.zeros(dim, dtype=np.float32)
+    features = _features(text)
+    if not features:
+        return vector
+    hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint64, count=len(features))
+    weights = np.log1p(np.fromiter(features.values(), dtype=np.float32, count=len(features)))
+    signs = np.where(hashes & (1 << 31), -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, (hashes % dim).astype(np.int64), signs * weights)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class HashingEmbedding(BaseEmbedding):
+    """Deterministik lokal embedding (API kaliti va tarmoqsiz)"""
+
+    dim: int = LOCAL_EMBED_DIM
+
+    def __init__(self, dim: int = LOCAL_EMBED_DIM, **kwargs: Any):
+        super().__init__(model_name=f"local-hashing-{dim}", dim=dim, embed_batch_size=100, **kwargs)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashingEmbedding"
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return hashing_vector(text, self.dim).tolist()
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return [hashing_vector(text, self.dim).tolist() for text in texts]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return hashing_vector(query, self.dim).tolist()
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embedding(text)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._get_text_embeddings(texts)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+
+# ================= LLM =================
+
+class ExtractiveLLM(CustomLLM):
+    """
+    LLM o'rinbosari: javob - kontekstdagi savol tokenlari bilan eng ko'p kesishgan gaplar
+    (asl tartibda). mode="echo" bo'lsa savol (yoki butun prompt) qaytariladi.
+    """
+
+    mode: str = "extractive"
+    max_sentences: int = LOCAL_LLM_SENTENCES
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ExtractiveLLM"
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name=f"local-{self.mode}", num_output=512)
+
+    def _answer(self, prompt: str) -> str:
+        query_match = QUERY_RE.search(prompt)
+        query = query_match.group(1).strip() if query_match else prompt
+        if self.mode == "echo":
+            return query
+
+        context = "\n".join(CONTEXT_RE.findall(prompt))
+        sentences = [s.strip() for s in SENTENCE_RE.split(context) if len(s.strip()) > 20]
+        query_tokens = set(tokenize(normalize_text(query)))
+        scored = []
+        for position, sentence in enumerate(sentences):
+            overlap = len(query_tokens & set(tokenize(normalize_text(sentence))))
+            if overlap:
+                scored.append((overlap, -position, sentence))
+        best = sorted(scored, reverse=True)[:self.max_sentences]
+        if not best:
+            return "Kontekstda ma'lumot topilmadi."
+        return " ".join(sentence for _, _, sentence in sorted(best, key=lambda item: -item[1]))
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        return CompletionResponse(text=self._answer(prompt))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        text = self._answer(prompt)
+
+        def gen() -> CompletionResponseGen:
+            sent = ""
+            for word in text.split(" "):
+                delta = word if not sent else f" {word}"
+                sent += delta
+                yield CompletionResponse(text=sent, delta=delta)
+
+        return gen()
+
+
+if __name__ == "__main__":
+    embed = HashingEmbedding()
+    a = np.array(embed.get_text_embedding("Piyodalar o'tish joyida haydovchi to'xtashi shart"))
+    b = np.array(embed.get_query_embedding("piyodalar o'tish joyi"))
+    c = np.array(embed.get_query_embedding("farmatsevtika faoliyati litsenziyasi"))
+    print(f"o'xshash: {a @ b:.3f}, boshqa mavzu: {a @ c:.3f}")
+
+    llm = ExtractiveLLM()
+    prompt = (
+        "Context information is below.\n---------------------\n"
+        "Haydovchi piyodalar o'tish joyida to'xtashi shart. Tezlik 60 km/soatdan oshmasligi kerak.\n"
+        "---------------------\nQuery: piyodalar o'tish joyida nima qilish kerak?\nAnswer: "
+    )
+    print(llm.complete(prompt).text)
@@ -28,7 +28,13 @@ Lex.uz'dan qonunlarni avtomatik yuklab, RAG tizimi orqali aniq javoblar beradi.
 - /update_laws - Qonunlarni yangilash
 - /law_stats - Qonunlar statistikasi
 - /search_law [so'z] - Qonun qidirish
+- /rollback_index [qadam] - RAG indeksini oldingi snapshotga qaytarish
+- /breakers [reset nom] - LLM provayderlari breakerlari holati / qayta yoqish
+
+👤 FOYDALANUVCHI BUYRUQLARI:
+- /cancel - Tayyorlanayotgan javobni bekor qilish
 """
+import html
 import os
 from aiohttp import web
 import asyncio
@@ -36,7 +42,7 @@ import logging
 import sqlite3
 from datetime import datetime
 from os import getenv
-from typing import Any, Awaitable, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 from aiogram import Bot, Dispatcher, F, Router
 from aiogram.client.default import DefaultBotProperties
@@ -57,11 +63,19 @@ from auto_update_bot import AutoUpdateBot
 from monitoring_dashboard import LawMonitor
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
+from article_index import get_article_index
+from circuit_breaker import get_breaker, get_breakers_state
+from gemini_client import get_gemini_client
+from metadata_index import traffic_filters
+from prompt_templates import get_prompt_stats, get_template
+from provider_race import Provider, get_stats as get_provider_stats, race
+from telegram_stream import StreamSink, ThrottledEditor
+from semantic_cache import get_semantic_cache
 
 # RAG tizimi importlari
 try:
     from law_scraper import LawScraper
-    from rag_engine import get_rag_engine, RAGEngine
+    from rag_engine import get_rag_engine, start_rag_warm_up, RAGEngine
     RAG_AVAILABLE = True
 except ImportError as e:
     RAG_AVAILABLE = False
@@ -99,6 +113,9 @@ PRICE_ARIZA = 15000    # Ariza yozish
 # BHM (Bazaviy Hisoblash Miqdori) - jarimalarni hisoblash uchun
 BHM_VALUE = int(getenv("BHM_VALUE", "412500"))  # 2026-yil uchun 412,500 so'm
 
+# LLM javoblari oqim bilan ko'rsatiladi (kutish xabari edit_text bilan yangilanadi)
+STREAM_ANSWERS = getenv("STREAM_ANSWERS", "1") == "1"
+
 # Logging sozlamalari
 logging.basicConfig(
     level=logging.INFO,
@@ -111,9 +128,17 @@ bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTM
 openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
 router = Router()
 
+# Har bir foydalanuvchining hozir tayyorlanayotgan javobi (bekor qilish uchun)
+active_requests: Dict[int, asyncio.Task] = {}
+
 
 async def handle(request):
-    return web.Response(text="Bot is running!")
+    """Health check: bot ishlayapti + RAG tayyorlik holati (loading/ready/failed) + provayder breakerlari"""
+    status = {"status": "running"}
+    if RAG_AVAILABLE:
+        status["rag"] = get_rag_engine(background=True).get_readiness()
+    status["breakers"] = get_breakers_state()
+    return web.json_response(status)
 
 
 async def start_webhook():
@@ -292,105 +317,235 @@ def get_bhm_info() -> str:
 
 
 # ================= OPENAI VA RAG FUNKSIYALARI =================
-async def get_ai_response(question: str, user_id: int = 0, is_ariza: bool = False) -> str:
+def rag_status_text(rag_engine) -> Optional[str]:
+    """RAG hali tayyor bo'lmasa foydalanuvchiga ko'rsatiladigan izoh (tayyor bo'lsa None)"""
+    readiness = rag_engine.get_readiness()
+    if readiness["state"] == "loading":
+        return f"⏳ Qonunlar bazasi yuklanmoqda ({readiness['progress']:.0%}). Birozdan keyin to'liq javob beriladi."
+    if readiness["state"] == "failed":
+        return "⚠️ Qonunlar bazasi vaqtincha mavjud emas."
+    return None
+
+
+async def get_ai_response(question: str, user_id: int = 0, is_ariza: bool = False,
+                          on_text: Optional[Callable[[str], None]] = None) -> str:
     """
-    Savolga javob olish.
-    1-usul: OpenAI Assistants API (File Search) - eng sodda va ishonchli
-    2-usul: RAG tizimi (LlamaIndex) - backup sifatida
-    BHM ni avtomatik so'mga aylantiradi.
+    Savolga javob olish (modda indeksi va semantik kesh orqali).
+    "MJtK 128-modda", "YHQ 12-band" kabi aniq so'rovlarga jadvaldan javob beriladi.
+    Mazmunan bir xil savollarga LLM qayta chaqirilmaydi (kesh foydalanuvchilar orasida umumiy).
+    Arizalar shaxsiy bo'lgani uchun keshlanmaydi.
+    on_text - LLM javobi oqim bilan yaratilganda jami matn bilan chaqiriladi.
     """
-    
-    # 1-USUL: OpenAI Assistants API (tavsiya etiladi)
-    if ASSISTANT_AVAILABLE:
-        try:
-            assistant = get_assistant()
-            if assistant.is_initialized:
-                result = await assistant.query(user_id, question)
-                if result["success"]:
-                    # Agar "topmadim" desa, GPT-4o-mini promptiga o'tamiz
-                    answer = result["answer"]
-                    # Bir nechta variantlar va qisqa javoblarni tekshirish
-                    not_found_keywords = [
-                        "ma'lumot topmadim", "topilmadi", "not found", 
-                        "bazamda yo'q", "kechirasiz", "ma'lumot yo'q",
-                        "javob topa olmadim"
-                    ]
-                    
-                    is_not_found = any(kw in answer.lower() for kw in not_found_keywords)
-                    
-                    if is_not_found or len(answer) < 40:
-                        logger.info(f"⚠️ Assistant javobi qoniqarsiz (len={len(answer)}), zaxira modelga o'tkazildi: {answer[:60]}...")
-                    else:
-                        return answer
-        except Exception as e:
-            logger.warning(f"Assistant xatolik: {e}")
-    
-    # RAG tizimidan kontekst olish
+    if is_ariza:
+        return await generate_ai_response(question, user_id, is_ariza, on_text)
+
+    article_answer = get_article_index().answer(question)
+    if article_answer:
+        return article_answer
+
+    semantic_cache = get_semantic_cache()
+    cached = semantic_cache.lookup_exact(question)
+    if cached:
+        return cached
+
+    question_embedding = None
+    rag_ready = False
+    if RAG_AVAILABLE:
+        rag_engine = get_rag_engine()
+        # Indeks yuklanayotganda javob kontekstsiz (izoh bilan) - keshga yozilmaydi
+        rag_ready = rag_engine.get_readiness()["state"] == "ready"
+        question_embedding = await rag_engine.embed_query(question)
+        if question_embedding is not None:
+            cached = semantic_cache.lookup(question_embedding)
+            if cached:
+                return cached
+
+    answer = await generate_ai_response(question, user_id, is_ariza, on_text)
+
+    if (question_embedding is not None and rag_ready and not answer.startswith("⚠️")
+            and rag_status_text(rag_engine) is None):
+        semantic_cache.store(question, question_embedding, answer)
+    return answer
+
+
+ASSISTANT_NOT_FOUND_KEYWORDS = [
+    "ma'lumot topmadim", "topilmadi", "not found",
+    "bazamda yo'q", "kechirasiz", "ma'lumot yo'q",
+    "javob topa olmadim"
+]
+
+
+def is_acceptable_assistant_answer(answer: str) -> bool:
+    """Assistant "topmadim" desa yoki juda qisqa javob bersa - zaxira modelga o'tiladi"""
+    is_not_found = any(kw in answer.lower() for kw in ASSISTANT_NOT_FOUND_KEYWORDS)
+    return not is_not_found and len(answer) >= 40
+
+
+# Provayderlar ustuvorlik tartibida: keyingisi oldingisi hedge_delay soniyada
+# javob bermasa parallel boshlanadi (provider_race.py)
+# slow_call_seconds - shundan uzoq javob breaker uchun xato hisoblanadi (circuit_breaker.py)
+ASSISTANT_PROVIDER = Provider.from_env("assistant", hedge_delay=0, max_concurrency=8,
+                                       accept=is_acceptable_assistant_answer, slow_call_seconds=45)
+GEMINI_PROVIDER = Provider.from_env("gemini", hedge_delay=8, max_concurrency=8, slow_call_seconds=25)
+OPENAI_CHAT_PROVIDER = Provider.from_env("openai_chat", hedge_delay=10, max_concurrency=4,
+                                         slow_call_seconds=25)
+ANSWER_PROVIDERS = [ASSISTANT_PROVIDER, GEMINI_PROVIDER, OPENAI_CHAT_PROVIDER]
+
+
+async def build_rag_context(question: str) -> Tuple[str, str]:
+    """RAG tizimidan kontekst (faqat qidiruv). Qaytaradi: (prompt uchun kontekst, manbalar matni)"""
     rag_context = ""
     sources_text = ""
-    
+
     if RAG_AVAILABLE:
         try:
             rag_engine = get_rag_engine()
-            if rag_engine.is_initialized and rag_engine.index:
-                result = await rag_engine.query(question, top_k=3)
-                if result["success"] and result["answer"]:
-                    rag_context = f"\n\nQONUNLARDAN MA'LUMOT:\n{result['answer']}"
-                    if result["sources"]:
+            status_text = rag_status_text(rag_engine)
+            if status_text:
+                # Indeks fonda yuklanmoqda - kutmasdan kontekstsiz (qisqartirilgan) javob beriladi
+                sources_text = f"\n\n{status_text}"
+            elif rag_engine.is_initialized and rag_engine.index:
+                # Faqat qidiruv: javob zaxira modelning bitta LLM chaqiruvida yaratiladi
+                # Yo'l harakati savollari faqat YHQ/MJtK ichida qidiriladi
+                filters = traffic_filters(question)
+                context = await rag_engine.retrieve_context(question, filters=filters)
+                if filters and not context["success"]:
+                    context = await rag_engine.retrieve_context(question)
+                if context["success"]:
+                    rag_context = rag_engine.format_context(context['chunks'])
+                    sources = {}
+                    for chunk in context["chunks"]:
+                        if chunk["url"]:
+                            sources.setdefault(chunk["url"], chunk)
+                    sources = list(sources.values())
+                    if sources:
                         sources_text = "\n\n📚 Manbalar:\n"
-                        for src in result["sources"][:2]:
+                        for src in sources[:2]:
                             sources_text += f"• {src['title'][:60]}...\n  🔗 {src['url']}\n"
         except Exception as e:
             logger.warning(f"RAG xatolik: {e}")
-    
-    system_prompt = f"""Sening isming "AI YHQ Maslahatchisi". Sen O'zbekiston Respublikasining Yo'l harakati qonun-qoidalari (YHQ) bo'yicha ixtisoslashgan professional maslahatchisan.
+    return rag_context, sources_text
 
-SENING ASOSIY QOIDALARING:
-1. FAQAT YO'L HARAKATI QOIDALARI (YHQ): Javoblaringni faqat O'zbekiston Respublikasi Yo'l harakati qoidalariga (Lex.uz) asoslanib ber. Qoidalar, belgilar va chiziqlar haqida batafsil ma'lumot ber.
-2. TAQIQLANGAN MAVZULAR: Jarimalar miqdori, kodekslar yoki yo'l harakatiga aloqador bo'lmagan boshqa qonunlar haqida savol berilsa, "Men faqat yo'l harakati qonun-qoidalari (qoidalar, belgilar, chiziqlar) bo'yicha maslahat bera olaman" deb javob ber.
-3. ANIQLIK: YHQ bandlari raqamlarini, belgilar va chiziqlar nomlarini aniq ko'rsat.
 
-{rag_context if rag_context else ""}
+async def ask_assistant(user_id: int, question: str,
+                        on_text: Optional[Callable[[str], None]] = None) -> Optional[str]:
+    """OpenAI Assistants API (File Search); on_text berilsa run oqim bilan"""
+    assistant = get_assistant()
+    if not assistant.is_initialized:
+        return None
+    result = await assistant.query(user_id, question, on_text=on_text)
+    return result["answer"] if result["success"] else None
 
-JAVOB STRUKTURASI:
-- 🚗 [Tegishli YHQ Bandi]: Qoida bandi raqami va mazmuni.
-- 🛑 [Belgi va Chiziqlar]: Agar savolga aloqador bo'lsa, tegishli belgilar.
-- 💡 [Maslahat]: Haydovchi ushbu qoidaga qanday rioya qilishi kerakligi haqida tavsiya.
-- ⚠️ [Ogohlantirish]: "Ushbu ma'lumot tanishib chiqish uchun berildi, yakuniy qaror uchun rasmiy YHQ kitobiga yoki huquqshunosga murojaat qiling."
 
-TIL:
-- Foydalanuvchi so'ragan tilda (O'zbek yoki Rus) javob ber. Professional va tushunarli tilda gapir."""
-    
-    # FINAL JAVOB: Google Gemini (OpenAI o'rniga)
+async def ask_gemini(question: str, rag_context: str,
+                     on_text: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Google Gemini (umumiy asinxron klient - poygada bekor qilinishi mumkin); on_text berilsa oqim bilan.
+    Tizim promptining statik qismi Gemini context cache da - faqat RAG konteksti va savol yuboriladi.
+    """
+    template = get_template("yhq_advisor")
+    dynamic = template.render_dynamic(context=rag_context)
+    prompt = f"{dynamic}\n\nFOYDALANUVCHI SAVOLI: {question}" if dynamic else f"FOYDALANUVCHI SAVOLI: {question}"
+    return await get_gemini_client().generate(prompt, on_text=on_text, template=template)
+
+
+def record_openai_usage(template, usage) -> None:
+    """OpenAI javobidagi kirish tokenlari (avtomatik prefiks keshidan o'qilganlari bilan)"""
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    template.record_usage("openai_chat", usage.prompt_tokens, getattr(details, "cached_tokens", 0) or 0)
+
+
+async def ask_openai_chat(question: str, rag_context: str,
+                          on_text: Optional[Callable[[str], None]] = None) -> str:
+    """
+    OpenAI chat (gpt-4o-mini); on_text berilsa stream=True.
+    Statik tizim prompti birinchi xabar - o'zgarmas prefiks OpenAI tomonida avtomatik keshlanadi
+    (prompt_cache_key bir xil serverga yo'naltiradi), dinamik kontekst alohida xabarda.
+    """
+    template = get_template("yhq_advisor")
+    messages = [{"role": "system", "content": template.static}]
+    dynamic = template.render_dynamic(context=rag_context)
+    if dynamic:
+        messages.append({"role": "system", "content": dynamic})
+    messages.append({"role": "user", "content": question})
+    request = dict(
+        model="gpt-4o-mini",
+        messages=messages,
+        max_tokens=1500,
+        temperature=0.5,
+        prompt_cache_key=template.name,
+    )
+    if on_text is None:
+        response = await openai_client.chat.completions.create(**request)
+        record_openai_usage(template, response.usage)
+        return response.choices[0].message.content
+
+    text = ""
+    stream = await openai_client.chat.completions.create(
+        stream=True, stream_options={"include_usage": True}, **request
+    )
+    async with stream:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                text += chunk.choices[0].delta.content
+                on_text(text)
+            if chunk.usage is not None:
+                record_openai_usage(template, chunk.usage)
+    return text
+
+
+async def generate_ai_response(question: str, user_id: int = 0, is_ariza: bool = False,
+                               on_text: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Savolga javob olish - provayderlar poygasi (hedging):
+    1. OpenAI Assistants API (File Search) - darhol
+    2. RAG konteksti + Gemini - Assistant HEDGE_DELAY_GEMINI soniyada javob bermasa parallel
+    3. RAG konteksti + OpenAI chat - yana HEDGE_DELAY_OPENAI_CHAT soniyadan keyin
+    Birinchi qabul qilingan javob qaytariladi, qolganlari bekor qilinadi.
+    Oldingi provayder xato yoki qoniqarsiz javob bersa keyingisi kutmasdan boshlanadi.
+    on_text berilsa javoblar oqim bilan olinadi; foydalanuvchiga birinchi matn bergan
+    provayder ko'rsatiladi (u yutqazsa - keyingisi).
+    """
+    sink = StreamSink(on_text) if on_text is not None else None
+
+    def writer(name: str) -> Optional[Callable[[str], None]]:
+        return sink.writer(name) if sink is not None else None
+
+    # RAG konteksti Gemini va OpenAI chat uchun umumiy - bir marta olinadi
+    context_task: Optional[asyncio.Task] = None
+
+    async def shared_context() -> Tuple[str, str]:
+        nonlocal context_task
+        if context_task is None:
+            context_task = asyncio.create_task(build_rag_context(question))
+        # shield: bitta provayder bekor qilinsa umumiy qidiruv to'xtamasin
+        return await asyncio.shield(context_task)
+
+    async def gemini_answer() -> str:
+        rag_context, sources_text = await shared_context()
+        return await ask_gemini(question, rag_context, writer(GEMINI_PROVIDER.name)) + sources_text
+
+    async def openai_chat_answer() -> str:
+        rag_context, sources_text = await shared_context()
+        return await ask_openai_chat(question, rag_context, writer(OPENAI_CHAT_PROVIDER.name)) + sources_text
+
+    entries = []
+    if ASSISTANT_AVAILABLE and get_assistant().is_initialized:
+        entries.append((ASSISTANT_PROVIDER, lambda: ask_assistant(user_id, question, writer(ASSISTANT_PROVIDER.name))))
+    entries.append((GEMINI_PROVIDER, gemini_answer))
+    entries.append((OPENAI_CHAT_PROVIDER, openai_chat_answer))
+
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=GOOGLE_API_KEY)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        full_prompt = f"{system_prompt}\n\nFOYDALANUVCHI SAVOLI: {question}"
-        
-        response = model.generate_content(full_prompt)
-        answer = response.text
-        
-        return answer + sources_text
-        
-    except Exception as e:
-        logger.error(f"Gemini xatolik: {e}")
-        # Agar Gemini xato bersa, eski usulda (OpenAI) urinib ko'ramiz
-        try:
-            response = await openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": question}
-                ],
-                max_tokens=1500,
-                temperature=0.5
-            )
-            return response.choices[0].message.content + sources_text
-        except Exception as oai_e:
-            logger.error(f"OpenAI fallback xatolik: {oai_e}")
-            return "⚠️ AI xizmatida xatolik yuz berdi. Iltimos, keyinroq urinib ko'ring."
+        result = await race(entries, on_discard=sink.release if sink is not None else None)
+    finally:
+        if context_task is not None and not context_task.done():
+            context_task.cancel()
+
+    if result is None:
+        return "⚠️ AI xizmatida xatolik yuz berdi. Iltimos, keyinroq urinib ko'ring."
+    return result.answer
 
 
 # ================= HANDLERS =================
@@ -502,9 +657,19 @@ async def top_up_balance(message: Message, state: FSMContext):
     )
 
 
+def cancel_active_request(user_id: int) -> bool:
+    """Foydalanuvchining tayyorlanayotgan javobini bekor qilish"""
+    task = active_requests.get(user_id)
+    if task and not task.done():
+        task.cancel()
+        return True
+    return False
+
+
 @router.message(F.text == "🔙 Orqaga")
 async def go_back(message: Message, state: FSMContext):
     """Orqaga qaytish"""
+    cancel_active_request(message.from_user.id)
     await state.clear()
     await message.answer(
         "🚗 <b>Asosiy menyu</b>\n\n"
@@ -588,6 +753,18 @@ async def cmd_reset_thread(message: Message):
     )
 
 
+@router.message(Command("cancel"))
+async def cmd_cancel(message: Message, state: FSMContext):
+    """Tayyorlanayotgan javobni bekor qilish"""
+    cancelled = cancel_active_request(message.from_user.id)
+    await state.clear()
+    await message.answer(
+        "🛑 <b>So'rov bekor qilindi.</b> Hisobingizdan pul yechilmadi."
+        if cancelled else "ℹ️ Hozir tayyorlanayotgan javob yo'q.",
+        reply_markup=get_main_keyboard()
+    )
+
+
 @router.message(Command("bhm"))
 async def cmd_bhm_calculator(message: Message, command: CommandObject):
     """BHM kalkulyator buyrug'i"""
@@ -818,11 +995,34 @@ async def admin_stats(message: Message):
         return
     
     stats = get_stats()
+    cache_stats = get_semantic_cache().get_stats()
+    provider_lines = "".join(
+        f"• {name}: {p.get('won', 0)} g'alaba, {p.get('launched', 0)} chaqiruv "
+        f"({p.get('hedged', 0)} spekulyativ, {p.get('cancelled', 0)} bekor), "
+        f"hozir {p['in_flight']}/{p['max_concurrency']}, breaker {p['breaker']}\n"
+        for name, p in get_provider_stats(ANSWER_PROVIDERS).items()
+    )
+    gemini_stats = get_gemini_client().get_stats()
+    provider_lines += (
+        f"♊ Gemini klienti: {gemini_stats.get('requests', 0)} so'rov, "
+        f"{gemini_stats.get('timeouts', 0)} timeout, hozir {gemini_stats['in_flight']}\n"
+    )
+    prompt_lines = "".join(
+        f"• {name}: statik {p['static_tokens']} token, dinamik o'rtacha {p['avg_dynamic_tokens']}, "
+        f"keshdan: Gemini {p.get('gemini_cached_tokens', 0)}/{p.get('gemini_prompt_tokens', 0)}, "
+        f"OpenAI {p.get('openai_chat_cached_tokens', 0)}/{p.get('openai_chat_prompt_tokens', 0)}\n"
+        for name, p in get_prompt_stats().items() if p.get("renders")
+    ) or "hali so'rov yo'q\n"
     
     await message.answer(
         "📊 <b>BOT STATISTIKASI</b>\n\n"
         f"👥 Jami foydalanuvchilar: <code>{stats['total_users']}</code>\n"
-        f"💰 Jami balans: <code>{stats['total_balance']:,.0f}</code> so'm"
+        f"💰 Jami balans: <code>{stats['total_balance']:,.0f}</code> so'm\n\n"
+        f"🎯 Javob keshi: <code>{cache_stats['hit_rate']:.0%}</code> hit "
+        f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}), "
+        f"{cache_stats['entries']} ta javob, v{cache_stats['version']}\n\n"
+        f"🏁 <b>Provayderlar:</b>\n{provider_lines}\n"
+        f"📝 <b>Prompt tokenlari:</b>\n{prompt_lines}"
     )
 
 
@@ -873,31 +1073,66 @@ async def handle_text(message: Message, state: FSMContext):
         await state.clear()
         return
     
-    # AI javobini olish
-    waiting_msg = await message.answer("⏳ Javob tayyorlanmoqda...")
-    
-    response = await get_ai_response(text, message.from_user.id, is_ariza)
+    # Oldingi javob hali tayyorlanmoqda - u jimgina bekor qilinmaydi (faqat /cancel yoki "🔙 Orqaga")
+    user_id = message.from_user.id
+    previous = active_requests.get(user_id)
+    if previous and not previous.done():
+        await message.answer(
+            "⏳ Oldingi so'rovingiz hali tayyorlanmoqda. Javobni kuting yoki /cancel bilan bekor qiling."
+        )
+        return
+
+    # AI javobini olish (alohida task - foydalanuvchi /cancel bilan to'xtatishi mumkin)
+    waiting_msg = await message.answer("⏳ Javob tayyorlanmoqda...\n\n🛑 Bekor qilish: /cancel")
     
-    await waiting_msg.delete()
+    # Javob oqim bilan kelsa kutish xabari shu matn bilan tahrirlanib boriladi
+    editor = ThrottledEditor(waiting_msg) if STREAM_ANSWERS else None
+    task = asyncio.create_task(
+        get_ai_response(text, user_id, is_ariza, on_text=editor.update if editor else None)
+    )
+    active_requests[user_id] = task
+    try:
+        response = await task
+    except asyncio.CancelledError:
+        if editor:
+            await editor.close()
+        await waiting_msg.delete()
+        return
+    finally:
+        if active_requests.get(user_id) is task:
+            del active_requests[user_id]
     
     # Agar xatolik bo'lsa, pul yechmaymiz
     if response.startswith("⚠️"):
+        if editor:
+            await editor.close()
+        await waiting_msg.delete()
         await message.answer(response, reply_markup=get_main_keyboard())
         await state.clear()
         return
 
-    # Muvaffaqiyatli bo'lsagina pul yechish
+    # Oqim muvaffaqiyatli tugagandan keyingina pul yechiladi
     update_balance(message.from_user.id, price, "expense")
     
     new_balance = user["balance"] - price
-    
-    await message.answer(
-        f"{response}\n\n"
-        f"━━━━━━━━━━━━━━━━━━━━━━\n"
+    billing_text = (
         f"💳 Yechildi: {price:,} so'm\n"
-        f"💰 Qoldiq: {new_balance:,.0f} so'm",
-        reply_markup=get_main_keyboard()
+        f"💰 Qoldiq: {new_balance:,.0f} so'm"
     )
+
+    # Oqimli xabar yakuniy javobga aylantiriladi. Tahrirlangan xabarga reply klaviatura
+    # biriktirib bo'lmaydi - asosiy menyu hisob-kitob xabari bilan qaytariladi
+    if editor and editor.edits and await editor.finish(response):
+        await message.answer(billing_text, reply_markup=get_main_keyboard())
+    else:
+        # Oqim bo'lmadi yoki tahrirlab bo'lmadi (juda uzun) - bitta yangi xabar
+        if editor:
+            await editor.close()
+        await waiting_msg.delete()
+        await message.answer(
+            f"{response}\n\n━━━━━━━━━━━━━━━━━━━━━━\n{billing_text}",
+            reply_markup=get_main_keyboard()
+        )
     await state.clear()
 
 
@@ -966,9 +1201,7 @@ async def cmd_update_laws(message: Message):
         
         # RAG ga yuklash
         rag_engine = get_rag_engine()
-        docs = rag_engine.load_documents_from_files()
-        if docs:
-            rag_engine.index_documents(docs)
+        await asyncio.to_thread(rag_engine.update_index_from_files)
         
         stats = rag_engine.get_stats()
         await status_msg.edit_text(
@@ -999,11 +1232,15 @@ async def cmd_search_law(message: Message, command: CommandObject):
     keyword = command.args
     rag_engine = get_rag_engine()
     
+    if rag_engine.get_readiness()["state"] == "loading":
+        await message.answer(rag_status_text(rag_engine))
+        return
+
     if not rag_engine.is_initialized:
         await message.answer("⚠️ Qonunlar hali yuklanmagan. Admin /update_laws buyrug'ini ishlatishi kerak.")
         return
     
-    results = rag_engine.search_laws(keyword, limit=5)
+    results = await rag_engine.asearch_laws(keyword, limit=5)
     
     if not results:
         await message.answer(f"❌ '{keyword}' bo'yicha hech narsa topilmadi.")
@@ -1047,6 +1284,66 @@ async def cmd_law_stats(message: Message):
     )
 
 
+@router.message(Command("rollback_index"))
+async def cmd_rollback_index(message: Message, command: CommandObject):
+    """Admin: RAG indeksini oldingi snapshotga qaytarish (qayta qurishsiz)"""
+    if message.from_user.id != ADMIN_ID:
+        return
+    if not RAG_AVAILABLE:
+        await message.answer("⚠️ RAG tizimi mavjud emas.")
+        return
+
+    steps = int(command.args) if command.args and command.args.isdigit() else 1
+    rag_engine = get_rag_engine()
+    name = await asyncio.to_thread(rag_engine.rollback_index, steps)
+    if name is None:
+        await message.answer("⚠️ Qaytish uchun oldingi snapshot topilmadi.")
+        return
+
+    stats = rag_engine.get_stats()
+    await message.answer(
+        f"⏪ Indeks qaytarildi: <code>{name}</code>\n"
+        f"🧠 RAG chunks: <code>{stats.get('total_chunks', 0)}</code>\n"
+        f"📸 Snapshotlar: {len(stats.get('snapshots', []))} ta"
+    )
+
+
+@router.message(Command("breakers"))
+async def cmd_breakers(message: Message, command: CommandObject):
+    """Admin: provayder breakerlari holati; /breakers reset [nom] - majburan yoqish"""
+    if message.from_user.id != ADMIN_ID:
+        return
+
+    args = (command.args or "").split()
+    if args and args[0] == "reset":
+        states = get_breakers_state()
+        names = args[1:] or list(states)
+        unknown = [name for name in names if name not in states]
+        if unknown:
+            await message.answer(f"⚠️ Noma'lum provayder: {', '.join(unknown)}\nMavjud: {', '.join(states)}")
+            return
+        for name in names:
+            get_breaker(name).reset()
+        await message.answer(f"🔌 Qayta yoqildi: {', '.join(names)}")
+        return
+
+    icons = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+    lines = []
+    for name, state in get_breakers_state().items():
+        line = (
+            f"{icons.get(state['state'], '⚪')} <b>{name}</b>: {state['state']}, "
+            f"xato {state['failure_rate']:.0%} ({state['calls']} chaqiruv), "
+            f"p50 {state['p50_latency'] if state['p50_latency'] is not None else '-'} s, "
+            f"{state['trips']} marta ochilgan, {state['rejected']} o'tkazilgan"
+        )
+        if "retry_in" in state:
+            line += f", sinov {state['retry_in']} s dan keyin"
+        if state["last_error"]:
+            line += f"\n    └ <code>{html.escape(state['last_error'][:100])}</code>"
+        lines.append(line)
+    await message.answer("🔌 <b>PROVAYDER BREAKERLARI</b>\n\n" + ("\n".join(lines) or "Hali chaqiruv yo'q"))
+
+
 @router.message(Command("update_mjtk"))
 async def cmd_update_mjtk(message: Message):
     """Admin: MJtK (Ma'muriy javobgarlik kodeksi) ni yuklash"""
@@ -1069,9 +1366,7 @@ async def cmd_update_mjtk(message: Message):
         
         # RAG ga yuklash
         rag_engine = get_rag_engine()
-        docs = rag_engine.load_documents_from_files()
-        if docs:
-            rag_engine.index_documents(docs)
+        await asyncio.to_thread(rag_engine.update_index_from_files)
         
         stats = rag_engine.get_stats()
         await status_msg.edit_text(
@@ -1217,9 +1512,7 @@ async def scheduled_law_update():
         
         if new_laws:
             rag_engine = get_rag_engine()
-            docs = rag_engine.load_documents_from_files()
-            if docs:
-                rag_engine.index_documents(docs)
+            await asyncio.to_thread(rag_engine.update_index_from_files)
             
             # Adminga xabar
             try:
@@ -1250,10 +1543,9 @@ async def startup_law_update():
         
         # RAG ga yuklash
         rag_engine = get_rag_engine()
-        docs = rag_engine.load_documents_from_files()
-        if docs:
-            rag_engine.index_documents(docs)
-            logger.info(f"✅ {len(docs)} ta qonun indekslandi")
+        update = await asyncio.to_thread(rag_engine.update_index_from_files)
+        if update["documents"]:
+            logger.info(f"✅ {update['documents']} ta qonun indekslandi")
         
         # Adminga xabar
         try:
@@ -1261,7 +1553,7 @@ async def startup_law_update():
                 ADMIN_ID,
                 f"🚀 <b>Bot ishga tushdi!</b>\n\n"
                 f"📥 Yuklangan qonunlar: {len(new_laws)} ta\n"
-                f"📚 Indekslangan hujjatlar: {len(docs) if docs else 0} ta"
+                f"📚 Indekslangan hujjatlar: {update['documents']} ta"
             )
         except:
             pass
@@ -1270,6 +1562,26 @@ async def startup_law_update():
         logger.error(f"Boshlang'ich yuklash xatolik: {e}")
 
 
+async def rag_warm_up_watcher():
+    """RAG tayyor bo'lishini kutish; indeks bo'sh bo'lsa boshlang'ich yuklashni boshlash"""
+    try:
+        rag_engine = get_rag_engine()
+        ready = await asyncio.to_thread(rag_engine.wait_ready)
+        logger.info(f"🧠 RAG tizimi: {'✅ tayyor' if ready else '⚠️ ishga tushmadi'}")
+        if ready:
+            # Yuklanish paytida olingan javoblar kontekstsiz bo'lishi mumkin
+            get_semantic_cache().bump_version("(RAG tayyor)")
+
+        # Agar indeks bo'sh bo'lsa, avtomatik yuklash
+        if ready:
+            stats = rag_engine.get_stats()
+            if stats.get('total_chunks', 0) == 0:
+                logger.info("📥 Qonunlar yuklanmoqda (birinchi ishga tushirish)...")
+                await startup_law_update()
+    except Exception as e:
+        logger.warning(f"RAG ishga tushirishda xatolik: {e}")
+
+
 # ================= ASOSIY FUNKSIYA =================
 
 async def main():
@@ -1301,20 +1613,19 @@ async def main():
         scheduler.start()
         logger.info("📅 Scheduler ishga tushdi (har 24 soatda yangilanadi)")
     
-    # RAG tizimini ishga tushirish va boshlang'ich yangilanish
+    # Gemini klienti bir marta sozlanadi (ulanishlar so'rovlar orasida qayta ishlatiladi);
+    # tizim promptining statik qismi va pinned YHQ bandlari Gemini keshiga fonda yuklanadi
+    if get_gemini_client().start():
+        asyncio.create_task(get_gemini_client().prepare_context(get_template("yhq_advisor")))
+
+    # Modda/band indeksini oldindan yuklash (birinchi savol kutib qolmasligi uchun)
+    await asyncio.to_thread(get_article_index().load)
+
+    # RAG indeksi fon threadida yuklanadi - polling darhol boshlanadi,
+    # tayyor bo'lguncha handlerlar qisqartirilgan rejimda javob beradi
     if RAG_AVAILABLE:
-        try:
-            rag_engine = get_rag_engine()
-            logger.info(f"🧠 RAG tizimi: {'✅ tayyor' if rag_engine.is_initialized else '⚠️ ishga tushmadi'}")
-            
-            # Agar indeks bo'sh bo'lsa, avtomatik yuklash
-            if rag_engine.is_initialized:
-                stats = rag_engine.get_stats()
-                if stats.get('total_chunks', 0) == 0:
-                    logger.info("📥 Qonunlar yuklanmoqda (birinchi ishga tushirish)...")
-                    asyncio.create_task(startup_law_update())
-        except Exception as e:
-            logger.warning(f"RAG ishga tushirishda xatolik: {e}")
+        start_rag_warm_up()
+        asyncio.create_task(rag_warm_up_watcher())
     
     # Fon vazifalarini boshlash
     rag = get_rag_engine() if RAG_AVAILABLE else None
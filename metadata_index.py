@@ -0,0 +1,228 @@
+"""
+🏷 METADATA INDEKSI
+====================
+Chunk metadatasi bo'yicha inverted indeks: maydon -> qiymat -> qatorlar.
+
+Filtrlangan qidiruvda (kategoriya, law_id, manba, versiya, sana oralig'i)
+avval shu indeksdan mos qatorlar olinadi va faqat ular skorlanadi -
+masalan YHQ savoliga farmatsevtika qarorlari chunklari solishtirilmaydi.
+
+- MetadataIndex: MmapVectorStore qatorlari bilan birga saqlanadi (meta_index.json)
+- build_filters(): {"category": ..., "law_id": [...], "date_from": ...} -> MetadataFilters
+- traffic_filters(): yo'l harakati savollari uchun faqat YHQ va MJtK
+"""
+
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from article_index import LAW_FILES
+from transliteration import normalize_text
+
+try:
+    from llama_index.core.vector_stores.types import (
+        FilterCondition,
+        FilterOperator,
+        MetadataFilter,
+        MetadataFilters,
+    )
+    LLAMAINDEX_AVAILABLE = True
+except ImportError:
+    LLAMAINDEX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+META_INDEX_FILE = "meta_index.json"
+
+# Indekslanadigan maydonlar (qolganlari filtrda ishlatilmaydi)
+INDEXED_FIELDS = ("category", "law_id", "law", "source", "version", "date")
+
+# Yo'l harakati qonunlari (lex.uz hujjat raqamlari)
+TRAFFIC_LAW_IDS = [info["url"].rstrip("/").rsplit("/", 1)[-1] for info in LAW_FILES.values()]
+
+# Yo'l harakatiga oid so'zlar (lotin yozuviga keltirilgan savolda, rus tilida ham)
+TRAFFIC_RE = re.compile(
+    r"yo'l|haydovchi|avtomobil|avtobus|mashina|transport|svetofor|belgi|chiziq|piyoda|chorraha|"
+    r"tezlik|quvib|to'xta|to'xtab|burilish|manyovr|yhq|ypx|guvohnoma|jarima|"
+    r"дорог|водител|автомоб|машин|транспорт|светофор|пдд|гаи|дпс|пешеход|перекр|скорост|обгон|"
+    r"парков|остановк|штраф|знак|разметк",
+    re.IGNORECASE
+)
+
+
+def _value_key(value: Any) -> str:
+    return str(value)
+
+
+def _sort_key(value: str):
+    """Solishtirish: sonlar son sifatida, qolganlari (ISO sanalar) satr sifatida"""
+    try:
+        return (0, float(value), "")
+    except (TypeError, ValueError):
+        return (1, 0.0, str(value))
+
+
+class MetadataIndex:
+    """Maydon -> qiymat -> qatorlar to'plami"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self.rows = 0
+
+    def add(self, row: int, metadata: Dict[str, Any]):
+        for field in INDEXED_FIELDS:
+            value = metadata.get(field)
+            if value not in (None, ""):
+                self.postings[field][_value_key(value)].add(row)
+        self.rows = max(self.rows, row + 1)
+
+    def compact(self, live_rows: List[int]):
+        """persist() dan keyin qatorlar qayta raqamlanadi - o'chirilganlar tashlanadi"""
+        new_row = {old: new for new, old in enumerate(live_rows)}
+        postings = defaultdict(lambda: defaultdict(set))
+        for field, values in self.postings.items():
+            for value, rows in values.items():
+                remapped = {new_row[row] for row in rows if row in new_row}
+                if remapped:
+                    postings[field][value] = remapped
+        self.postings = postings
+        self.rows = len(live_rows)
+
+    def values(self, field: str) -> Dict[str, int]:
+        """Maydon qiymatlari va ulardagi chunklar soni (statistika uchun)"""
+        return {value: len(rows) for value, rows in self.postings.get(field, {}).items()}
+
+    # ================= FILTRLAR =================
+
+    def _match(self, metadata_filter: "MetadataFilter") -> Set[int]:
+        values = self.postings.get(metadata_filter.key, {})
+        operator = metadata_filter.operator
+        target = metadata_filter.value
+
+        if operator in (FilterOperator.EQ, FilterOperator.NE):
+            rows = set(values.get(_value_key(target), ()))
+        elif operator in (FilterOperator.IN, FilterOperator.NIN, FilterOperator.ANY):
+            rows = set()
+            for item in (target or []):
+                rows |= values.get(_value_key(item), set())
+        elif operator in (FilterOperator.GT, FilterOperator.GTE, FilterOperator.LT, FilterOperator.LTE):
+            bound = _sort_key(_value_key(target))
+            compare = {
+                FilterOperator.GT: lambda key: key > bound,
+                FilterOperator.GTE: lambda key: key >= bound,
+                FilterOperator.LT: lambda key: key < bound,
+                FilterOperator.LTE: lambda key: key <= bound,
+            }[operator]
+            rows = set()
+            for value, value_rows in values.items():
+                if compare(_sort_key(value)):
+                    rows |= value_rows
+        else:
+            raise ValueError(f"Qo'llab-quvvatlanmaydigan filtr operatori: {operator}")
+
+        if operator in (FilterOperator.NE, FilterOperator.NIN):
+            rows = set(range(self.rows)) - rows
+        return rows
+
+    def rows_for(self, filters: "MetadataFilters") -> Set[int]:
+        """Filtrlarga mos qatorlar (ichma-ich MetadataFilters ham qo'llab-quvvatlanadi)"""
+        results = [
+            self.rows_for(item) if isinstance(item, MetadataFilters) else self._match(item)
+            for item in filters.filters
+        ]
+        if not results:
+            return set(range(self.rows))
+
+        condition = filters.condition or FilterCondition.AND
+        if condition == FilterCondition.OR:
+            return set().union(*results)
+        if condition == FilterCondition.NOT:
+            return set(range(self.rows)) - set().union(*results)
+        return set.intersection(*results)
+
+    # ================= SAQLASH =================
+
+    def save(self, path: Path):
+        state = {
+            "rows": self.rows,
+            "postings": {
+                field: {value: sorted(rows) for value, rows in values.items()}
+                for field, values in self.postings.items()
+            }
+        }
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["MetadataIndex"]:
+        if not Path(path).exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"Metadata indeksini o'qishda xatolik: {e}")
+            return None
+
+        index = cls()
+        index.rows = state["rows"]
+        for field, values in state["postings"].items():
+            for value, rows in values.items():
+                index.postings[field][value] = set(rows)
+        return index
+
+    @classmethod
+    def build(cls, rows_metadata: Iterable[Dict[str, Any]]) -> "MetadataIndex":
+        index = cls()
+        count = 0
+        for row, metadata in enumerate(rows_metadata):
+            index.add(row, metadata)
+            count = row + 1
+        index.rows = count
+        return index
+
+
+# ================= YORDAMCHI =================
+
+def build_filters(filters: Optional[Dict[str, Any]]) -> Optional["MetadataFilters"]:
+    """
+    Oddiy lug'atdan LlamaIndex filtrlari:
+    {"category": "qonunlar", "law_id": ["5953883", "97664"], "source": "lex.uz",
+     "version": 2, "date_from": "2026-01-01", "date_to": "2026-12-31"}
+    Ro'yxat - IN, qolganlari - EQ; barcha shartlar AND bilan birlashtiriladi.
+    """
+    if not filters or not LLAMAINDEX_AVAILABLE:
+        return None
+    if isinstance(filters, MetadataFilters):
+        return filters
+
+    items = []
+    for key, value in filters.items():
+        if value in (None, "", []):
+            continue
+        if key == "date_from":
+            items.append(MetadataFilter(key="date", value=str(value), operator=FilterOperator.GTE))
+        elif key == "date_to":
+            items.append(MetadataFilter(key="date", value=str(value), operator=FilterOperator.LTE))
+        elif isinstance(value, (list, tuple, set)):
+            items.append(MetadataFilter(key=key, value=[str(v) for v in value], operator=FilterOperator.IN))
+        else:
+            items.append(MetadataFilter(key=key, value=str(value), operator=FilterOperator.EQ))
+    return MetadataFilters(filters=items) if items else None
+
+
+def is_traffic_question(question: str) -> bool:
+    return bool(TRAFFIC_RE.search(normalize_text(question)))
+
+
+def traffic_filters(question: str) -> Optional[Dict[str, Any]]:
+    """Yo'l harakati savoli bo'lsa - faqat YHQ/MJtK chunklari qidiriladi"""
+    if is_traffic_question(question):
+        return {"law_id": TRAFFIC_LAW_IDS}
+    return None
@@ -19,13 +19,15 @@ Afzalliklari:
 
 import os
 import asyncio
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import logging
 import json
 from pathlib import Path
 
+from prompt_templates import get_template
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -33,6 +35,9 @@ logger = logging.getLogger(__name__)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ASSISTANT_ID = os.getenv("OPENAI_ASSISTANT_ID", "")
 
+# Run javobini kutish chegarasi (soniya)
+ASSISTANT_TIMEOUT = int(os.getenv("ASSISTANT_TIMEOUT", "60"))
+
 # User threads faylda saqlanadi (bot restart bo'lganda ham saqlansin)
 THREADS_FILE = Path("./data/user_threads.json")
 
@@ -74,20 +79,8 @@ class OpenAIAssistant:
         Yangi assistant yaratish (File Search yoqilgan).
         Faqat bir marta ishlatiladi - keyin ID ni .env ga saqlang.
         """
-        instructions = """Sening isming "AI YHQ Maslahatchisi". Sen O'zbekiston Respublikasining Yo'l harakati qonun-qoidalari (YHQ) bo'yicha ixtisoslashgan professional maslahatchisan.
-
-SENING ASOSIY QOIDALARING:
-1. FAQAT YO'L HARAKATI QOIDALARI (YHQ): Javoblaringni faqat O'zbekiston Respublikasi Yo'l harakati qoidalariga (Lex.uz) asoslanib ber. Qoidalar, belgilar va chiziqlar haqida batafsil ma'lumot ber.
-2. TAQIQLANGAN MAVZULAR: Jarimalar miqdori, kodekslar yoki yo'l harakatiga aloqador bo'lmagan boshqa qonunlar haqida savol berilsa, "Men faqat yo'l harakati qonun-qoidalari (qoidalar, belgilar, chiziqlar) bo'yicha maslahat bera olaman" deb javob ber.
-3. ANIQLIK: YHQ bandlari raqamlarini, belgilar va chiziqlar nomlarini aniq ko'rsat.
-4. JAVOB STRUKTURASI:
-   - 🚗 [Tegishli YHQ Bandi]: Qoida bandi raqami va mazmuni.
-   - 🛑 [Belgi va Chiziqlar]: Agar savolga aloqador bo'lsa, tegishli belgilar.
-   - 💡 [Maslahat]: Haydovchi ushbu qoidaga qanday rioya qilishi kerakligi haqida tavsiya.
-5. OGOHLANTIRISH: Har bir javob oxirida "Ushbu ma'lumot tanishib chiqish uchun berildi, yakuniy qaror uchun rasmiy YHQ kitobiga yoki huquqshunosga murojaat qiling" degan ogohlantirishni qo'sh.
-
-TIL:
-- Foydalanuvchi so'ragan tilda (O'zbek yoki Rus) javob ber. Professional va tushunarli tilda gapir."""
+        # Zaxira modellar bilan bir xil tizim prompti (prompt_templates.py)
+        instructions = get_template("yhq_advisor").static
 
         try:
             assistant = await self.client.beta.assistants.create(
@@ -118,10 +111,32 @@ TIL:
         logger.info(f"🆕 Yangi thread yaratildi: user={user_id}")
         return thread.id
     
-    async def query(self, user_id: int, question: str) -> Dict[str, Any]:
+    async def _stream_run(self, thread_id: str, on_text: Callable[[str], None],
+                          started: Dict[str, Any]):
+        """Run ni oqim bilan bajarish: matn bo'laklari kelishi bilan on_text(jami matn)"""
+        run = None
+        text = ""
+        async with self.client.beta.threads.runs.stream(
+            thread_id=thread_id,
+            assistant_id=self.assistant_id
+        ) as stream:
+            async for event in stream:
+                # thread.run.step.* hodisalarining data'si RunStep (id "step_...") - run emas
+                if event.event.startswith("thread.run.") and not event.event.startswith("thread.run.step."):
+                    run = started["run"] = event.data
+                elif event.event == "thread.message.delta":
+                    for block in event.data.delta.content or []:
+                        if block.type == "text" and block.text and block.text.value:
+                            text += block.text.value
+                            on_text(text)
+        return run
+
+    async def query(self, user_id: int, question: str,
+                    on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Savolga javob olish.
         Har bir user uchun alohida thread ishlatiladi.
+        on_text berilsa run oqim bilan bajariladi va javob bo'laklari darhol uzatiladi.
         """
         if not self.is_initialized:
             return {
@@ -132,6 +147,9 @@ TIL:
                 "sources": []
             }
         
+        thread_id = None
+        run = None
+        started: Dict[str, Any] = {}
         try:
             # 1. User uchun thread olish/yaratish
             thread_id = await self.get_or_create_thread(user_id)
@@ -143,14 +161,29 @@ TIL:
                 content=question
             )
             
-            # 3. Run yaratish va ishga tushirish
-            run = await self.client.beta.threads.runs.create(
-                thread_id=thread_id,
-                assistant_id=self.assistant_id
-            )
+            # 3. Run yaratish va ishga tushirish (oqim bilan yoki polling)
+            if on_text is not None:
+                try:
+                    run = await asyncio.wait_for(
+                        self._stream_run(thread_id, on_text, started), timeout=ASSISTANT_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    run = started.get("run")
+                    if run is not None:
+                        asyncio.create_task(self._cancel_run(thread_id, run.id))
+                    return {
+                        "success": False,
+                        "answer": "⚠️ Javob olish vaqti tugadi. Qaytadan urinib ko'ring.",
+                        "sources": []
+                    }
+            else:
+                run = await self.client.beta.threads.runs.create(
+                    thread_id=thread_id,
+                    assistant_id=self.assistant_id
+                )
             
             # 4. Javobni kutish (polling)
-            max_attempts = 60  # 60 soniya max
+            max_attempts = ASSISTANT_TIMEOUT
             attempt = 0
             while run.status in ['queued', 'in_progress', 'cancelling']:
                 await asyncio.sleep(1)
@@ -207,6 +240,13 @@ TIL:
                 "sources": []
             }
             
+        except asyncio.CancelledError:
+            # Poygada yutqazdi yoki foydalanuvchi bekor qildi - run OpenAI tomonida ham to'xtatiladi
+            # (aks holda pul sarflashda davom etadi va thread keyingi savolgacha band qoladi)
+            run = run or started.get("run")
+            if run is not None and run.status in ('queued', 'in_progress'):
+                asyncio.create_task(self._cancel_run(thread_id, run.id))
+            raise
         except Exception as e:
             logger.error(f"❌ Query xatolik: {e}")
             return {
@@ -215,6 +255,13 @@ TIL:
                 "sources": []
             }
     
+    async def _cancel_run(self, thread_id: str, run_id: str):
+        try:
+            await self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+            logger.info(f"🛑 Assistant run bekor qilindi: {run_id}")
+        except Exception as e:
+            logger.warning(f"Run bekor qilishda xatolik: {e}")
+    
     async def reset_thread(self, user_id: int) -> bool:
         """Userning threadini o'chirish (yangi suhbat boshlash)"""
         if user_id in self.user_threads:
@@ -267,22 +314,7 @@ TIL:
         if not self.assistant_id:
             return False
             
-        instructions = """Sening isming "AI Avto-Yurist". Sen O'zbekiston Respublikasining Yo'l harakati qonun-qoidalari (YHQ) va Ma'muriy javobgarlik to'g'risidagi kodeksning (MJtK) yo'l harakatiga oid qismlari bo'yicha ixtisoslashgan professional huquqiy maslahatchisan.
-
-SENING ASOSIY QOIDALARING:
-1. FAQAT YO'L HARAKATI QONUNCHILIGI: Javoblaringni faqat O'zbekiston Respublikasi Yo'l harakati qoidalari va MJtKning yo'l harakatiga oid moddalariga (Lex.uz) asoslanib ber. Boshqa sohalar bo'yicha savol berilsa, "Men faqat yo'l harakati qonun-qoidalari bo'yicha yordam bera olaman" deb javob ber.
-2. ANIQLIK: Modda raqamlarini va jarima miqdorlarini (BHMda) aniq ko'rsat.
-3. CHEGIRMALAR: Yo'l harakati jarimalari haqida gap ketganda, doimo 15 kunlik (50%) va 30 kunlik (30%) chegirma muddatlarini eslatib o't.
-4. OGOHLANTIRISH: Har bir javob oxirida "Ushbu ma'lumot tanishib chiqish uchun berildi, yakuniy qaror uchun professional huquqshunosga murojaat qiling" degan ogohlantirishni qo'sh.
-
-JAVOB STRUKTURASI:
-- ⚖️ [Tegishli Modda]: Kodeks/Qoida nomi va modda/band raqami.
-- 💰 [Jarima/Chora]: Aniq miqdori (BHMda va so'mda). BHM = 412,500 so'm (2026-yil).
-- 🕒 [Imtiyozlar]: To'lov muddati va chegirmalar.
-- 💡 [Maslahat]: Foydalanuvchi vaziyatni qanday yengillashtirishi mumkinligi haqida qisqa tavsiya.
-
-TIL:
-- Foydalanuvchi so'ragan tilda (O'zbek yoki Rus) javob ber. Professional va tushunarli tilda gapir."""
+        instructions = get_template("avto_yurist").static
 
         try:
             await self.client.beta.assistants.update(
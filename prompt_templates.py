@@ -0,0 +1,192 @@
+"""
+📝 PROMPT SHABLONLARI
+======================
+Tizim promptlari bir joyda: statik qism (rol, qoidalar, javob strukturasi, til)
+modul yuklanganda bir marta yig'iladi va token soni o'lchanadi; har so'rovda
+faqat dinamik qism (RAG konteksti) formatlanadi.
+
+- Statik qism doim promptning boshida - provayderlarning prefiks keshi
+  (OpenAI avtomatik, Gemini context caching) shu qismni qayta ishlamaydi
+- pinned_units - keshga statik qism bilan birga qo'yiladigan qonun matnlari
+  (masalan YHQ 1-bob "Umumiy qoidalar"), article_index dan olinadi; faqat
+  provayder keshi faol bo'lganda yuboriladi (keshsiz - har so'rov narxi oshadi)
+- openai_assistant.py instruktsiyalari ham shu yerdan (takrorlanmaydi)
+
+Ishlatish:
+    template = get_template("yhq_advisor")
+    system_prompt = template.render(context=rag_context)
+"""
+
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Keshlanadigan kontekstga qo'shiladigan birliklar: "QONUN:tur:raqam" vergul bilan
+PROMPT_PINNED_UNITS = os.getenv(
+    "PROMPT_PINNED_UNITS", "YHQ:band:1,YHQ:band:2,YHQ:band:3,YHQ:band:4,YHQ:band:5,YHQ:band:6"
+)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+
+def count_tokens(text: str) -> int:
+    """Token soni (tiktoken bo'lmasa taxminan: 4 belgi ~ 1 token)"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+
+# ================= BO'LIMLAR =================
+
+YHQ_ADVISOR_ROLE = (
+    "Sening isming \"AI YHQ Maslahatchisi\". Sen O'zbekiston Respublikasining Yo'l harakati "
+    "qonun-qoidalari (YHQ) bo'yicha ixtisoslashgan professional maslahatchisan."
+)
+
+YHQ_ADVISOR_RULES = """SENING ASOSIY QOIDALARING:
+1. FAQAT YO'L HARAKATI QOIDALARI (YHQ): Javoblaringni faqat O'zbekiston Respublikasi Yo'l harakati qoidalariga (Lex.uz) asoslanib ber. Qoidalar, belgilar va chiziqlar haqida batafsil ma'lumot ber.
+2. TAQIQLANGAN MAVZULAR: Jarimalar miqdori, kodekslar yoki yo'l harakatiga aloqador bo'lmagan boshqa qonunlar haqida savol berilsa, "Men faqat yo'l harakati qonun-qoidalari (qoidalar, belgilar, chiziqlar) bo'yicha maslahat bera olaman" deb javob ber.
+3. ANIQLIK: YHQ bandlari raqamlarini, belgilar va chiziqlar nomlarini aniq ko'rsat."""
+
+YHQ_ADVISOR_STRUCTURE = """JAVOB STRUKTURASI:
+- 🚗 [Tegishli YHQ Bandi]: Qoida bandi raqami va mazmuni.
+- 🛑 [Belgi va Chiziqlar]: Agar savolga aloqador bo'lsa, tegishli belgilar.
+- 💡 [Maslahat]: Haydovchi ushbu qoidaga qanday rioya qilishi kerakligi haqida tavsiya.
+- ⚠️ [Ogohlantirish]: "Ushbu ma'lumot tanishib chiqish uchun berildi, yakuniy qaror uchun rasmiy YHQ kitobiga yoki huquqshunosga murojaat qiling.\""""
+
+AVTO_YURIST_ROLE = (
+    "Sening isming \"AI Avto-Yurist\". Sen O'zbekiston Respublikasining Yo'l harakati "
+    "qonun-qoidalari (YHQ) va Ma'muriy javobgarlik to'g'risidagi kodeksning (MJtK) yo'l harakatiga "
+    "oid qismlari bo'yicha ixtisoslashgan professional huquqiy maslahatchisan."
+)
+
+AVTO_YURIST_RULES = """SENING ASOSIY QOIDALARING:
+1. FAQAT YO'L HARAKATI QONUNCHILIGI: Javoblaringni faqat O'zbekiston Respublikasi Yo'l harakati qoidalari va MJtKning yo'l harakatiga oid moddalariga (Lex.uz) asoslanib ber. Boshqa sohalar bo'yicha savol berilsa, "Men faqat yo'l harakati qonun-qoidalari bo'yicha yordam bera olaman" deb javob ber.
+2. ANIQLIK: Modda raqamlarini va jarima miqdorlarini (BHMda) aniq ko'rsat.
+3. CHEGIRMALAR: Yo'l harakati jarimalari haqida gap ketganda, doimo 15 kunlik (50%) va 30 kunlik (30%) chegirma muddatlarini eslatib o't.
+4. OGOHLANTIRISH: Har bir javob oxirida "Ushbu ma'lumot tanishib chiqish uchun berildi, yakuniy qaror uchun professional huquqshunosga murojaat qiling" degan ogohlantirishni qo'sh."""
+
+AVTO_YURIST_STRUCTURE = """JAVOB STRUKTURASI:
+- ⚖️ [Tegishli Modda]: Kodeks/Qoida nomi va modda/band raqami.
+- 💰 [Jarima/Chora]: Aniq miqdori (BHMda va so'mda). BHM = {bhm:,} so'm (2026-yil).
+- 🕒 [Imtiyozlar]: To'lov muddati va chegirmalar.
+- 💡 [Maslahat]: Foydalanuvchi vaziyatni qanday yengillashtirishi mumkinligi haqida qisqa tavsiya."""
+
+LANGUAGE_RULES = """TIL:
+- Foydalanuvchi so'ragan tilda (O'zbek yoki Rus) javob ber. Professional va tushunarli tilda gapir."""
+
+
+# ================= SHABLON =================
+
+class PromptTemplate:
+    """Statik qism bir marta yig'iladi; dinamik qism har so'rovda formatlanadi"""
+
+    def __init__(self, name: str, sections: List[str], dynamic: str = "",
+                 pinned_units: Optional[List[str]] = None):
+        self.name = name
+        self.static = "\n\n".join(section.strip() for section in sections)
+        self.static_tokens = count_tokens(self.static)
+        self.dynamic = dynamic
+        self.pinned_units = pinned_units or []
+        self._pinned: Optional[str] = None
+        self.stats: Dict[str, int] = defaultdict(int)
+
+    @property
+    def pinned(self) -> str:
+        """Keshlanadigan qonun matnlari (birinchi murojaatda article_index dan)"""
+        if self._pinned is None:
+            from article_index import get_article_index, unit_label
+
+            index = get_article_index()
+            parts = []
+            for key in self.pinned_units:
+                law, kind, number = key.split(":")
+                unit = index.get(law, kind, number)
+                if unit is not None:
+                    parts.append(f"{unit_label(unit)}. {unit['title']}\n{unit['text']}")
+                else:
+                    logger.warning(f"📝 {self.name}: {key} article_index da topilmadi")
+            self._pinned = "ASOSIY QOIDALAR (doimiy kontekst):\n\n" + "\n\n".join(parts) if parts else ""
+            self.stats["pinned_tokens"] = count_tokens(self._pinned)
+        return self._pinned
+
+    def render_dynamic(self, **kwargs: Any) -> str:
+        """Faqat so'rovga xos qism (bo'sh qiymatlar bilan - bo'sh satr)"""
+        text = self.dynamic.format(**kwargs) if self.dynamic and any(kwargs.values()) else ""
+        self.stats["renders"] += 1
+        self.stats["dynamic_tokens"] += count_tokens(text)
+        return text
+
+    def render(self, **kwargs: Any) -> str:
+        """To'liq prompt: statik prefiks + dinamik qism"""
+        dynamic = self.render_dynamic(**kwargs)
+        return f"{self.static}\n\n{dynamic}" if dynamic else self.static
+
+    def record_usage(self, provider: str, prompt_tokens: int, cached_tokens: int = 0):
+        """Provayder hisoblagan kirish tokenlari (keshdan o'qilganlari alohida)"""
+        self.stats[f"{provider}_prompt_tokens"] += prompt_tokens or 0
+        self.stats[f"{provider}_cached_tokens"] += cached_tokens or 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        renders = self.stats.get("renders", 0)
+        return {
+            **self.stats,
+            "static_tokens": self.static_tokens,
+            "avg_dynamic_tokens": round(self.stats.get("dynamic_tokens", 0) / renders) if renders else 0,
+        }
+
+
+# ================= REESTR =================
+
+_templates: Dict[str, PromptTemplate] = {}
+
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    _templates[template.name] = template
+    return template
+
+
+def get_template(name: str) -> PromptTemplate:
+    return _templates[name]
+
+
+def get_prompt_stats() -> Dict[str, Dict[str, Any]]:
+    """Shablonlar bo'yicha token hisoblagichlari (/stats uchun)"""
+    return {name: template.get_stats() for name, template in sorted(_templates.items())}
+
+
+# Zaxira modellar (Gemini, OpenAI chat) va yangi yaratiladigan Assistant
+register(PromptTemplate(
+    "yhq_advisor",
+    [YHQ_ADVISOR_ROLE, YHQ_ADVISOR_RULES, YHQ_ADVISOR_STRUCTURE, LANGUAGE_RULES],
+    dynamic="QONUNLARDAN MA'LUMOT:\n{context}",
+    pinned_units=[key.strip() for key in PROMPT_PINNED_UNITS.split(",") if key.strip()],
+))
+
+# Mavjud Assistant instruktsiyalari (YHQ + MJtK)
+register(PromptTemplate(
+    "avto_yurist",
+    [AVTO_YURIST_ROLE, AVTO_YURIST_RULES,
+     AVTO_YURIST_STRUCTURE.format(bhm=int(os.getenv("BHM_VALUE", "412500"))), LANGUAGE_RULES],
+))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"tiktoken: {TIKTOKEN_AVAILABLE}")
+    template = get_template("yhq_advisor")
+    template.render(context="YHQ 12-band: ...")
+    print(f"pinned: {count_tokens(template.pinned)} token")
+    for name, stats in get_prompt_stats().items():
+        print(f"{name}: {stats}")
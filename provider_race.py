@@ -0,0 +1,232 @@
+"""
+🏁 PROVAYDERLAR POYGASI (HEDGING)
+==================================
+Javob provayderlarini (Assistant, Gemini, OpenAI chat) ketma-ket emas,
+kechikish bilan parallel ishga tushirish.
+
+- Birinchi provayder darhol boshlanadi
+- Keyingisi oldingisi hedge_delay soniyada qabul qilinadigan javob
+  bermasa (yoki xato/qoniqarsiz javob qaytarsa) spekulyativ boshlanadi
+- Birinchi qabul qilingan javob qaytariladi, qolganlari bekor qilinadi
+- Har bir provayderning bir vaqtdagi chaqiruvlari cheklangan (max_concurrency):
+  limit to'lgan bo'lsa spekulyativ chaqiruv qilinmaydi, provayder faqat
+  oldingilari muvaffaqiyatsiz bo'lgandagina (navbat kutib) yoki keyingi hedge
+  vaqtida limit bo'shagan bo'lsa ishlaydi; undan keyingi provayder esa o'z
+  hedge kechikishini qoldirilgan paytdan boshlab kutadi
+
+- Breakeri ochiq provayder (circuit_breaker.py) kutilmaydi - darhol keyingisiga o'tiladi
+
+Sozlash (env): HEDGE_DELAY_<NOM>, MAX_CONCURRENCY_<NOM> (masalan HEDGE_DELAY_GEMINI=8)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from circuit_breaker import CircuitBreaker, get_breaker
+
+logger = logging.getLogger(__name__)
+
+
+class Provider:
+    """Poygadagi provayder sozlamalari (so'rovlar orasida umumiy - limit shu yerda)"""
+
+    def __init__(self, name: str, hedge_delay: float = 0.0, max_concurrency: int = 8,
+                 accept: Optional[Callable[[str], bool]] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.hedge_delay = hedge_delay
+        self.max_concurrency = max_concurrency
+        self.accept = accept or (lambda answer: bool(answer and answer.strip()))
+        self.breaker = breaker
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.stats: Dict[str, int] = defaultdict(int)
+
+    @classmethod
+    def from_env(cls, name: str, hedge_delay: float, max_concurrency: int,
+                 accept: Optional[Callable[[str], bool]] = None,
+                 slow_call_seconds: Optional[float] = None) -> "Provider":
+        key = name.upper()
+        return cls(
+            name,
+            hedge_delay=float(os.getenv(f"HEDGE_DELAY_{key}", str(hedge_delay))),
+            max_concurrency=int(os.getenv(f"MAX_CONCURRENCY_{key}", str(max_concurrency))),
+            accept=accept,
+            breaker=get_breaker(name, slow_call_seconds),
+        )
+
+    @property
+    def at_capacity(self) -> bool:
+        return self.semaphore.locked()
+
+    @property
+    def blocked(self) -> bool:
+        return self.breaker is not None and self.breaker.is_open
+
+    def allow(self) -> bool:
+        """Breaker ochiq bo'lsa provayder o'tkazib yuboriladi"""
+        if self.breaker is None or self.breaker.allow():
+            return True
+        self.stats["skipped"] += 1
+        logger.info(f"🔌 {self.name} o'tkazib yuborildi (breaker {self.breaker.state})")
+        return False
+
+    async def _run(self, factory: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                answer = await factory()
+            except asyncio.CancelledError:
+                # Yutqazgan provayder: sekinligi ham sog'lik ko'rsatkichi
+                elapsed = time.perf_counter() - start
+                if self.breaker is not None:
+                    slow = self.breaker.slow_call_seconds
+                    if slow is not None and elapsed >= slow:
+                        self.breaker.record_failure(f"sekin javob: {elapsed:.1f} s", elapsed)
+                    else:
+                        self.breaker.release()
+                raise
+            except Exception as e:
+                if self.breaker is not None:
+                    self.breaker.record_failure(e, time.perf_counter() - start)
+                raise
+            if self.breaker is not None:
+                if answer is None:
+                    self.breaker.record_failure("javob yo'q", time.perf_counter() - start)
+                else:
+                    self.breaker.record_success(time.perf_counter() - start)
+            return answer
+
+
+class RaceResult:
+    def __init__(self, answer: str, provider: str, elapsed: float, launched: List[str]):
+        self.answer = answer
+        self.provider = provider
+        self.elapsed = elapsed
+        self.launched = launched
+
+
+async def race(entries: List[Tuple[Provider, Callable[[], Awaitable[Optional[str]]]]],
+               on_discard: Optional[Callable[[str], None]] = None) -> Optional[RaceResult]:
+    """
+    entries - (provayder, korutina fabrikasi) ustuvorlik tartibida.
+    Fabrika javob matnini (yoki None) qaytaradi; istisno - muvaffaqiyatsiz deb hisoblanadi.
+    on_discard(nom) - provayder xato yoki qoniqarsiz javob berganda (masalan oqimni boshqasiga berish).
+    Qaytaradi: birinchi qabul qilingan javob yoki None (hech biri javob bermadi).
+    """
+    start = time.perf_counter()
+    # Breakeri ochiqlar navbatga qo'yilmaydi - keyingi provayderning hedge kechikishi ham kutilmaydi
+    queue = [entry for entry in entries if not entry[0].blocked]
+    for provider, _ in entries:
+        if provider.blocked:
+            provider.stats["skipped"] += 1
+            provider.breaker.rejected += 1
+    deferred: List[Tuple[Provider, Callable]] = []
+    pending: Dict[asyncio.Task, Provider] = {}
+    launched: List[str] = []
+    last_launch = start
+
+    def launch(entry, hedge: bool) -> bool:
+        nonlocal last_launch
+        provider, factory = entry
+        if not provider.allow():
+            return False
+        task = asyncio.create_task(provider._run(factory), name=f"provider-{provider.name}")
+        pending[task] = provider
+        launched.append(provider.name)
+        last_launch = time.perf_counter()
+        provider.stats["launched"] += 1
+        if hedge:
+            provider.stats["hedged"] += 1
+            logger.info(f"🏁 {provider.name} spekulyativ ishga tushirildi ({last_launch - start:.1f} s)")
+        return True
+
+    def launch_next(hedge: bool):
+        """
+        Navbatdagi provayder; spekulyativ chaqiruvda limit to'lgan bo'lsa - keyinga qoldiriladi
+        (hedge taymeri qaytadan boshlanadi), breakeri ochiq bo'lsa - tashlab ketiladi.
+        """
+        nonlocal last_launch
+        if hedge:
+            # Oldin qoldirilgan provayderning limiti bo'shagan bo'lsa - u ustuvor
+            for entry in deferred:
+                if not entry[0].at_capacity:
+                    deferred.remove(entry)
+                    if launch(entry, hedge):
+                        return
+                    break
+        while queue:
+            entry = queue.pop(0)
+            if hedge and entry[0].at_capacity:
+                entry[0].stats["deferred"] += 1
+                deferred.append(entry)
+                # Keyingi provayder o'z hedge kechikishini shu paytdan boshlab kutadi
+                last_launch = time.perf_counter()
+                return
+            if launch(entry, hedge):
+                return
+
+    try:
+        while queue or deferred or pending:
+            if not pending:
+                # Ishlayotgan provayder yo'q - keyingisi limit bo'shashini kutib boshlanadi
+                if deferred:
+                    launch(deferred.pop(0), hedge=False)
+                else:
+                    launch_next(hedge=False)
+                continue
+
+            timeout = None
+            if queue:
+                timeout = max(0.0, last_launch + queue[0][0].hedge_delay - time.perf_counter())
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                launch_next(hedge=True)
+                continue
+
+            for task in done:
+                provider = pending.pop(task)
+                try:
+                    answer = task.result()
+                except Exception as e:
+                    provider.stats["failed"] += 1
+                    logger.warning(f"🏁 {provider.name} xatolik: {e}")
+                    answer = None
+                if answer is not None and provider.accept(answer):
+                    provider.stats["won"] += 1
+                    elapsed = time.perf_counter() - start
+                    logger.info(f"🏁 G'olib: {provider.name} ({elapsed:.1f} s, ishga tushganlar: {launched})")
+                    return RaceResult(answer, provider.name, elapsed, launched)
+                if answer is not None:
+                    provider.stats["rejected"] += 1
+                    logger.info(f"⚠️ {provider.name} javobi qoniqarsiz (len={len(answer)}): {answer[:60]}...")
+                if on_discard is not None:
+                    on_discard(provider.name)
+
+            # Muvaffaqiyatsiz provayder o'rniga keyingisi hedge kutmasdan boshlanadi
+            if pending:
+                launch_next(hedge=True)
+        return None
+    finally:
+        # Yutqazganlar (yoki poyganing o'zi bekor qilinsa - hammasi) bekor qilinadi
+        for task, provider in pending.items():
+            task.cancel()
+            provider.stats["cancelled"] += 1
+
+
+def get_stats(providers: List[Provider]) -> Dict[str, Dict[str, Any]]:
+    """Provayderlar bo'yicha hisoblagichlar (/stats uchun)"""
+    return {
+        provider.name: {
+            **provider.stats,
+            "hedge_delay": provider.hedge_delay,
+            "max_concurrency": provider.max_concurrency,
+            "in_flight": provider.max_concurrency - provider.semaphore._value,
+            "breaker": provider.breaker.state if provider.breaker is not None else None,
+        }
+        for provider in providers
+    }
@@ -0,0 +1,273 @@
+"""
+📏 RAG BENCHMARK
+=================
+Qidiruv sifati va tezligi: oltin savollar to'plami (data/benchmark/golden_set.json)
+bo'yicha YHQ/MJtK moddalari/bandlari qanchalik topilishi.
+
+O'lchanadi:
+- indeks qurish vaqti va hajmi (yangi bo'sh indeksdan)
+- search_laws (keyword / vector / hybrid): recall@k, MRR, kechikish p50/p95/p99
+- query (LLM javobi bilan): manbalardagi recall, MRR, kechikish
+
+Natija - JSON hisobot (kalitlar tartiblangan), commitlar orasida diff qilish mumkin:
+    python rag_benchmark.py --output data/benchmark/report.json
+    python rag_benchmark.py --baseline data/benchmark/report.json --output /tmp/new.json
+
+Kalitsiz (CI) ishga tushirish: RAG_EMBED_PROVIDER=hashing RAG_LLM_PROVIDER=extractive
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GOLDEN_SET_PATH = os.getenv("RAG_BENCHMARK_GOLDEN", "./data/benchmark/golden_set.json")
+BENCHMARK_KS = (1, 3, 5, 10)
+BENCHMARK_MODES = ("keyword", "vector", "hybrid")
+
+
+def load_golden_set(path: str = GOLDEN_SET_PATH) -> List[Dict[str, Any]]:
+    """Savollar: {"id", "lang", "question", "expected": ["YHQ:band:109", ...]}"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["questions"]
+
+
+def result_key(result: Dict[str, Any]) -> Optional[str]:
+    """Qidiruv natijasi -> "YHQ:band:109" (modda/band bo'lmagan chunklar uchun None)"""
+    if result.get("law") and result.get("article"):
+        return f"{result['law']}:{result['article']}"
+    return None
+
+
+def ranked_keys(results: List[Dict[str, Any]]) -> List[str]:
+    """Takrorlanmaydigan modda/bandlar reytingi (bir moddaning bir nechta chunki - bitta o'rin)"""
+    keys = []
+    for result in results:
+        key = result_key(result)
+        if key is not None and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def score_ranking(ranking: List[str], expected: Sequence[str], ks: Sequence[int] = BENCHMARK_KS) -> Dict[str, float]:
+    """recall@k (kutilganlarning topilgan ulushi) va reciprocal rank (birinchi mos natija)"""
+    expected = set(expected)
+    scores = {f"recall@{k}": len(expected & set(ranking[:k])) / len(expected) for k in ks}
+    first = next((i for i, key in enumerate(ranking) if key in expected), None)
+    scores["rr"] = 1.0 / (first + 1) if first is not None else 0.0
+    return scores
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    if not len(values):
+        return {}
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+        "mean": round(float(values.mean()), 2),
+    }
+
+
+def aggregate(per_question: List[Dict[str, Any]], latencies: List[float],
+              ks: Sequence[int] = BENCHMARK_KS) -> Dict[str, Any]:
+    """Savollar bo'yicha o'rtacha ko'rsatkichlar, til kesimi va topilmaganlar"""
+    count = len(per_question)
+    summary: Dict[str, Any] = {
+        f"recall@{k}": round(sum(q["scores"][f"recall@{k}"] for q in per_question) / count, 4) for k in ks
+    }
+    summary["mrr"] = round(sum(q["scores"]["rr"] for q in per_question) / count, 4)
+    summary["latency_ms"] = latency_summary(latencies)
+
+    by_lang = defaultdict(list)
+    for q in per_question:
+        by_lang[q["lang"]].append(q["scores"]["rr"])
+    summary["mrr_by_lang"] = {lang: round(sum(rr) / len(rr), 4) for lang, rr in sorted(by_lang.items())}
+    summary["misses"] = sorted(q["id"] for q in per_question if q["scores"]["rr"] == 0.0)
+    return summary
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# ================= BENCHMARK =================
+
+async def _bench_search(engine, questions: List[Dict[str, Any]], mode: str, top_k: int, repeat: int):
+    per_question, latencies = [], []
+    for q in questions:
+        results = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = await engine.asearch_laws(q["question"], limit=top_k, mode=mode)
+            latencies.append(time.perf_counter() - start)
+        per_question.append({"id": q["id"], "lang": q["lang"],
+                             "scores": score_ranking(ranked_keys(results), q["expected"])})
+    return aggregate(per_question, latencies)
+
+
+async def _bench_query(engine, questions: List[Dict[str, Any]], top_k: int):
+    per_question, latencies = [], []
+    for q in questions:
+        start = time.perf_counter()
+        result = await engine.query(q["question"], top_k=top_k)
+        latencies.append(time.perf_counter() - start)
+        per_question.append({"id": q["id"], "lang": q["lang"],
+                             "scores": score_ranking(ranked_keys(result["sources"]), q["expected"])})
+    return aggregate(per_question, latencies)
+
+
+def run_benchmark(golden_path: str = GOLDEN_SET_PATH, index_dir: Optional[str] = None,
+                  top_k: int = 10, repeat: int = 3, modes: Sequence[str] = BENCHMARK_MODES,
+                  with_query: bool = True) -> Dict[str, Any]:
+    """
+    Yangi indeksni qurib (index_dir bo'sh bo'lmasa - mavjudini ishlatib) benchmarkni bajarish.
+    rag_engine shu yerda import qilinadi: CHROMA_DB_PATH undan oldin o'rnatilishi kerak.
+    """
+    questions = load_golden_set(golden_path)
+    index_dir = index_dir or tempfile.mkdtemp(prefix="rag_benchmark_")
+    os.environ["CHROMA_DB_PATH"] = index_dir
+
+    import rag_engine
+
+    engine = rag_engine.RAGEngine()
+    if not engine.is_ready:
+        raise RuntimeError(f"RAG ishga tushmadi: {engine.get_readiness()['error']}")
+
+    start = time.perf_counter()
+    update = engine.update_index_from_files()
+    build_seconds = time.perf_counter() - start
+    stats = engine.get_stats()
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "golden_set": str(golden_path),
+            "questions": len(questions),
+        },
+        "config": {
+            "chunk_size": rag_engine.CHUNK_SIZE,
+            "chunk_overlap": rag_engine.CHUNK_OVERLAP,
+            "top_k": top_k,
+            "embed_provider": rag_engine.EMBED_PROVIDER,
+            "llm_provider": rag_engine.LLM_PROVIDER,
+            "embedding_model": stats.get("embedding_model"),
+            "vector_dtype": stats.get("vector_dtype"),
+            "vector_rescore": rag_engine.VECTOR_RESCORE_FACTOR,
+            "ann": rag_engine.ANN_SETTINGS,
+        },
+        "index": {
+            "build_seconds": round(build_seconds, 2),
+            "files": update.get("files_total"),
+            "documents": update.get("documents"),
+            "chunks": stats.get("total_chunks"),
+            "size_mb": round(_dir_size(engine.snapshot.path) / 1024 / 1024, 2),
+            "vector_mb": stats.get("vector_mb"),
+        },
+        "search_laws": {},
+    }
+
+    async def measure():
+        for mode in modes:
+            report["search_laws"][mode] = await _bench_search(engine, questions, mode, top_k, repeat)
+            logger.info(f"📏 search_laws[{mode}]: MRR {report['search_laws'][mode]['mrr']}")
+        if with_query:
+            report["query"] = await _bench_query(engine, questions, min(top_k, rag_engine.RAG_CONTEXT_TOP_K))
+
+    asyncio.run(measure())
+    return report
+
+
+# ================= SOLISHTIRISH =================
+
+def _flatten(data: Any, prefix: str = "") -> Dict[str, Any]:
+    if isinstance(data, dict):
+        flat = {}
+        for key, value in data.items():
+            flat.update(_flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    return {prefix: data}
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Son ko'rsatkichlar farqi (meta bo'limidan tashqari)"""
+    old, new = _flatten(baseline), _flatten(current)
+    lines = []
+    for key in sorted(set(old) | set(new)):
+        if key.startswith("meta."):
+            continue
+        a, b = old.get(key), new.get(key)
+        if a == b:
+            continue
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+            lines.append(f"{key}: {a} -> {b} ({b - a:+.4g})")
+        else:
+            lines.append(f"{key}: {a} -> {b}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG qidiruv sifati va kechikishi benchmarki")
+    parser.add_argument("--golden", default=GOLDEN_SET_PATH, help="oltin savollar JSON fayli")
+    parser.add_argument("--output", default="./data/benchmark/report.json", help="hisobot fayli")
+    parser.add_argument("--index-dir", default=None, help="indeks papkasi (standart: vaqtinchalik, yangidan quriladi)")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3, help="kechikish uchun har bir savol necha marta")
+    parser.add_argument("--modes", default=",".join(BENCHMARK_MODES))
+    parser.add_argument("--no-query", action="store_true", help="query() (LLM) o'lchanmasin")
+    parser.add_argument("--baseline", default=None, help="solishtirish uchun oldingi hisobot")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = run_benchmark(
+        golden_path=args.golden,
+        index_dir=args.index_dir,
+        top_k=args.top_k,
+        repeat=args.repeat,
+        modes=[mode for mode in args.modes.split(",") if mode],
+        with_query=not args.no_query,
+    )
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"📏 Hisobot: {output}")
+
+    for mode, summary in report["search_laws"].items():
+        print(f"  {mode:8s} MRR {summary['mrr']:.3f}  R@5 {summary['recall@5']:.3f}  "
+              f"p50 {summary['latency_ms'].get('p50')} ms  p99 {summary['latency_ms'].get('p99')} ms")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n📊 Farqlar:")
+        for line in compare_reports(baseline, report) or ["o'zgarish yo'q"]:
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,11 @@
 🧠 RAG ENGINE - QONUNLAR UCHUN
 ===============================
 LlamaIndex asosida RAG tizimi.
-SimpleVectorStore ishlatiladi (tashqi dependency yo'q).
+MmapVectorStore ishlatiladi (numpy.memmap, JSON parse qilinmaydi).
+Indeks o'zgarishlari yangi snapshot papkasida quriladi va atomar almashtiriladi
+(index_snapshots.py) - so'rovlar boshlangan snapshotida tugaydi.
+Bot ishga tushganda indeks fon threadida yuklanadi (start_rag_warm_up) -
+tayyor bo'lguncha readiness holati "loading", handlerlar kutib qolmaydi.
 
 Asosiy funksiyalar:
 - Hujjatlarni vektor bazasiga yuklash
@@ -11,15 +15,30 @@ Asosiy funksiyalar:
 """
 
 import asyncio
+import concurrent.futures
+import hashlib
 import json
 import logging
 import os
 import pickle
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Set, Tuple
 
 from dotenv import load_dotenv
 
+from article_index import LAW_FILES, QONUNLAR_PATH, get_article_index, load_article_law
+from document_loaders import load_json_law, load_pdf_law, load_text_law, select_directory_files
+from circuit_breaker import get_breaker
+from index_snapshots import SnapshotManager
+from metadata_index import build_filters
+from semantic_cache import get_semantic_cache
+from transliteration import normalize_text
+
 load_dotenv()
 
 # Logging
@@ -31,6 +50,55 @@ INDEX_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
 LAWS_DATA_PATH = os.getenv("LAWS_DATA_PATH", "./data/laws")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Har bir dokumentning kontent hashi shu faylda saqlanadi (inkremental indekslash uchun)
+MANIFEST_FILE = "doc_manifest.json"
+# Manba fayllarning mtime/hajmi va ulardan chiqqan doc_id lar (o'zgarmagan fayllar o'qilmaydi)
+FILE_MANIFEST_FILE = "file_manifest.json"
+
+# Fayllarni tahlil qiluvchi jarayonlar soni
+DOC_LOAD_WORKERS = int(os.getenv("DOC_LOAD_WORKERS", str(os.cpu_count() or 2)))
+# Bundan kichik hajmda jarayon ochish xarajati parallellik foydasidan ko'p - ketma-ket o'qiladi
+DOC_LOAD_PARALLEL_MIN_BYTES = int(os.getenv("DOC_LOAD_PARALLEL_MIN_BYTES", str(8 * 1024 * 1024)))
+
+# Embeddinglar matritsasi turi: float32, float16 (xotira 2x kam) yoki int8 (4x kam)
+VECTOR_DTYPE = os.getenv("RAG_VECTOR_DTYPE", "float32")
+# Kvantlangan bazada top_k * N nomzod float32 nusxa bilan qayta baholanadi (0 - o'chirilgan)
+VECTOR_RESCORE_FACTOR = int(os.getenv("RAG_VECTOR_RESCORE", "0"))
+
+# ANN (IVF-flat): RAG_ANN_NPROBE ta eng yaqin klaster skorlanadi (0 - doim aniq qidiruv).
+# RAG_ANN_MIN_ROWS dan kichik bazada aniq qidiruv; RAG_ANN_NLIST=0 - klasterlar soni avtomatik
+ANN_SETTINGS = {
+    "ann_nprobe": int(os.getenv("RAG_ANN_NPROBE", "8")),
+    "ann_min_rows": int(os.getenv("RAG_ANN_MIN_ROWS", "20000")),
+    "ann_nlist": int(os.getenv("RAG_ANN_NLIST", "0")),
+}
+
+# Provayderlar: gemini (standart) yoki kalitsiz lokal o'rinbosarlar (CI, benchmark uchun)
+# RAG_EMBED_PROVIDER: gemini | hashing;  RAG_LLM_PROVIDER: gemini | extractive | echo
+EMBED_PROVIDER = os.getenv("RAG_EMBED_PROVIDER", "gemini").lower()
+LLM_PROVIDER = os.getenv("RAG_LLM_PROVIDER", "gemini").lower()
+LOCAL_LLM_PROVIDERS = ("extractive", "echo")
+
+# Chunk o'lchami (tokenlarda) - benchmark bilan tanlanadi (rag_benchmark.py)
+CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", "1024"))
+CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "200"))
+
+# Embedding pipeline sozlamalari (Gemini batch chegarasi - 100 ta matn)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "20000"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_RPM = int(os.getenv("EMBED_RPM", "1500"))
+EMBED_TPM = int(os.getenv("EMBED_TPM", "1000000"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+
+# So'rovlar: bir vaqtda nechta RAG so'rovi va har biri uchun vaqt chegarasi (soniya)
+RAG_MAX_CONCURRENCY = int(os.getenv("RAG_MAX_CONCURRENCY", "4"))
+RAG_QUERY_TIMEOUT = float(os.getenv("RAG_QUERY_TIMEOUT", "30"))
+
+# Generatsiya uchun kontekst: nechta chunk va jami token byudjeti
+RAG_CONTEXT_TOP_K = int(os.getenv("RAG_CONTEXT_TOP_K", "5"))
+RAG_CONTEXT_MAX_TOKENS = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "2000"))
+
 # LlamaIndex importlari
 try:
     from llama_index.core import (
@@ -41,70 +109,408 @@ try:
         load_index_from_storage
     )
     from llama_index.core.node_parser import SentenceSplitter
+    from llama_index.core.schema import MetadataMode, NodeWithScore
     from llama_index.llms.gemini import Gemini
     from llama_index.embeddings.gemini import GeminiEmbedding
-    import pdfplumber
+    from vector_store import MmapVectorStore
+    from embedding_cache import CachedEmbedding, EmbeddingCache
+    from local_providers import ExtractiveLLM, HashingEmbedding
+    from bm25_index import BM25_FILE, BM25Index, reciprocal_rank_fusion, tokenize
+    from dedup import BOILERPLATE_FILE, SIMHASH_FILE, BoilerplateLearner, NearDuplicateFilter
     LLAMAINDEX_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"Kutubxonalar topilmadi: {e}")
     LLAMAINDEX_AVAILABLE = False
 
 
+# ================= EMBEDDING PIPELINE =================
+
+class RateLimitError(Exception):
+    """Provayder 429 (rate limit) qaytardi"""
+
+    def __init__(self, message: str = "429 Too Many Requests", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """Xatolik 429 / kvota tugashi ekanligini aniqlash (provayderdan qat'i nazar)"""
+    if isinstance(error, RateLimitError):
+        return True
+    for attr in ("status_code", "code", "status"):
+        if getattr(error, attr, None) == 429:
+            return True
+    text = str(error).lower()
+    return "429" in text or "resource_exhausted" in text or "rate limit" in text
+
+
+class RateLimiter:
+    """Daqiqalik so'rovlar (RPM) va tokenlar (TPM) byudjetini ushlab turish"""
+
+    def __init__(self, rpm: int, tpm: int, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._events = deque()  # (vaqt, tokenlar)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._events and now - self._events[0][0] >= self.window:
+                    self._events.popleft()
+
+                used_tokens = sum(t for _, t in self._events)
+                # Bitta katta batch TPM dan oshsa ham, bo'sh oynada o'tkaziladi
+                if len(self._events) < self.rpm and (used_tokens + tokens <= self.tpm or not self._events):
+                    self._events.append((now, tokens))
+                    return
+
+                await asyncio.sleep(max(self.window - (now - self._events[0][0]), 0.05))
+
+
+def http_embed_fn(url: str, model: str = "text-embedding-004", timeout: float = 60.0):
+    """
+    OpenAI-mos HTTP embedding endpointi uchun embed funksiyasi.
+    Lokal soxta embedding serverda pipeline'ni sinash uchun ishlatiladi:
+    POST {"model": ..., "input": [...]} -> {"data": [{"embedding": [...]}, ...]}
+    """
+    import httpx
+
+    async def embed(texts: List[str]) -> List[List[float]]:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            response = await client.post(url, json={"model": model, "input": texts})
+            if response.status_code == 429:
+                retry_after = response.headers.get("Retry-After")
+                raise RateLimitError(retry_after=float(retry_after) if retry_after else None)
+            response.raise_for_status()
+            return [item["embedding"] for item in response.json()["data"]]
+
+    return embed
+
+
+class EmbeddingPipeline:
+    """
+    Chunklarni maksimal batchlarga yig'ib, cheklangan parallellikda embed qilish.
+    Keshdagi chunklar API ga yuborilmaydi, 429 da exponential backoff bilan qayta uriniladi.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[List[str]], Awaitable[List[List[float]]]]] = None,
+        cache=None,
+        model_name: str = "",
+        max_batch_size: int = EMBED_BATCH_SIZE,
+        max_batch_tokens: int = EMBED_BATCH_TOKENS,
+        max_concurrency: int = EMBED_CONCURRENCY,
+        rpm: int = EMBED_RPM,
+        tpm: int = EMBED_TPM,
+        max_retries: int = EMBED_MAX_RETRIES
+    ):
+        self.embed_fn = embed_fn
+        self.cache = cache
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+
+    @classmethod
+    def from_settings(cls, **kwargs) -> "EmbeddingPipeline":
+        """Settings.embed_model asosida pipeline (CachedEmbedding bo'lsa keshi bilan)"""
+        embed_model = Settings.embed_model
+        if isinstance(embed_model, CachedEmbedding):
+            inner = embed_model.inner
+            return cls(
+                embed_fn=inner._aget_text_embeddings,
+                cache=embed_model.cache,
+                model_name=embed_model.model_name,
+                **kwargs
+            )
+        return cls(embed_fn=embed_model._aget_text_embeddings, model_name=embed_model.model_name, **kwargs)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Taxminiy token soni (~4 belgi = 1 token)"""
+        return max(1, len(text) // 4)
+
+    def _pack_batches(self, items: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+        """Chunklarni hajm va token chegarasigacha to'ldirilgan batchlarga joylash"""
+        batches, current, current_tokens = [], [], 0
+        for item in items:
+            tokens = self.estimate_tokens(item[1])
+            if current and (len(current) >= self.max_batch_size or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(item)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(self, texts: List[str], limiter: RateLimiter, semaphore: asyncio.Semaphore,
+                           stats: Dict[str, Any]) -> List[List[float]]:
+        tokens = sum(self.estimate_tokens(text) for text in texts)
+        attempt = 0
+        while True:
+            await limiter.acquire(tokens)
+            try:
+                async with semaphore:
+                    return await self.embed_fn(texts)
+            except Exception as e:
+                if not _is_rate_limit_error(e) or attempt >= self.max_retries:
+                    raise
+                delay = getattr(e, "retry_after", None) or min(2 ** attempt, 60)
+                delay += random.uniform(0, delay * 0.25)
+                attempt += 1
+                stats["retries"] += 1
+                logger.warning(f"⏳ Embedding 429, {delay:.1f}s kutilmoqda (urinish {attempt}/{self.max_retries})")
+                await asyncio.sleep(delay)
+
+    async def embed_texts(self, texts: List[str]) -> Tuple[List[List[float]], Dict[str, Any]]:
+        """Matnlar ro'yxatini embed qilish; (embeddinglar, statistika) qaytaradi"""
+        started = time.perf_counter()
+        stats = {"chunks": len(texts), "cached": 0, "embedded": 0, "batches": 0, "retries": 0}
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        keys = []
+        if self.cache is not None:
+            keys = [self.cache.make_key(self.model_name, text) for text in texts]
+            found = self.cache.get_many(keys)
+            for i, key in enumerate(keys):
+                if key in found:
+                    results[i] = found[key]
+            stats["cached"] = sum(1 for r in results if r is not None)
+
+        pending = [(i, text) for i, text in enumerate(texts) if results[i] is None]
+        batches = self._pack_batches(pending)
+        stats["batches"] = len(batches)
+
+        if batches:
+            limiter = RateLimiter(self.rpm, self.tpm)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def run(batch: List[Tuple[int, str]]):
+                embeddings = await self._embed_batch([text for _, text in batch], limiter, semaphore, stats)
+                for (i, _), embedding in zip(batch, embeddings):
+                    results[i] = embedding
+                if self.cache is not None:
+                    self.cache.put_many({keys[i]: emb for (i, _), emb in zip(batch, embeddings)})
+                stats["embedded"] += len(batch)
+
+            await asyncio.gather(*(run(batch) for batch in batches))
+
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 3)
+        stats["chunks_per_sec"] = round(len(texts) / elapsed, 1) if elapsed else None
+        return results, stats
+
+    async def embed_nodes(self, nodes: List[Any]) -> Dict[str, Any]:
+        """Nodelarga embedding o'rnatish (VectorStoreIndex ularni qayta embed qilmaydi)"""
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        embeddings, stats = await self.embed_texts(texts)
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+        logger.info(
+            f"⚡ Embedding: {stats['chunks']} chunk ({stats['cached']} keshdan, "
+            f"{stats['embedded']} API, {stats['batches']} batch), "
+            f"{stats['chunks_per_sec']} chunk/s"
+        )
+        return stats
+
+
+def _run_sync(coro):
+    """Korutinani sinxron koddan ishga tushirish (ishlayotgan event loop ichida ham)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+class IndexSnapshot:
+    """
+    Bitta snapshot: papka va undan ochilgan indekslar.
+    So'rov boshida olingan snapshot so'rov oxirigacha ishlatiladi (almashtirish uni buzmaydi).
+    """
+
+    def __init__(self, name: Optional[str], path: Path):
+        self.name = name
+        self.path = path
+        self.vector_store = None
+        self.index = None
+        self.bm25: Optional["BM25Index"] = None
+        self.dedup: Optional["NearDuplicateFilter"] = None
+        self.persisted = False  # qurish vaqtida diskka yozildi - faollashtirish mumkin
+        self.changed = False    # indeks mazmuni o'zgardi - semantik kesh eskiradi
+
+
 class RAGEngine:
     """Qonunlar uchun RAG (Retrieval Augmented Generation) tizimi"""
 
-    def __init__(self):
-        self.index_path = Path(INDEX_PATH)
+    def __init__(self, background: bool = False):
+        """
+        background=True - og'ir qism (Gemini sozlamalari, indeksni ochish, BM25)
+        fon threadida bajariladi; holat get_readiness() orqali kuzatiladi.
+        """
+        self.snapshots = SnapshotManager(Path(INDEX_PATH))
+        self.snapshot = IndexSnapshot(None, Path(INDEX_PATH))
+        self._local = threading.local()
+        self._build_lock = threading.Lock()
         self.laws_path = Path(LAWS_DATA_PATH)
-        self.index = None
+        self.last_loaded_files: Dict[str, Dict[str, Any]] = {}
+        # Asl dokumenti o'chirilgani uchun qayta indekslanishi kerak bo'lgan (near-duplicate) dokumentlar
+        self.reindex_pending: Set[str] = set()
+        self.last_cleanup_stats: Dict[str, Any] = {}
+        self.embedding_cache = None
+        self.last_ingest_stats: Dict[str, Any] = {}
+        self.query_timeout = RAG_QUERY_TIMEOUT
+        # Kontekst qidiruvi sog'ligi (retrieve_context: savol embeddingi + qidiruv);
+        # timeoutgacha kuttiradigan qidiruvlar ham xato
+        self.retrieval_breaker = get_breaker("rag_retrieval", slow_call_seconds=RAG_QUERY_TIMEOUT * 0.8)
+        self._query_semaphore = asyncio.Semaphore(RAG_MAX_CONCURRENCY)
         self.is_initialized = False
 
+        # Tayyorlik holati: loading -> ready | failed
+        self._ready_event = threading.Event()
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self.readiness: Dict[str, Any] = {
+            "state": "loading",
+            "stage": "navbatda",
+            "progress": 0.0,
+            "error": None,
+            "started_at": time.time(),
+            "ready_at": None,
+        }
+
+        if background:
+            self.start_warm_up()
+        else:
+            self._warm_up()
+
+    # ================= ISHGA TUSHIRISH =================
+
+    def start_warm_up(self):
+        """Og'ir ishga tushirishni fon threadida boshlash (takroriy chaqiruv e'tiborsiz)"""
+        if self._warm_up_thread is not None or self._ready_event.is_set():
+            return
+        self._warm_up_thread = threading.Thread(target=self._warm_up, name="rag-warm-up", daemon=True)
+        self._warm_up_thread.start()
+        logger.info("🔥 RAG indeksi fonda yuklanmoqda...")
+
+    def _set_progress(self, stage: str, progress: float):
+        self.readiness.update(stage=stage, progress=progress)
+
+    def _finish_warm_up(self, error: Optional[str] = None):
+        self.readiness.update(
+            state="failed" if error else "ready",
+            stage="xatolik" if error else "tayyor",
+            progress=1.0,
+            error=error,
+            ready_at=time.time(),
+        )
+        self._ready_event.set()
+        elapsed = self.readiness["ready_at"] - self.readiness["started_at"]
+        if error:
+            logger.error(f"❌ RAG ishga tushmadi ({elapsed:.1f} s): {error}")
+        else:
+            logger.info(f"🔥 RAG tayyor ({elapsed:.1f} s)")
+
+    def _warm_up(self):
+        """Sozlamalar, indeks, BM25 va metadata indeksini yuklash (readiness bilan)"""
+        try:
+            error = self._configure()
+            if error is None:
+                self._set_progress("indeks", 0.3)
+                self._initialize()
+                if not self.is_initialized:
+                    error = "Vektor bazasini ochib bo'lmadi"
+            if error is None:
+                # Birinchi so'rov BM25 va metadata indeksini diskdan o'qishga majbur bo'lmasin
+                self._set_progress("bm25", 0.7)
+                self._get_bm25(self.snapshot)
+                self._set_progress("metadata", 0.9)
+                if self.snapshot.vector_store is not None:
+                    self.snapshot.vector_store._get_meta_index()
+        except Exception as e:
+            error = str(e)
+        self._finish_warm_up(error)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.readiness["state"] == "ready"
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Ishga tushish tugashini kutish (blokirovka qiladi - faqat threadlarda)"""
+        self._ready_event.wait(timeout)
+        return self.is_ready
+
+    def get_readiness(self) -> Dict[str, Any]:
+        """Health endpoint va handlerlar uchun tayyorlik holati"""
+        readiness = dict(self.readiness)
+        end = readiness["ready_at"] or time.time()
+        readiness["elapsed"] = round(end - readiness["started_at"], 2)
+        return readiness
+
+    def _configure(self) -> Optional[str]:
+        """LlamaIndex sozlamalari. Qaytaradi: xatolik matni yoki None"""
         if not LLAMAINDEX_AVAILABLE:
             logger.error("⚠️ Kerakli kutubxonalar o'rnatilmagan!")
-            return
+            return "Kerakli kutubxonalar o'rnatilmagan"
 
-        # LlamaIndex sozlamalari (Gemini ishlatiladi)
+        self._set_progress("sozlamalar", 0.1)
+        # LlamaIndex sozlamalari (Gemini yoki lokal provayderlar)
         try:
             google_api_key = os.getenv("GOOGLE_API_KEY")
-            if not google_api_key:
+            uses_gemini = EMBED_PROVIDER != "hashing" or LLM_PROVIDER not in LOCAL_LLM_PROVIDERS
+            if uses_gemini and not google_api_key:
                 logger.error("❌ GOOGLE_API_KEY topilmadi!")
-                return
+                return "GOOGLE_API_KEY topilmadi"
 
-            Settings.llm = Gemini(
-                model_name="models/gemini-flash-latest",
-                api_key=google_api_key,
-                temperature=0.3
-            )
-            Settings.embed_model = GeminiEmbedding(
-                model_name="models/text-embedding-004",
-                api_key=google_api_key
-            )
+            if LLM_PROVIDER in LOCAL_LLM_PROVIDERS:
+                Settings.llm = ExtractiveLLM(mode=LLM_PROVIDER)
+            else:
+                Settings.llm = Gemini(
+                    model_name="models/gemini-flash-latest",
+                    api_key=google_api_key,
+                    temperature=0.3
+                )
+
+            if EMBED_PROVIDER == "hashing":
+                # Lokal hisoblash SQLite keshidan arzon - keshsiz
+                Settings.embed_model = HashingEmbedding()
+            else:
+                # Embeddinglar diskdagi keshdan o'tadi (indekslash va add_documents uchun)
+                self.embedding_cache = EmbeddingCache()
+                Settings.embed_model = CachedEmbedding(
+                    inner=GeminiEmbedding(
+                        model_name="models/text-embedding-004",
+                        api_key=google_api_key
+                    ),
+                    cache=self.embedding_cache
+                )
+            if EMBED_PROVIDER != "gemini" or LLM_PROVIDER != "gemini":
+                logger.info(f"🧪 Provayderlar: embedding={EMBED_PROVIDER}, llm={LLM_PROVIDER}")
             Settings.node_parser = SentenceSplitter(
-                chunk_size=1024,
-                chunk_overlap=200
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP
             )
         except Exception as e:
             logger.error(f"Settings xatolik: {e}")
-            return
-
-        self._initialize()
+            return f"Settings xatolik: {e}"
+        return None
 
     def _initialize(self):
-        """Vektor bazasini ishga tushirish"""
+        """Vektor bazasini ishga tushirish (CURRENT ko'rsatgan snapshotdan)"""
         try:
-            self.index_path.mkdir(parents=True, exist_ok=True)
-            
-            # Mavjud indeksni yuklash
-            storage_file = self.index_path / "docstore.json"
-            if storage_file.exists():
-                try:
-                    storage_context = StorageContext.from_defaults(persist_dir=str(self.index_path))
-                    self.index = load_index_from_storage(storage_context)
-                    logger.info("✅ Mavjud indeks yuklandi")
-                except Exception as e:
-                    logger.warning(f"Indeks yuklashda xatolik: {e}")
-                    self.index = None
-            
+            self.snapshots.root.mkdir(parents=True, exist_ok=True)
+            self.snapshot = self._open_snapshot(self.snapshots.current_name())
+            self.snapshots.prune()
+
             self.is_initialized = True
             logger.info("✅ RAG Engine ishga tushdi (Gemini)!")
 
@@ -112,79 +518,560 @@ class RAGEngine:
             logger.error(f"❌ RAG Engine xatolik: {e}")
             self.is_initialized = False
 
-    def load_documents_from_files(self) -> List[Document]:
-        """Qonun fayllaridan (JSON va PDF) dokumentlarni yuklash"""
-        documents = []
-        
-        if not self.laws_path.exists():
-            logger.warning(f"Qonunlar papkasi topilmadi: {self.laws_path}")
-            return documents
+    def _open_snapshot(self, name: Optional[str]) -> IndexSnapshot:
+        """Snapshot papkasidagi indeksni ochish (binar baza - faqat memmap, JSON parse yo'q)"""
+        snapshot = IndexSnapshot(name, self.snapshots.path(name))
+        storage_file = snapshot.path / "docstore.json"
+        if MmapVectorStore.exists(str(snapshot.path)):
+            try:
+                snapshot.vector_store = MmapVectorStore.from_persist_dir(
+                    str(snapshot.path), rescore_factor=VECTOR_RESCORE_FACTOR, **ANN_SETTINGS
+                )
+                snapshot.index = VectorStoreIndex.from_vector_store(snapshot.vector_store)
+                logger.info(
+                    f"✅ Mavjud indeks yuklandi (mmap, {snapshot.vector_store.count} ta chunk, "
+                    f"snapshot: {name or '-'})"
+                )
+            except Exception as e:
+                logger.warning(f"Indeks yuklashda xatolik: {e}")
+                snapshot.index = None
+                snapshot.vector_store = None
+        elif storage_file.exists():
+            # Eski JSON formatdagi indeks - keyingi indekslashda binar bazaga o'tkaziladi
+            try:
+                storage_context = StorageContext.from_defaults(persist_dir=str(snapshot.path))
+                snapshot.index = load_index_from_storage(storage_context)
+                logger.info("✅ Mavjud indeks yuklandi")
+            except Exception as e:
+                logger.warning(f"Indeks yuklashda xatolik: {e}")
+                snapshot.index = None
+        return snapshot
+
+    # ================= SNAPSHOTLAR =================
+
+    def _state(self) -> IndexSnapshot:
+        """Qurish jarayonida (shu threadda) - yangi snapshot, aks holda xizmat qilayotgani"""
+        staging = getattr(self._local, "staging", None)
+        return staging if staging is not None else self.snapshot
+
+    @property
+    def index_path(self) -> Path:
+        return self._state().path
 
-        # 1. JSON fayllarni yuklash
-        for json_file in self.laws_path.rglob("*.json"):
+    @property
+    def manifest_path(self) -> Path:
+        return self.index_path / MANIFEST_FILE
+
+    @property
+    def file_manifest_path(self) -> Path:
+        return self.index_path / FILE_MANIFEST_FILE
+
+    @property
+    def index(self):
+        return self._state().index
+
+    @index.setter
+    def index(self, value):
+        self._state().index = value
+
+    @property
+    def vector_store(self):
+        return self._state().vector_store
+
+    @vector_store.setter
+    def vector_store(self, value):
+        self._state().vector_store = value
+
+    @property
+    def bm25(self) -> Optional["BM25Index"]:
+        return self._state().bm25
+
+    @bm25.setter
+    def bm25(self, value):
+        self._state().bm25 = value
+
+    @property
+    def dedup(self) -> Optional["NearDuplicateFilter"]:
+        return self._state().dedup
+
+    @dedup.setter
+    def dedup(self, value):
+        self._state().dedup = value
+
+    @contextmanager
+    def _staging(self, fresh: bool = False):
+        """
+        Indeksni o'zgartiruvchi amallar yangi snapshot papkasida bajariladi.
+        Muvaffaqiyatli persist bo'lsa CURRENT atomar almashtiriladi; xizmat qilayotgan
+        snapshot va undagi so'rovlarga tegilmaydi. Ichma-ich chaqiruvlar bitta snapshotda.
+        """
+        staging = getattr(self._local, "staging", None)
+        if staging is not None:
+            yield staging
+            return
+
+        # Fon ishga tushirish tugamagan bo'lsa - joriy snapshot hali ochilmagan
+        self.wait_ready()
+        with self._build_lock:
+            name = self.snapshots.create(None if fresh else self.snapshot.path)
+            staging = self._open_snapshot(name)
+            self._local.staging = staging
             try:
-                with open(json_file, "r", encoding="utf-8") as f:
-                    law_data = json.load(f)
+                yield staging
+            except BaseException:
+                self.snapshots.discard(name)
+                raise
+            finally:
+                self._local.staging = None
 
-                # Document yaratish
-                content = law_data.get("content", "")
-                if not content or len(content) < 50:
-                    continue
+            if staging.persisted:
+                self._activate(staging)
+            else:
+                self.snapshots.discard(name)
+
+    def _activate(self, snapshot: IndexSnapshot):
+        """Snapshotni xizmatga qo'yish (bitta havola almashtiriladi - so'rovlar to'xtamaydi)"""
+        # BM25 va metadata indeksi shu (fon) oqimda o'qiladi - so'rovlar event loopda diskni kutmasin
+        self._get_bm25(snapshot)
+        if snapshot.vector_store is not None:
+            snapshot.vector_store._get_meta_index()
+        self.snapshots.activate(snapshot.name)
+        self.snapshot = snapshot
+        if snapshot.changed:
+            get_semantic_cache().bump_version("(indeks yangilandi)")
+        self.snapshots.prune()
+
+    def rollback_index(self, steps: int = 1) -> Optional[str]:
+        """Oldingi snapshotga qaytish (qayta qurishsiz). Qaytaradi: snapshot nomi yoki None"""
+        self.wait_ready()
+        with self._build_lock:
+            name = self.snapshots.previous(steps)
+            if name is None:
+                return None
+            snapshot = self._open_snapshot(name)
+            snapshot.changed = True
+            self._activate(snapshot)
+        logger.info(f"⏪ Indeks {name} snapshotiga qaytarildi")
+        return name
 
-                title = law_data.get("title", "Noma'lum")
-                law_id = law_data.get("id", "")
-                url = law_data.get("url", "")
-                category = json_file.parent.name
-
-                # Metadata
-                metadata = {
-                    "title": title,
-                    "law_id": law_id,
-                    "url": url,
-                    "category": category,
-                    "source": "lex.uz"
-                }
-
-                doc = Document(
-                    text=f"# {title}\n\n{content}",
-                    metadata=metadata,
-                    doc_id=f"law_{law_id}_{json_file.stem}"
+    def _collect_file_tasks(self) -> List[Tuple[str, Callable[..., List[Dict[str, Any]]], tuple]]:
+        """Yuklanadigan fayllar: (yo'l, yuklovchi funksiya, argumentlar)"""
+        tasks = []
+
+        # 1. JSON va PDF fayllar (scraper / qo'lda yuklangan)
+        if self.laws_path.exists():
+            for json_file in sorted(self.laws_path.rglob("*.json")):
+                tasks.append((str(json_file), load_json_law, (str(json_file),)))
+            for pdf_file in sorted(self.laws_path.rglob("*.pdf")):
+                tasks.append((str(pdf_file), load_pdf_law, (str(pdf_file),)))
+        else:
+            logger.warning(f"Qonunlar papkasi topilmadi: {self.laws_path}")
+
+        # 2. YHQ va MJtK - har bir modda/band alohida dokument
+        # (chunklar modda chegarasidan o'tmaydi, raqam metadatada saqlanadi)
+        article_index = get_article_index()
+        for law in LAW_FILES:
+            source = article_index.source_path(law)
+            if source is not None:
+                tasks.append((str(source), load_article_law, (law, str(source))))
+
+        # 3. data/qonunlar dagi boshqa .txt/.doc fayllar (umumiy yuklovchilar)
+        for path in select_directory_files(Path(QONUNLAR_PATH), article_index.covered_stems()):
+            tasks.append((str(path), load_text_law, (str(path),)))
+
+        return tasks
+
+    @staticmethod
+    def _file_signature(path: str) -> List[int]:
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    @staticmethod
+    def _iter_task_results(tasks: List[tuple]):
+        """
+        Fayllarni jarayonlar pulida parallel tahlil qilish.
+        Natijalar tayyor bo'lish tartibida qaytadi: (yo'l, dokumentlar yoki xatolikda None).
+        """
+        def run_sequential(pending):
+            for path, func, args in pending:
+                try:
+                    yield path, func(*args)
+                except Exception as e:
+                    logger.warning(f"Faylni o'qishda xatolik: {path} - {e}")
+                    yield path, None
+
+        total_bytes = sum(os.path.getsize(path) for path, _, _ in tasks)
+        if DOC_LOAD_WORKERS <= 1 or len(tasks) <= 1 or total_bytes < DOC_LOAD_PARALLEL_MIN_BYTES:
+            yield from run_sequential(tasks)
+            return
+
+        try:
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=min(DOC_LOAD_WORKERS, len(tasks)))
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"Jarayonlar puli ishga tushmadi, ketma-ket yuklanadi: {e}")
+            yield from run_sequential(tasks)
+            return
+
+        with pool:
+            futures = {pool.submit(func, *args): path for path, func, args in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                path = futures[future]
+                try:
+                    yield path, future.result()
+                except Exception as e:
+                    logger.warning(f"Faylni o'qishda xatolik: {path} - {e}")
+                    yield path, None
+
+    def iter_documents_from_files(self, only_paths: Optional[set] = None):
+        """
+        Qonun fayllaridan dokumentlarni oqim bilan qaytarish (fayl tayyor bo'lishi bilan).
+        only_paths berilsa, faqat shu fayllar o'qiladi.
+        Har bir o'qilgan fayl natijasi self.last_loaded_files ga yoziladi:
+        yo'l -> {"signature", "doc_ids"} (xatolik bo'lgan fayllar kirmaydi).
+        """
+        tasks = [task for task in self._collect_file_tasks() if only_paths is None or task[0] in only_paths]
+        self.last_loaded_files = {}
+
+        for path, items in self._iter_task_results(tasks):
+            if items is None:
+                continue
+            self.last_loaded_files[path] = {
+                "signature": self._file_signature(path),
+                "doc_ids": [item["doc_id"] for item in items]
+            }
+            for item in items:
+                # Yagona yozuv: kirill -> lotin, apostroflar bir xil (so'rovlar ham shunday normallashadi)
+                metadata = dict(item["metadata"], title=normalize_text(item["metadata"].get("title", "")))
+                yield Document(text=normalize_text(item["text"]), metadata=metadata, doc_id=item["doc_id"])
+
+    def load_documents_from_files(self) -> List[Document]:
+        """Qonun fayllaridan (JSON, PDF, TXT, DOC) dokumentlarni yuklash"""
+        start = time.perf_counter()
+        documents = self._strip_boilerplate(list(self.iter_documents_from_files()), learn=True)
+        logger.info(
+            f"📚 {len(documents)} ta dokument yuklandi "
+            f"({len(self.last_loaded_files)} ta fayl, {time.perf_counter() - start:.1f} s)"
+        )
+        return documents
+
+    def _strip_boilerplate(self, documents: List[Document], learn: bool = False) -> List[Document]:
+        """
+        Fayllar orasida takrorlanadigan qatorlarni olib tashlash.
+        learn=True: butun korpusdan (self.last_loaded_files bo'yicha) qayta o'rganiladi va saqlanadi;
+        aks holda oldin o'rganilgan ro'yxat ishlatiladi (inkremental yangilanishda).
+        """
+        boilerplate_path = self.index_path / BOILERPLATE_FILE
+        if learn:
+            texts_by_id = {doc.doc_id: doc.text for doc in documents}
+            learner = BoilerplateLearner()
+            learner.learn(
+                [texts_by_id[doc_id] for doc_id in info["doc_ids"] if doc_id in texts_by_id]
+                for info in self.last_loaded_files.values()
+            )
+            self.index_path.mkdir(parents=True, exist_ok=True)
+            learner.save(boilerplate_path)
+        else:
+            learner = BoilerplateLearner.load(boilerplate_path)
+
+        bytes_before = sum(len(doc.text.encode("utf-8")) for doc in documents)
+        removed_bytes = 0
+        for doc in documents:
+            text, removed = learner.strip(doc.text)
+            if removed:
+                doc.set_content(text)
+                removed_bytes += removed
+
+        self.last_cleanup_stats = {
+            "boilerplate_lines": len(learner.lines),
+            "boilerplate_bytes_removed": removed_bytes,
+            "bytes_before": bytes_before
+        }
+        if removed_bytes:
+            logger.info(
+                f"🧹 Boilerplate: {removed_bytes / 1024:.0f} KB olib tashlandi "
+                f"({removed_bytes / max(bytes_before, 1):.1%}, {len(learner.lines)} ta qator)"
+            )
+        return documents
+
+    def _load_file_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """fayl yo'li -> {"signature": [mtime_ns, hajm], "doc_ids": [...]}"""
+        if not self.file_manifest_path.exists():
+            return {}
+        try:
+            with open(self.file_manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Fayl manifestini o'qishda xatolik: {e}")
+            return {}
+
+    def _save_file_manifest(self, manifest: Dict[str, Dict[str, Any]]):
+        tmp_path = self.file_manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.file_manifest_path)
+
+    def update_index_from_files(self) -> Dict[str, Any]:
+        """
+        Fayllardan indeksni yangilash (yangi snapshotda, tayyor bo'lgach almashtiriladi).
+        mtime/hajmi o'zgarmagan fayllar o'qilmaydi; o'zgargan fayllar parallel
+        tahlil qilinadi, o'chirilgan fayllarning dokumentlari indeksdan olib tashlanadi.
+        """
+        with self._staging():
+            return self._update_index_from_files()
+
+    def _update_index_from_files(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = {"files_total": 0, "files_changed": 0, "files_removed": 0, "documents": 0, "success": False}
+
+        # Fayl manifesti yo'q (birinchi ishga tushish) - hammasi o'qiladi,
+        # index_documents dokument hashlari bo'yicha faqat o'zgarganlarini embed qiladi
+        file_manifest = self._load_file_manifest()
+        full_scan = (
+            self.vector_store is None
+            or not self.manifest_path.exists()
+            or not file_manifest
+        )
+
+        tasks = self._collect_file_tasks()
+        result["files_total"] = len(tasks)
+
+        if full_scan:
+            documents = self.load_documents_from_files()
+            result["files_changed"] = len(self.last_loaded_files)
+            result["documents"] = len(documents)
+            result["success"] = bool(documents) and self.index_documents(documents)
+            if result["success"]:
+                self._save_file_manifest(self.last_loaded_files)
+        else:
+            current = {path: self._file_signature(path) for path, _, _ in tasks}
+            changed = {
+                path for path, signature in current.items()
+                if file_manifest.get(path, {}).get("signature") != signature
+            }
+            removed = [path for path in file_manifest if path not in current]
+            result["files_changed"] = len(changed)
+            result["files_removed"] = len(removed)
+
+            if not changed and not removed:
+                logger.info("ℹ️ Qonun fayllari o'zgarmagan, yuklash o'tkazib yuborildi")
+                result["success"] = True
+            else:
+                documents = self._strip_boilerplate(
+                    list(self.iter_documents_from_files(only_paths=changed)) if changed else []
                 )
-                documents.append(doc)
+                result["documents"] = len(documents)
 
-            except Exception as e:
-                logger.warning(f"JSON o'qishda xatolik: {json_file} - {e}")
+                # O'zgargan fayldan yo'qolgan va o'chirilgan fayllardagi dokumentlar
+                new_ids = {doc.doc_id for doc in documents}
+                stale_ids = [
+                    doc_id
+                    for path in removed + [p for p in changed if p in self.last_loaded_files]
+                    for doc_id in file_manifest.get(path, {}).get("doc_ids", [])
+                    if doc_id not in new_ids
+                ]
+                self.remove_documents(stale_ids)
+                if documents:
+                    self.add_documents(documents)
+
+                for path in removed:
+                    file_manifest.pop(path, None)
+                file_manifest.update(self.last_loaded_files)
+                result["documents"] += self._reindex_dependents(file_manifest)
+                self._save_file_manifest(file_manifest)
+                result["success"] = True
+
+        result["seconds"] = round(time.perf_counter() - start, 2)
+        logger.info(
+            f"📂 Fayllar: {result['files_total']} ta, o'zgargan {result['files_changed']}, "
+            f"o'chirilgan {result['files_removed']}, dokumentlar {result['documents']} ({result['seconds']} s)"
+        )
+        return result
 
-        # 2. PDF fayllarni yuklash (pdfplumber yordamida)
-        for pdf_file in self.laws_path.rglob("*.pdf"):
+    def _reindex_dependents(self, file_manifest: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Asl dokumenti o'chirilgan near-duplicate dokumentlarni (fayllari o'zgarmagan bo'lsa ham)
+        qayta o'qib indekslash. Qaytaradi: qayta indekslangan dokumentlar soni.
+        """
+        reindexed = 0
+        while self.reindex_pending:
+            pending = set(self.reindex_pending)
+            paths = {
+                path for path, info in file_manifest.items()
+                if pending.intersection(info.get("doc_ids", []))
+            }
+            # Qayta o'qib bo'lmasa keyingi yangilanishda fayl o'zgargan deb o'qilsin
+            for path in paths:
+                file_manifest[path] = dict(file_manifest[path], signature=None)
+
+            documents = [
+                doc for doc in self._strip_boilerplate(list(self.iter_documents_from_files(only_paths=paths)))
+                if doc.doc_id in pending
+            ]
+            file_manifest.update(self.last_loaded_files)
+            # Fayllarda topilmaganlari (dokument fayldan yo'qolgan) qayta urinilmaydi;
+            # add_documents o'zi yangi bog'liqlarni qo'shishi mumkin - sikl shular uchun
+            self.reindex_pending -= pending
+            if documents:
+                self.add_documents(documents)
+                reindexed += len(documents)
+        return reindexed
+
+    @staticmethod
+    def _document_hash(doc: Document) -> str:
+        """Dokument matni va metadatasidan barqaror hash olish"""
+        payload = json.dumps(
+            {"text": doc.text, "metadata": doc.metadata},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load_manifest(self) -> Dict[str, str]:
+        """doc_id -> kontent hash manifestini yuklash"""
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Manifest o'qishda xatolik: {e}")
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, str]):
+        """Manifestni atomar saqlash (yarim yozilgan fayl qolmasligi uchun)"""
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _on_index_changed(self):
+        """
+        Indeks o'zgardi - eski indeks asosidagi keshlangan javoblar yaroqsiz.
+        Kesh snapshot faollashtirilganda tozalanadi (qurish vaqtida eski indeks hali xizmatda).
+        """
+        self._state().changed = True
+
+    def _get_bm25(self, snapshot: Optional[IndexSnapshot] = None) -> Optional["BM25Index"]:
+        """BM25 indeksini kerak bo'lganda yuklash (fayl bo'lmasa vektor bazasidagi chunklardan qurish)"""
+        snapshot = snapshot or self._state()
+        if snapshot.bm25 is None and snapshot.vector_store is not None:
+            bm25 = BM25Index.load(snapshot.path / BM25_FILE)
+            if bm25 is None:
+                bm25 = BM25Index()
+                for node in snapshot.vector_store.get_nodes():
+                    bm25.add(node.node_id, node.ref_doc_id, f"{node.metadata.get('title', '')}\n{node.text}")
+            snapshot.bm25 = bm25
+        return snapshot.bm25
+
+    def _get_dedup(self) -> Optional["NearDuplicateFilter"]:
+        """Chunk imzolari indeksi (fayl bo'lmasa vektor bazasidagi chunklardan qurish)"""
+        if self.dedup is None and self.vector_store is not None:
+            self.dedup = NearDuplicateFilter.load(self.index_path / SIMHASH_FILE)
+            if self.dedup is None:
+                self.dedup = NearDuplicateFilter()
+                self.dedup.add_nodes(self.vector_store.get_nodes())
+        return self.dedup
+
+    def _bm25_add(self, nodes: List[Any]):
+        if self.bm25 is None:
+            return
+        for node in nodes:
+            self.bm25.add(node.node_id, node.ref_doc_id, f"{node.metadata.get('title', '')}\n{node.text}")
+
+    def _delete_document(self, doc_id: str) -> Set[str]:
+        """
+        Dokument chunklarini vektor va BM25 indekslaridan o'chirish.
+        Qaytaradi: chunklari shu dokumentning dublikati deb tashlangan dokumentlar.
+        """
+        self.index.delete_ref_doc(doc_id, delete_from_docstore=True)
+        bm25 = self._get_bm25()
+        if bm25 is not None:
+            bm25.remove_ref_doc(doc_id)
+        dedup = self._get_dedup()
+        if dedup is None:
+            return set()
+        dedup.remove_ref_doc(doc_id)
+        return dedup.pop_dependents(doc_id)
+
+    def _delete_documents(self, doc_ids: List[str], manifest: Dict[str, str]) -> Set[str]:
+        """
+        Dokumentlarni indeksdan va manifestdan o'chirish. Ular tufayli near-duplicate chunklari
+        tashlab yuborilgan dokumentlar ham (to'liq emas) o'chiriladi va self.reindex_pending ga
+        qo'shiladi. Qaytaradi: shunday qayta indekslanadigan dokumentlar.
+        """
+        requested = set(doc_ids)
+        pending = list(doc_ids)
+        deleted: Set[str] = set()
+        while pending:
+            doc_id = pending.pop()
+            if doc_id in deleted:
+                continue
+            deleted.add(doc_id)
             try:
-                with pdfplumber.open(pdf_file) as pdf:
-                    text = ""
-                    for page in pdf.pages:
-                        text += page.extract_text() or ""
-                
-                if len(text) < 100:
-                    continue
-                
-                doc = Document(
-                    text=f"# {pdf_file.stem}\n\n{text}",
-                    metadata={
-                        "title": pdf_file.stem,
-                        "law_id": f"pdf_{pdf_file.stem}",
-                        "source": "manual_upload"
-                    },
-                    doc_id=f"pdf_{pdf_file.stem}"
-                )
-                documents.append(doc)
-                logger.info(f"📄 PDF yuklandi: {pdf_file.name}")
+                pending.extend(self._delete_document(doc_id))
             except Exception as e:
-                logger.warning(f"PDF o'qishda xatolik: {pdf_file} - {e}")
+                logger.warning(f"Dokumentni o'chirishda xatolik: {doc_id} - {e}")
+            manifest.pop(doc_id, None)
 
-        logger.info(f"📚 {len(documents)} ta dokument yuklandi")
-        return documents
+        dependents = deleted - requested
+        if dependents:
+            logger.info(f"🧹 Asli o'chirilgan {len(dependents)} ta dublikat dokument qayta indekslanadi")
+            self.reindex_pending |= dependents
+        return dependents
+
+    def _insert_nodes(self, nodes: List[Any]):
+        """Embed qilingan chunklarni vektor va BM25 indekslariga qo'shish"""
+        self._get_bm25()
+        self.index.insert_nodes(nodes)
+        self._bm25_add(nodes)
+
+    def _persist(self):
+        """Vektor bazasi va BM25 indeksini diskka yozish"""
+        self.index.storage_context.persist(persist_dir=str(self.index_path))
+        if self.bm25 is not None:
+            self.bm25.save(self.index_path / BM25_FILE)
+        if self.dedup is not None:
+            self.dedup.save(self.index_path / SIMHASH_FILE)
+        self._state().persisted = True
+
+    def _build_nodes(self, documents: List[Document]) -> List[Any]:
+        """Dokumentlarni chunklarga bo'lish va embedding pipeline orqali embed qilish"""
+        nodes = Settings.node_parser.get_nodes_from_documents(documents)
+
+        # Deyarli bir xil chunklar (indeksdagilar bilan ham) embed qilinmaydi
+        dedup_stats = {"chunks_removed": 0, "bytes_removed": 0}
+        dedup = self._get_dedup()
+        if dedup is not None:
+            nodes, dedup_stats = dedup.filter_nodes(nodes)
+            if dedup_stats["chunks_removed"]:
+                logger.info(
+                    f"🧹 Near-duplicate: {dedup_stats['chunks_removed']} ta chunk "
+                    f"({dedup_stats['bytes_removed'] / 1024:.0f} KB) tashlab yuborildi"
+                )
 
-    def index_documents(self, documents: List[Document]) -> bool:
-        """Dokumentlarni indekslash"""
+        embed_stats: Dict[str, Any] = {}
+        if nodes:
+            pipeline = EmbeddingPipeline.from_settings()
+            embed_stats = _run_sync(pipeline.embed_nodes(nodes))
+        self.last_ingest_stats = dict(embed_stats)
+        self.last_ingest_stats.update({
+            "near_duplicate_chunks_removed": dedup_stats["chunks_removed"],
+            "near_duplicate_bytes_removed": dedup_stats["bytes_removed"],
+            **self.last_cleanup_stats
+        })
+        return nodes
+
+    def index_documents(self, documents: List[Document], incremental: bool = True) -> bool:
+        """
+        Dokumentlarni indekslash (yangi snapshotda).
+        incremental=True bo'lsa, faqat hashi o'zgargan dokumentlar qayta
+        embed qilinadi, yo'qolganlari indeksdan o'chiriladi.
+        """
+        with self._staging(fresh=not incremental):
+            return self._index_documents(documents, incremental)
+
+    def _index_documents(self, documents: List[Document], incremental: bool) -> bool:
         if not self.is_initialized or not LLAMAINDEX_AVAILABLE:
             logger.error("RAG Engine ishga tushirilmagan")
             return False
@@ -193,17 +1080,32 @@ class RAGEngine:
             logger.warning("Indekslash uchun dokument yo'q")
             return False
 
+        # Manifest yoki binar baza bo'lmasa (eski indeks) - to'liq qayta qurish
+        if incremental and self.vector_store is not None and self.manifest_path.exists():
+            return self._sync_documents(documents)
+
         try:
             logger.info(f"📊 {len(documents)} ta dokument indekslanmoqda...")
 
-            # Yangi indeks yaratish
-            self.index = VectorStoreIndex.from_documents(
-                documents,
-                show_progress=True
+            # Yangi indeks yaratish (toza binar vektor bazasida)
+            vector_store = MmapVectorStore(
+                persist_dir=str(self.index_path), dtype=VECTOR_DTYPE, rescore_factor=VECTOR_RESCORE_FACTOR,
+                **ANN_SETTINGS
             )
-            
+            storage_context = StorageContext.from_defaults(vector_store=vector_store)
+            self.dedup = NearDuplicateFilter()
+            nodes = self._build_nodes(documents)
+            self.index = VectorStoreIndex(nodes=nodes, storage_context=storage_context)
+            self.vector_store = vector_store
+
+            # Kalit so'z indeksi ham shu chunklardan quriladi
+            self.bm25 = BM25Index()
+            self._bm25_add(nodes)
+
             # Indeksni saqlash
-            self.index.storage_context.persist(persist_dir=str(self.index_path))
+            self._persist()
+            self._save_manifest({doc.doc_id: self._document_hash(doc) for doc in documents})
+            self._on_index_changed()
 
             logger.info(f"✅ Indekslash tugadi!")
             return True
@@ -212,20 +1114,99 @@ class RAGEngine:
             logger.error(f"❌ Indekslash xatolik: {e}")
             return False
 
+    def _sync_documents(self, documents: List[Document]) -> bool:
+        """Indeksni dokumentlar ro'yxati bilan farqi bo'yicha moslashtirish"""
+        try:
+            manifest = self._load_manifest()
+            current = {doc.doc_id: self._document_hash(doc) for doc in documents}
+
+            removed = [doc_id for doc_id in manifest if doc_id not in current]
+            changed = [doc for doc in documents if manifest.get(doc.doc_id) != current[doc.doc_id]]
+
+            if not removed and not changed:
+                logger.info("ℹ️ Indeksda o'zgarish yo'q, embedding chaqirilmadi")
+                return True
+
+            # Eski versiyalarni o'chirish (o'zgargan va yo'qolgan dokumentlar)
+            dependents = self._delete_documents(
+                removed + [doc.doc_id for doc in changed if doc.doc_id in manifest], manifest
+            )
+            # Asli o'chgan dublikatlar ham qayta embed qilinadi (hamma dokumentlar shu yerda)
+            changed_ids = {doc.doc_id for doc in changed}
+            changed += [doc for doc in documents if doc.doc_id in dependents and doc.doc_id not in changed_ids]
+            self.reindex_pending -= {doc.doc_id for doc in changed}
+
+            self._insert_nodes(self._build_nodes(changed))
+            for doc in changed:
+                manifest[doc.doc_id] = current[doc.doc_id]
+
+            self._persist()
+            self._save_manifest(manifest)
+            self._on_index_changed()
+
+            logger.info(
+                f"✅ Inkremental indekslash: {len(changed)} ta yangilandi/qo'shildi, "
+                f"{len(removed)} ta o'chirildi, {len(documents) - len(changed)} ta o'zgarmagan"
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Inkremental indekslash xatolik: {e}")
+            return False
+
+    def remove_documents(self, doc_ids: List[str]) -> int:
+        """Dokumentlarni indeksdan va manifestdan o'chirish (yangi snapshotda)"""
+        if not self.index or not doc_ids:
+            return 0
+        with self._staging():
+            return self._remove_documents(doc_ids)
+
+    def _remove_documents(self, doc_ids: List[str]) -> int:
+
+        manifest = self._load_manifest()
+        self._delete_documents(doc_ids, manifest)
+        removed = len(doc_ids)
+
+        self._persist()
+        if self.manifest_path.exists():
+            self._save_manifest(manifest)
+        self._on_index_changed()
+        logger.info(f"🗑 {removed} ta dokument indeksdan o'chirildi")
+        return removed
+
     def add_documents(self, documents: List[Document]) -> int:
-        """Mavjud indeksga yangi dokumentlar qo'shish"""
+        """Mavjud indeksga yangi dokumentlar qo'shish (yangi snapshotda)"""
         if not self.index:
             return self.index_documents(documents)
+        with self._staging():
+            return self._add_documents(documents)
 
+    def _add_documents(self, documents: List[Document]) -> int:
         try:
-            added = 0
+            manifest = self._load_manifest()
+            new_docs = []
             for doc in documents:
-                self.index.insert(doc)
-                added += 1
-            
+                doc_hash = self._document_hash(doc)
+                if manifest.get(doc.doc_id) == doc_hash:
+                    continue
+                if doc.doc_id in manifest:
+                    self._delete_documents([doc.doc_id], manifest)
+                new_docs.append(doc)
+                manifest[doc.doc_id] = doc_hash
+            self.reindex_pending -= {doc.doc_id for doc in new_docs}
+
+            if new_docs:
+                self._insert_nodes(self._build_nodes(new_docs))
+            added = len(new_docs)
+
             # Indeksni saqlash
-            self.index.storage_context.persist(persist_dir=str(self.index_path))
-            
+            self._persist()
+            # Manifestsiz (eski) indeksda qisman manifest yozilmaydi
+            if self.manifest_path.exists():
+                self._save_manifest(manifest)
+            if added:
+                self._on_index_changed()
+
             logger.info(f"✅ {added} ta yangi dokument qo'shildi")
             return added
 
@@ -233,9 +1214,16 @@ class RAGEngine:
             logger.error(f"❌ Dokument qo'shishda xatolik: {e}")
             return 0
 
-    async def query(self, question: str, top_k: int = 5) -> Dict[str, Any]:
-        """Savolga javob berish"""
-        if not self.index or not self.is_initialized:
+    async def query(self, question: str, top_k: int = 5, timeout: Optional[float] = None,
+                    filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Savolga javob berish (to'liq asinxron - event loop bloklanmaydi).
+        filters - metadata filtrlari (metadata_index.build_filters formatida).
+        Bir vaqtdagi so'rovlar RAG_MAX_CONCURRENCY bilan cheklanadi;
+        task bekor qilinsa (foydalanuvchi kutmasa), so'rov ham to'xtaydi.
+        """
+        snapshot = self.snapshot
+        if not snapshot.index or not self.is_initialized:
             return {
                 "answer": "⚠️ RAG tizimi hali ishga tushmagan. Iltimos, /update_laws buyrug'ini ishlating.",
                 "sources": [],
@@ -244,13 +1232,18 @@ class RAGEngine:
 
         try:
             # Query engine yaratish
-            query_engine = self.index.as_query_engine(
+            query_engine = snapshot.index.as_query_engine(
                 similarity_top_k=top_k,
-                response_mode="compact"
+                response_mode="compact",
+                filters=build_filters(filters)
             )
 
             # Javob olish
-            response = query_engine.query(question)
+            async with self._query_semaphore:
+                response = await asyncio.wait_for(
+                    query_engine.aquery(normalize_text(question)),
+                    timeout=timeout or self.query_timeout
+                )
 
             # Manbalarni olish
             sources = []
@@ -261,6 +1254,8 @@ class RAGEngine:
                         "title": metadata.get("title", "Noma'lum"),
                         "url": metadata.get("url", ""),
                         "category": metadata.get("category", ""),
+                        "law": metadata.get("law", ""),
+                        "article": metadata.get("article", ""),
                         "score": round(node.score, 3) if hasattr(node, 'score') and node.score else None
                     })
 
@@ -270,6 +1265,13 @@ class RAGEngine:
                 "success": True
             }
 
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱ RAG so'rovi vaqti tugadi: {question[:50]}")
+            return {
+                "answer": "⚠️ RAG javob berish vaqti tugadi.",
+                "sources": [],
+                "success": False
+            }
         except Exception as e:
             logger.error(f"❌ Query xatolik: {e}")
             return {
@@ -278,38 +1280,202 @@ class RAGEngine:
                 "success": False
             }
 
-    def search_laws(self, keyword: str, limit: int = 10) -> List[Dict]:
-        """Kalit so'z bo'yicha qonunlarni qidirish"""
-        if not self.index:
+    async def embed_query(self, text: str) -> Optional[List[float]]:
+        """Savol embeddingi (semantik kesh uchun; embedding keshidan o'tadi)"""
+        if not self.is_initialized or not LLAMAINDEX_AVAILABLE:
+            return None
+        try:
+            return await Settings.embed_model.aget_query_embedding(normalize_text(text))
+        except Exception as e:
+            logger.warning(f"Savol embeddingida xatolik: {e}")
+            return None
+
+    @staticmethod
+    def _format_search_results(nodes) -> List[Dict]:
+        """Retriever natijalarini /search_law formatiga o'tkazish"""
+        results = []
+        for node in nodes:
+            metadata = node.node.metadata
+            results.append({
+                "title": metadata.get("title", "Noma'lum"),
+                "url": metadata.get("url", ""),
+                "category": metadata.get("category", ""),
+                "law": metadata.get("law", ""),
+                "article": metadata.get("article", ""),
+                "snippet": node.node.text[:300] + "...",
+                "score": round(node.score, 3) if hasattr(node, 'score') and node.score else None
+            })
+        return results
+
+    def _keyword_nodes(self, snapshot: IndexSnapshot, keyword: str, limit: int,
+                       metadata_filters=None) -> List[Any]:
+        """BM25 natijalari (tarmoq chaqiruvisiz) NodeWithScore ko'rinishida"""
+        bm25 = self._get_bm25(snapshot)
+        if bm25 is None:
             return []
+        allowed = snapshot.vector_store.filter_node_ids(metadata_filters) if metadata_filters else None
+        hits = bm25.search(keyword, top_k=limit, allowed=allowed)
+        nodes = snapshot.vector_store.get_nodes([node_id for node_id, _, _ in hits])
+        scores = {node_id: score for node_id, score, _ in hits}
+        return [NodeWithScore(node=node, score=scores[node.node_id]) for node in nodes]
+
+    def _is_exact_keyword_match(self, keyword: str, keyword_nodes: List[Any]) -> bool:
+        """
+        Qisqa kalit so'z (<= 3 token) va barcha tokenlar eng yaxshi chunkda topilgan bo'lsa,
+        vektor qidiruv (embedding chaqiruvi) kerak emas.
+        """
+        terms = set(tokenize(keyword))
+        if not keyword_nodes or not terms or len(terms) > 3:
+            return False
+        top = keyword_nodes[0].node
+        return terms <= set(tokenize(f"{top.metadata.get('title', '')}\n{top.text}"))
+
+    @staticmethod
+    def _fuse(keyword_nodes: List[Any], vector_nodes: List[Any], limit: int) -> List[Any]:
+        """BM25 va vektor natijalarini reciprocal rank fusion bilan birlashtirish"""
+        nodes_by_id = {n.node.node_id: n.node for n in keyword_nodes + vector_nodes}
+        fused = reciprocal_rank_fusion([
+            [n.node.node_id for n in keyword_nodes],
+            [n.node.node_id for n in vector_nodes]
+        ])
+        return [NodeWithScore(node=nodes_by_id[node_id], score=score) for node_id, score in fused[:limit]]
 
+    def search_laws(self, keyword: str, limit: int = 10, mode: str = "hybrid",
+                    filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Kalit so'z bo'yicha qonunlarni qidirish (sinxron koddan, asearch_laws ustida).
+        mode: "hybrid" (BM25 + vektor, RRF), "keyword" (faqat BM25) yoki "vector".
+        filters: {"category", "law_id", "source", "version", "date_from", "date_to"} -
+        faqat mos chunklar skorlanadi.
+        """
+        return _run_sync(self.asearch_laws(keyword, limit, mode=mode, filters=filters))
+
+    async def _aretrieve_nodes(self, snapshot: IndexSnapshot, keyword: str, limit: int,
+                               timeout: Optional[float] = None, mode: str = "hybrid",
+                               filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Hybrid/keyword/vector qidiruv natijalari (NodeWithScore, reyting bo'yicha)"""
+        metadata_filters = build_filters(filters)
+        if mode != "vector" and snapshot.bm25 is None:
+            # BM25 hali diskdan o'qilmagan - event loop bloklanmasin
+            await asyncio.to_thread(self._get_bm25, snapshot)
+        keyword_nodes = (
+            self._keyword_nodes(snapshot, keyword, limit, metadata_filters) if mode != "vector" else []
+        )
+        if mode == "keyword" or self._is_exact_keyword_match(keyword, keyword_nodes):
+            return keyword_nodes[:limit]
+
+        retriever = snapshot.index.as_retriever(similarity_top_k=limit, filters=metadata_filters)
         try:
-            retriever = self.index.as_retriever(similarity_top_k=limit)
-            nodes = retriever.retrieve(keyword)
-
-            results = []
-            for node in nodes:
-                metadata = node.node.metadata
-                results.append({
-                    "title": metadata.get("title", "Noma'lum"),
-                    "url": metadata.get("url", ""),
-                    "category": metadata.get("category", ""),
-                    "snippet": node.node.text[:300] + "...",
-                    "score": round(node.score, 3) if hasattr(node, 'score') and node.score else None
-                })
-
-            return results
+            async with self._query_semaphore:
+                vector_nodes = await asyncio.wait_for(
+                    retriever.aretrieve(keyword),
+                    timeout=timeout or self.query_timeout
+                )
+        except (asyncio.TimeoutError, Exception) as e:
+            if not keyword_nodes:
+                raise
+            logger.warning(f"Vektor qidiruv ishlamadi, BM25 natijalari qaytarildi: {e}")
+            return keyword_nodes[:limit]
+
+        if mode == "vector":
+            return vector_nodes
+        return self._fuse(keyword_nodes, vector_nodes, limit)
 
+    async def asearch_laws(self, keyword: str, limit: int = 10, timeout: Optional[float] = None,
+                           mode: str = "hybrid", filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Kalit so'z bo'yicha qidirish (asinxron, handlerlar uchun)"""
+        snapshot = self.snapshot
+        if not snapshot.index:
+            return []
+
+        keyword = normalize_text(keyword)
+        try:
+            nodes = await self._aretrieve_nodes(snapshot, keyword, limit, timeout, mode, filters)
+            return self._format_search_results(nodes)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱ Qidiruv vaqti tugadi: {keyword[:50]}")
+            return []
         except Exception as e:
             logger.error(f"Qidirishda xatolik: {e}")
             return []
 
+    async def retrieve_context(self, question: str, top_k: int = RAG_CONTEXT_TOP_K,
+                               max_tokens: int = RAG_CONTEXT_MAX_TOKENS,
+                               timeout: Optional[float] = None,
+                               filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Faqat qidiruv (LLM chaqiruvisiz): savolga eng mos chunklar metadata bilan,
+        reyting tartibida va max_tokens byudjeti ichida (filters - metadata filtrlari).
+        Javobni chaqiruvchi o'zi bitta LLM so'rovi bilan yaratadi.
+        Qidiruv "rag_retrieval" breakeri orqali: u ochiq bo'lsa timeout kutilmaydi
+        (javob kontekstsiz yaratiladi).
+        """
+        snapshot = self.snapshot
+        if not snapshot.index or not self.is_initialized:
+            return {"chunks": [], "tokens": 0, "success": False}
+
+        breaker = self.retrieval_breaker
+        if not breaker.allow():
+            return {"chunks": [], "tokens": 0, "success": False}
+
+        start = time.perf_counter()
+        try:
+            nodes = await self._aretrieve_nodes(
+                snapshot, normalize_text(question), top_k, timeout, filters=filters
+            )
+        except asyncio.TimeoutError:
+            breaker.record_failure("timeout", time.perf_counter() - start)
+            logger.warning(f"⏱ Kontekst qidiruvi vaqti tugadi: {question[:50]}")
+            return {"chunks": [], "tokens": 0, "success": False}
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            breaker.record_failure(e, time.perf_counter() - start)
+            logger.error(f"❌ Kontekst qidiruvida xatolik: {e}")
+            return {"chunks": [], "tokens": 0, "success": False}
+        breaker.record_success(time.perf_counter() - start)
+
+        chunks, used_tokens = [], 0
+        for node in nodes:
+            text = node.node.get_content().strip()
+            tokens = EmbeddingPipeline.estimate_tokens(text)
+            # Byudjetga sig'maydigan chunk o'tkazib yuboriladi (keyingi qisqaroq chunk sig'ishi mumkin)
+            if used_tokens + tokens > max_tokens:
+                continue
+            metadata = node.node.metadata
+            chunks.append({
+                "text": text,
+                "title": metadata.get("title", "Noma'lum"),
+                "url": metadata.get("url", ""),
+                "category": metadata.get("category", ""),
+                "article": metadata.get("article", ""),
+                "score": round(node.score, 3) if node.score else None,
+                "tokens": tokens
+            })
+            used_tokens += tokens
+
+        return {"chunks": chunks, "tokens": used_tokens, "success": bool(chunks)}
+
+    @staticmethod
+    def format_context(chunks: List[Dict[str, Any]]) -> str:
+        """retrieve_context chunklarini prompt uchun matnga aylantirish"""
+        parts = []
+        for i, chunk in enumerate(chunks, 1):
+            header = f"[{i}] {chunk['title']}"
+            if chunk.get("url"):
+                header += f" ({chunk['url']})"
+            parts.append(f"{header}\n{chunk['text']}")
+        return "\n\n".join(parts)
+
     def get_stats(self) -> Dict[str, Any]:
         """RAG tizimi statistikasi"""
         try:
             # Indeks hajmini aniqlash
             chunk_count = 0
-            if self.index:
+            if self.vector_store is not None:
+                chunk_count = self.vector_store.count
+            elif self.index:
                 try:
                     chunk_count = len(self.index.docstore.docs)
                 except:
@@ -317,10 +1483,20 @@ class RAGEngine:
             
             return {
                 "is_initialized": self.is_initialized,
+                "readiness": self.get_readiness(),
                 "total_chunks": chunk_count,
                 "vector_store_path": str(self.index_path),
-                "embedding_model": "text-embedding-3-small",
-                "llm_model": "gpt-4o-mini"
+                "snapshot": self.snapshot.name,
+                "snapshots": self.snapshots.list(),
+                "vector_dtype": self.vector_store.dtype if self.vector_store is not None else None,
+                "vector_mb": round(self.vector_store.nbytes / 1024 / 1024, 2) if self.vector_store is not None else None,
+                "ann": self.vector_store._use_ann() if self.vector_store is not None else False,
+                "embedding_model": Settings.embed_model.model_name if self.is_initialized else None,
+                "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache else None,
+                "last_ingest": self.last_ingest_stats,
+                "bm25_chunks": len(self.bm25) if self.bm25 is not None else None,
+                "simhash_chunks": len(self.dedup) if self.dedup is not None else None,
+                "llm_model": Settings.llm.metadata.model_name if self.is_initialized else None
             }
         except:
             return {
@@ -329,13 +1505,11 @@ class RAGEngine:
             }
 
     def clear_index(self) -> bool:
-        """Indeksni tozalash"""
+        """Indeksni tozalash (bo'sh snapshot faollashtiriladi, eskisi rollback uchun qoladi)"""
         try:
-            import shutil
-            if self.index_path.exists():
-                shutil.rmtree(self.index_path)
-            self.index_path.mkdir(parents=True, exist_ok=True)
-            self.index = None
+            with self._staging(fresh=True) as staging:
+                staging.persisted = True
+                staging.changed = True
             logger.info("✅ Indeks tozalandi")
             return True
         except Exception as e:
@@ -345,31 +1519,43 @@ class RAGEngine:
 
 # Singleton instance
 _rag_engine = None
+_rag_engine_lock = threading.Lock()
 
 
-def get_rag_engine() -> RAGEngine:
-    """RAG Engine singleton"""
+def get_rag_engine(background: bool = False) -> RAGEngine:
+    """
+    RAG Engine singleton.
+    background=True bo'lsa darhol qaytadi, indeks fonda yuklanadi (is_ready / get_readiness).
+    """
     global _rag_engine
-    if _rag_engine is None:
-        _rag_engine = RAGEngine()
+    with _rag_engine_lock:
+        if _rag_engine is None:
+            _rag_engine = RAGEngine(background=background)
     return _rag_engine
 
 
+def start_rag_warm_up() -> RAGEngine:
+    """Bot ishga tushganda chaqiriladi: singleton yaratiladi, indeks fon threadida yuklanadi"""
+    return get_rag_engine(background=True)
+
+
 # Test uchun
 async def main():
     engine = get_rag_engine()
     print(f"Stats: {engine.get_stats()}")
     
     # Hujjatlarni yuklash va indekslash
-    docs = engine.load_documents_from_files()
-    if docs:
-        engine.index_documents(docs)
+    engine.update_index_from_files()
     
     # Test query
     result = await engine.query("YHQ 12.1-bandi nima haqida?")
     print(f"Javob: {result['answer']}")
     print(f"Manbalar: {result['sources']}")
 
+    # Faqat kontekst (LLM chaqiruvisiz)
+    context = await engine.retrieve_context("YHQ 12.1-bandi nima haqida?")
+    print(f"Kontekst: {len(context['chunks'])} ta chunk, {context['tokens']} token")
+
 
 if __name__ == "__main__":
     asyncio.run(main())
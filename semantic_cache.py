@@ -0,0 +1,174 @@
+"""
+🧠 SEMANTIK JAVOB KESHI
+========================
+get_ai_response oldidagi kesh qatlami.
+
+Savol embeddingi va yakuniy javob saqlanadi. Yangi savolning cosine
+o'xshashligi chegaradan oshsa, LLM chaqirilmasdan keshdagi javob qaytariladi.
+
+- Kesh foydalanuvchilar orasida umumiy (ataylab): kalit - normallashtirilgan savol
+  matni, foydalanuvchi emas. Keshlanadigan javoblar faqat qonun matnlariga asoslanadi,
+  shaxsiy ma'lumot saqlamaydi (arizalar keshlanmaydi, balans matni keshdan keyin
+  qo'shiladi) - bir xil savolga kim so'rashidan qat'i nazar bir xil javob to'g'ri
+- LRU + TTL bo'yicha tozalash
+- Qonun/indeks versiyasi o'zgarganda (bump_version) butun kesh bekor qilinadi
+- Hit/miss statistikasi
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from transliteration import normalize_text
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "500"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "86400"))  # 24 soat
+
+
+def normalize_question(question: str) -> str:
+    """Aynan bir xil savollarni embeddingsiz topish uchun kalit"""
+    return " ".join(normalize_text(question).lower().split()).strip(" ?!.")
+
+
+class SemanticAnswerCache:
+    """Savol embeddingi bo'yicha javoblarni keshlash"""
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_SIZE,
+        ttl_seconds: int = SEMANTIC_CACHE_TTL
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 1
+
+        # kalit -> {"vector", "answer", "version", "created"}; tartib = LRU
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ================= ICHKI =================
+
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return entry["version"] != self.version or now - entry["created"] > self.ttl_seconds
+
+    def _purge_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if self._is_expired(entry, now)]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _get_matrix(self) -> Optional[np.ndarray]:
+        """Barcha saqlangan savol vektorlari (kerak bo'lganda qayta quriladi)"""
+        if self._matrix is None and self._entries:
+            self._matrix_keys = list(self._entries.keys())
+            self._matrix = np.vstack([self._entries[key]["vector"] for key in self._matrix_keys])
+        return self._matrix
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # ================= API =================
+
+    def lookup_exact(self, question: str) -> Optional[str]:
+        """Matni aynan mos savol (embedding chaqiruvisiz)"""
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry, time.time()):
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.exact_hits += 1
+            return entry["answer"]
+
+    def lookup(self, embedding: List[float]) -> Optional[str]:
+        """Eng o'xshash savolning javobi (o'xshashlik chegaradan past bo'lsa None)"""
+        with self._lock:
+            self._purge_expired(time.time())
+            matrix = self._get_matrix()
+            if matrix is None:
+                self.misses += 1
+                return None
+
+            scores = matrix @ self._unit(embedding)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = self._matrix_keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            logger.info(f"🎯 Semantik kesh: o'xshashlik {scores[best]:.3f}")
+            return self._entries[key]["answer"]
+
+    def store(self, question: str, embedding: List[float], answer: str):
+        """Yangi javobni keshga qo'shish (LRU bo'yicha eskilari chiqariladi)"""
+        key = normalize_question(question)
+        with self._lock:
+            self._entries[key] = {
+                "vector": self._unit(embedding),
+                "answer": answer,
+                "version": self.version,
+                "created": time.time()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def bump_version(self, reason: str = ""):
+        """Qonunlar/indeks yangilandi - eski javoblar endi yaroqsiz"""
+        with self._lock:
+            self.version += 1
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._matrix = None
+        logger.info(f"♻️ Semantik kesh tozalandi (v{self.version}, {dropped} ta javob) {reason}".strip())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Kesh statistikasi"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "version": self.version,
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+
+# Singleton instance
+_semantic_cache = None
+
+
+def get_semantic_cache() -> SemanticAnswerCache:
+    """Semantik kesh singleton"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticAnswerCache()
+    return _semantic_cache
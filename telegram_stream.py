@@ -0,0 +1,142 @@
+"""
+📡 JAVOBNI OQIM BILAN KO'RSATISH
+=================================
+LLM javobi tayyor bo'lishini kutmasdan "⏳ Javob tayyorlanmoqda..." xabarini
+kelgan matn bilan edit_text orqali yangilash.
+
+- Tahrirlar throttling bilan: xabar STREAM_EDIT_INTERVAL soniyada ko'pi bilan bir marta
+  (Telegram bitta chatda tez-tez tahrirlashni 429 bilan cheklaydi), RetryAfter hurmat qilinadi
+- Oraliq matnlar parse_mode'siz yuboriladi (yarim HTML teglar xato bermasligi uchun)
+- StreamSink: poygadagi bir nechta provayderdan faqat bittasi xabarga yoziladi
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Optional
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.5"))
+# Shundan kam yangi belgi kelgan bo'lsa oraliq tahrir qilinmaydi
+STREAM_MIN_DELTA_CHARS = int(os.getenv("STREAM_MIN_DELTA_CHARS", "30"))
+TELEGRAM_MAX_CHARS = 4096
+STREAM_SUFFIX = "\n\n⏳ ..."
+
+
+class ThrottledEditor:
+    """Bitta Telegram xabarini oqim matni bilan cheklangan tezlikda tahrirlash"""
+
+    def __init__(self, message, interval: float = STREAM_EDIT_INTERVAL,
+                 min_delta: int = STREAM_MIN_DELTA_CHARS):
+        self.message = message
+        self.interval = interval
+        self.min_delta = min_delta
+        self.edits = 0
+        self._text = ""
+        self._shown = ""
+        self._next_edit_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def update(self, text: str):
+        """Provayder callbacki (sinxron): eng oxirgi jami matn; tahrir fonda bajariladi"""
+        if self._closed:
+            return
+        self._text = text
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+    @staticmethod
+    def _render(text: str) -> str:
+        limit = TELEGRAM_MAX_CHARS - len(STREAM_SUFFIX)
+        if len(text) > limit:
+            text = text[:limit - 1] + "…"
+        return text + STREAM_SUFFIX
+
+    async def _edit(self, text: str, **kwargs: Any):
+        """edit_text; 429 bo'lsa ko'rsatilgan vaqt kutib qayta urinadi"""
+        while True:
+            try:
+                await self.message.edit_text(text, **kwargs)
+                self.edits += 1
+                return
+            except TelegramRetryAfter as e:
+                logger.info(f"📡 Telegram tahrir limiti: {e.retry_after} s kutiladi")
+                await asyncio.sleep(e.retry_after)
+            finally:
+                self._next_edit_at = time.monotonic() + self.interval
+
+    async def _flush(self):
+        while not self._closed:
+            wait = self._next_edit_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            text = self._text
+            if len(text) - len(self._shown) < self.min_delta:
+                return
+            try:
+                await self._edit(self._render(text), parse_mode=None, disable_web_page_preview=True)
+            except TelegramBadRequest as e:
+                logger.debug(f"Oraliq tahrir o'tkazib yuborildi: {e}")
+            self._shown = text
+
+    async def finish(self, text: str, **kwargs: Any) -> bool:
+        """
+        Yakuniy matn bilan tahrirlash. Qaytaradi: False - tahrirlab bo'lmadi
+        (juda uzun yoki xatolik), chaqiruvchi oddiy xabar yuborishi kerak.
+        """
+        await self.close()
+        if len(text) > TELEGRAM_MAX_CHARS:
+            return False
+        wait = self._next_edit_at - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            await self._edit(text, **kwargs)
+            return True
+        except TelegramBadRequest:
+            # Masalan LLM matnidagi "<" HTML sifatida o'qilmadi - formatlashsiz
+            try:
+                await self._edit(text, **{**kwargs, "parse_mode": None})
+                return True
+            except TelegramBadRequest as e:
+                logger.warning(f"Yakuniy tahrir xatolik: {e}")
+                return False
+
+    async def close(self):
+        """Oraliq tahrirlarni to'xtatish (bekor qilish yoki yakunlashdan oldin)"""
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+class StreamSink:
+    """
+    Poygada parallel ishlayotgan provayderlardan faqat birinchi matn bergani xabarga yoziladi.
+    U yutqazsa (xato/qoniqarsiz javob) xabar keyingi matn bergan provayderga o'tadi.
+    """
+
+    def __init__(self, on_text: Callable[[str], None]):
+        self.on_text = on_text
+        self.owner: Optional[str] = None
+
+    def writer(self, name: str) -> Callable[[str], None]:
+        def write(text: str):
+            if self.owner is None:
+                self.owner = name
+            if self.owner == name:
+                self.on_text(text)
+        return write
+
+    def release(self, name: str):
+        if self.owner == name:
+            self.owner = None
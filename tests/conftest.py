@@ -0,0 +1,79 @@
+"""
+Testlar uchun umumiy sozlamalar.
+
+Testlar tarmoqsiz ishlaydi: embedding - hashing, LLM - extractive (local_providers.py).
+Env modullar import qilinishidan oldin o'rnatiladi (konstantalar modul yuklanganda o'qiladi).
+"""
+
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_TMP = Path(tempfile.mkdtemp(prefix="avto_yurist_tests_"))
+(_TMP / "qonunlar").mkdir()
+atexit.register(shutil.rmtree, _TMP, True)
+os.environ.update(
+    RAG_EMBED_PROVIDER="hashing",
+    RAG_LLM_PROVIDER="extractive",
+    # YHQ/MJtK manbalari yo'q - faqat test qonunlari indekslanadi
+    QONUNLAR_PATH=str(_TMP / "qonunlar"),
+    CHROMA_DB_PATH=str(_TMP / "chroma_db"),
+    LAWS_DATA_PATH=str(_TMP / "laws"),
+)
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+# Indekslanadigan qonunlar (data/laws/recent dan)
+LAW_IDS = ["7984693", "7985236", "7985737"]
+
+
+def law_doc_id(law_id: str) -> str:
+    return f"law_{law_id}_{law_id}"
+
+
+@pytest.fixture
+def laws_dir(tmp_path):
+    """Qonun JSON fayllari nusxasi (test ularni o'zgartirishi/o'chirishi mumkin)"""
+    recent = tmp_path / "laws" / "recent"
+    recent.mkdir(parents=True)
+    for law_id in LAW_IDS:
+        shutil.copy(ROOT / "data" / "laws" / "recent" / f"{law_id}.json", recent)
+    return recent
+
+
+@pytest.fixture
+def engine(tmp_path, laws_dir, monkeypatch):
+    """Bo'sh vaqtinchalik indeksli RAGEngine (hali yuklanmagan)"""
+    import rag_engine
+
+    monkeypatch.setattr(rag_engine, "INDEX_PATH", str(tmp_path / "chroma_db"))
+    monkeypatch.setattr(rag_engine, "LAWS_DATA_PATH", str(laws_dir.parent))
+    return rag_engine.RAGEngine()
+
+
+def chunk_counts(engine) -> dict:
+    """doc_id -> vektor bazasidagi chunklar soni"""
+    counts: dict = {}
+    for node in engine.vector_store.get_nodes():
+        counts[node.ref_doc_id] = counts.get(node.ref_doc_id, 0) + 1
+    return counts
+
+
+def write_law(laws_dir: Path, law_id: str, content: str, title: str = "Test qonun") -> Path:
+    path = laws_dir / f"{law_id}.json"
+    path.write_text(json.dumps({
+        "id": law_id,
+        "title": title,
+        "content": content,
+        "url": f"https://lex.uz/uz/docs/{law_id}",
+        "meta": {},
+    }, ensure_ascii=False), encoding="utf-8")
+    return path
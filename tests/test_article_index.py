@@ -0,0 +1,60 @@
+"""Modda/band indeksi: savoldagi havolalar va LLM siz javoblar (data/qonunlar dagi YHQ va MJtK)"""
+
+import pytest
+
+from article_index import ArticleIndex
+from conftest import ROOT
+
+
+@pytest.fixture(scope="module")
+def index():
+    index = ArticleIndex(str(ROOT / "data" / "qonunlar"))
+    index.load()
+    return index
+
+
+@pytest.mark.parametrize("question, references", [
+    ("YHQ 12.1-bandi nima haqida?", [("YHQ", "band", "12.1")]),
+    ("MJtK 128-modda", [("MJtK", "modda", "128")]),
+    ("128¹-modda", [("MJtK", "modda", "128-1")]),
+    ("статья 128-5 КоАП", [("MJtK", "modda", "128-5")]),
+    ("3.20 belgisi va 1.1 chiziq", [("YHQ", "belgi", "3.20"), ("YHQ", "chiziq", "1.1")]),
+    ("пункт 12 ПДД", [("YHQ", "band", "12")]),
+    ("Qizil chiroqqa o'tsam jarima qancha?", []),
+])
+def test_find_references(question, references):
+    assert ArticleIndex.find_references(question)[0] == references
+
+
+def test_answers_exact_reference(index):
+    answer = index.answer("MJtK 128-modda")
+
+    assert answer.startswith("📖 <b>MJtK 128-modda</b>")
+    assert "ℹ️" not in answer
+
+
+def test_answers_several_references(index):
+    answer = index.answer("3.20 belgisi va 1.1 chiziq")
+
+    assert "YHQ 3.20 belgisi" in answer
+    assert "YHQ 1.1 chizig'i" in answer
+
+
+def test_sub_band_falls_back_to_parent_explicitly(index):
+    assert index.get("YHQ", "band", "12.1")["number"] == "12"
+
+    answer = index.answer("YHQ 12.1-bandi nima haqida?")
+
+    # Foydalanuvchiga boshqa (yuqori) band berilgani aytiladi
+    assert answer.startswith("ℹ️ 12.1-band alohida ajratilmagan")
+    assert "📖 <b>YHQ 12-band</b>" in answer
+
+
+def test_questions_with_content_go_to_llm(index):
+    assert index.answer("Qizil chiroqqa o'tsam jarima qancha?") is None
+    assert index.answer("128-modda bo'yicha jarima qancha bo'ladi agar men qizil chiroqdan o'tsam") is None
+
+
+def test_unknown_number_is_not_answered(index):
+    assert index.get("MJtK", "modda", "9999") is None
+    assert index.answer("MJtK 9999-modda") is None
@@ -0,0 +1,78 @@
+"""CircuitBreaker: closed -> open -> half_open -> closed/open"""
+
+import time
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def tripped_breaker(open_seconds: float = 0.05) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", min_calls=3, failure_rate=0.5, open_seconds=open_seconds)
+    for _ in range(3):
+        breaker.record_failure("timeout", 1.0)
+    return breaker
+
+
+def test_opens_after_failure_rate_is_reached():
+    breaker = CircuitBreaker("test", min_calls=3, failure_rate=0.5)
+    breaker.record_failure("boom")
+    breaker.record_failure("boom")
+    assert breaker.state == CLOSED  # min_calls hali to'lmagan
+
+    breaker.record_failure("boom")
+
+    assert breaker.state == OPEN
+    assert breaker.is_open
+    assert not breaker.allow()
+    assert breaker.get_state()["rejected"] == 1
+
+
+def test_half_open_allows_single_probe():
+    breaker = tripped_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes():
+    breaker = tripped_breaker()
+    time.sleep(0.06)
+    breaker.allow()
+
+    breaker.record_success(0.1)
+
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = tripped_breaker()
+    time.sleep(0.06)
+    breaker.allow()
+
+    breaker.record_failure("still down")
+
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+    assert not breaker.allow()
+
+
+def test_released_probe_can_be_retried():
+    breaker = tripped_breaker()
+    time.sleep(0.06)
+    breaker.allow()
+
+    breaker.release()
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_slow_success_counts_as_failure():
+    breaker = CircuitBreaker("test", min_calls=1, failure_rate=0.5, slow_call_seconds=2.0)
+
+    breaker.record_success(3.0)
+
+    assert breaker.state == OPEN
+    assert "sekin" in breaker.last_error
@@ -0,0 +1,130 @@
+"""Ingest tozalash: boilerplate qatorlar va SimHash near-duplicate filtri"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import dedup
+from article_index import ArticleIndex
+from conftest import ROOT
+from dedup import BoilerplateLearner, NearDuplicateFilter, simhash
+
+# Chegara o'zgarsa (masalan kattalashtirilsa) alohida moddalar yo'qolishi mumkin - test buni ushlaydi
+MAX_DISTANCE = 3
+
+
+def node(node_id: str, text: str, ref_doc_id: str = None):
+    return SimpleNamespace(node_id=node_id, text=text, ref_doc_id=ref_doc_id or node_id)
+
+
+@pytest.fixture(scope="module")
+def articles():
+    index = ArticleIndex(str(ROOT / "data" / "qonunlar"))
+    index.load()
+    return index.units
+
+
+# ================= SIMHASH =================
+
+def test_default_threshold_is_fixed():
+    assert dedup.SIMHASH_MAX_DISTANCE == MAX_DISTANCE
+
+
+def test_short_texts_are_not_signed():
+    assert simhash("Qisqa matn") is None
+
+
+def test_small_edit_stays_near(articles):
+    text = articles[("MJtK", "modda", "128")]["text"]
+    edited = text.replace("транспорт", "транспорт ", 1) + " Қўшимча."
+
+    distance = bin(simhash(text) ^ simhash(edited)).count("1")
+
+    assert simhash(text) == simhash(text)
+    assert distance <= MAX_DISTANCE
+
+
+def test_copy_with_small_edit_is_dropped_and_recorded(articles):
+    text = articles[("MJtK", "modda", "128")]["text"]
+    dedup_filter = NearDuplicateFilter(max_distance=MAX_DISTANCE)
+
+    kept, stats = dedup_filter.filter_nodes([
+        node("a-1", text, "law_a"),
+        node("b-1", text + " Қўшимча.", "law_b"),
+    ])
+
+    assert [n.node_id for n in kept] == ["a-1"]
+    assert stats["chunks_removed"] == 1
+    assert stats["bytes_removed"] > 0
+    assert dedup_filter.dependents["law_a"] == {"law_b"}
+    assert dedup_filter.pop_dependents("law_a") == {"law_b"}
+    assert dedup_filter.pop_dependents("law_a") == set()
+
+
+def test_distinct_articles_are_never_dropped(articles):
+    """YHQ bandlari/belgilari va MJtK moddalari o'xshash tuzilishli, lekin har biri alohida"""
+    nodes = [node(f"{law}_{kind}_{number}", unit["text"]) for (law, kind, number), unit in articles.items()]
+
+    kept, stats = NearDuplicateFilter(max_distance=MAX_DISTANCE).filter_nodes(nodes)
+
+    assert len(nodes) > 1000
+    assert stats["chunks_removed"] == 0
+    assert len(kept) == len(nodes)
+
+
+def test_remove_ref_doc_frees_signatures(articles):
+    text = articles[("MJtK", "modda", "128")]["text"]
+    dedup_filter = NearDuplicateFilter(max_distance=MAX_DISTANCE)
+    dedup_filter.filter_nodes([node("a-1", text, "law_a")])
+
+    assert dedup_filter.remove_ref_doc("law_a") == 1
+
+    kept, _ = dedup_filter.filter_nodes([node("b-1", text, "law_b")])
+    assert len(kept) == 1
+
+
+def test_save_and_load(articles, tmp_path):
+    text = articles[("MJtK", "modda", "128")]["text"]
+    dedup_filter = NearDuplicateFilter(max_distance=MAX_DISTANCE)
+    dedup_filter.filter_nodes([node("a-1", text, "law_a"), node("b-1", text, "law_b")])
+    dedup_filter.save(tmp_path / dedup.SIMHASH_FILE)
+
+    loaded = NearDuplicateFilter.load(tmp_path / dedup.SIMHASH_FILE)
+
+    assert len(loaded) == 1
+    assert loaded.dependents["law_a"] == {"law_b"}
+    assert loaded.find_duplicate(simhash(text)) == "a-1"
+
+
+# ================= BOILERPLATE =================
+
+NAV = "Keyingi tahrirga havola"
+
+
+def test_learns_lines_repeated_across_files():
+    files = [[f"{NAV}\nHujjat {i} matni.\n12-modda. Umumiy qoidalar\n1."] for i in range(4)]
+    learner = BoilerplateLearner(min_files=3, min_file_fraction=0.3)
+
+    learner.learn(files)
+
+    # Tuzilma qatorlari (modda sarlavhasi, raqamlash) ko'p faylda bo'lsa ham qoladi
+    assert learner.lines == {NAV}
+
+
+def test_repeats_inside_one_file_are_not_boilerplate():
+    files = [[f"{NAV}\n{NAV}\n{NAV}\n{NAV}"], ["Boshqa matn"], ["Yana matn"]]
+    learner = BoilerplateLearner(min_files=3, min_file_fraction=0.3)
+
+    learner.learn(files)
+
+    assert learner.lines == set()
+
+
+def test_strip_counts_removed_bytes():
+    learner = BoilerplateLearner()
+    learner.lines = {NAV}
+
+    text, removed = learner.strip(f"Birinchi qator\n{NAV}\nIkkinchi qator")
+
+    assert text == "Birinchi qator\nIkkinchi qator"
+    assert removed == len(NAV) + 1
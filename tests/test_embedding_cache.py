@@ -0,0 +1,74 @@
+"""Embedding keshi: chunklar diskda, savollar xotiradagi cheklangan LRU da"""
+
+import asyncio
+from typing import Any, List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+from embedding_cache import CachedEmbedding, EmbeddingCache
+
+
+class CountingEmbedding(BaseEmbedding):
+    """Embedding = [matn uzunligi]; API chaqiruvlari sanaladi"""
+
+    _calls: Any = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(model_name="counting", **kwargs)
+        self._calls = []
+
+    @property
+    def calls(self) -> List[str]:
+        return self._calls
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        self._calls.append(query)
+        return [float(len(query))]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        self._calls.append(text)
+        return [float(len(text))]
+
+
+def make_embedding(tmp_path, query_cache_size: int = 1000):
+    inner = CountingEmbedding()
+    cache = EmbeddingCache(str(tmp_path / "embeddings.db"))
+    return CachedEmbedding(inner=inner, cache=cache, query_cache_size=query_cache_size), inner, cache
+
+
+def test_text_embeddings_are_persisted(tmp_path):
+    embedding, inner, cache = make_embedding(tmp_path)
+
+    first = asyncio.run(embedding.aget_text_embedding_batch(["bir", "ikki"]))
+    second = asyncio.run(embedding.aget_text_embedding_batch(["bir", "ikki"]))
+
+    assert first == second == [[3.0], [4.0]]
+    assert inner.calls == ["bir", "ikki"]
+    assert len(cache) == 2
+
+
+def test_query_embeddings_stay_in_memory(tmp_path):
+    embedding, inner, cache = make_embedding(tmp_path)
+
+    first = asyncio.run(embedding.aget_query_embedding("tezlik chegarasi"))
+    second = asyncio.run(embedding.aget_query_embedding("tezlik chegarasi"))
+
+    assert first == second
+    assert inner.calls == ["tezlik chegarasi"]
+    # Savollar diskdagi bazani o'stirmaydi
+    assert len(cache) == 0
+
+
+def test_query_cache_is_bounded_lru(tmp_path):
+    embedding, inner, _ = make_embedding(tmp_path, query_cache_size=2)
+
+    for query in ["a", "bb", "a", "ccc"]:  # "a" qayta ishlatildi - "bb" eng eskisi
+        embedding.get_query_embedding(query)
+    embedding.get_query_embedding("a")
+    embedding.get_query_embedding("bb")
+
+    assert inner.calls == ["a", "bb", "ccc", "bb"]
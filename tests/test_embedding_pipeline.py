@@ -0,0 +1,75 @@
+"""EmbeddingPipeline: batchlash va 429 da qayta urinish"""
+
+import asyncio
+
+import pytest
+
+from rag_engine import EmbeddingPipeline
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: float = 0.01):
+        super().__init__("429 Too Many Requests")
+        self.retry_after = retry_after
+
+
+class FakeEmbedder:
+    """Birinchi `failures` chaqiruvda 429, keyin har matnga [uzunlik] embeddingi"""
+
+    def __init__(self, failures: int = 0, error: Exception = None):
+        self.failures = failures
+        self.error = error
+        self.calls = []
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        if self.failures > 0:
+            self.failures -= 1
+            raise RateLimited()
+        return [[float(len(text))] for text in texts]
+
+
+def test_retries_rate_limited_batches():
+    embedder = FakeEmbedder(failures=2)
+    pipeline = EmbeddingPipeline(embed_fn=embedder, max_batch_size=10, max_retries=3)
+
+    embeddings, stats = asyncio.run(pipeline.embed_texts(["a", "bb", "ccc"]))
+
+    assert embeddings == [[1.0], [2.0], [3.0]]
+    assert stats["retries"] == 2
+    assert stats["embedded"] == 3
+    assert len(embedder.calls) == 3
+
+
+def test_gives_up_after_max_retries():
+    embedder = FakeEmbedder(failures=10)
+    pipeline = EmbeddingPipeline(embed_fn=embedder, max_retries=2)
+
+    with pytest.raises(RateLimited):
+        asyncio.run(pipeline.embed_texts(["a"]))
+    assert len(embedder.calls) == 3
+
+
+def test_other_errors_are_not_retried():
+    embedder = FakeEmbedder(error=ValueError("bad request"))
+    pipeline = EmbeddingPipeline(embed_fn=embedder, max_retries=5)
+
+    with pytest.raises(ValueError):
+        asyncio.run(pipeline.embed_texts(["a"]))
+    assert len(embedder.calls) == 1
+
+
+def test_packs_batches_and_keeps_order():
+    embedder = FakeEmbedder(failures=1)
+    pipeline = EmbeddingPipeline(embed_fn=embedder, max_batch_size=2, max_concurrency=2)
+    texts = ["x" * n for n in range(1, 6)]
+
+    embeddings, stats = asyncio.run(pipeline.embed_texts(texts))
+
+    assert embeddings == [[float(n)] for n in range(1, 6)]
+    assert stats["batches"] == 3
+    assert all(len(batch) <= 2 for batch in embedder.calls)
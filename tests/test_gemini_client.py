@@ -0,0 +1,120 @@
+"""Gemini context caching: keshlangan yo'l va keshsiz (system_instruction) yo'l"""
+
+import asyncio
+
+import pytest
+
+import gemini_client
+from prompt_templates import PromptTemplate
+
+PINNED = "ASOSIY QOIDALAR (doimiy kontekst):\n\n1-band. Umumiy qoidalar"
+
+
+class FakeModel:
+    def __init__(self, model_name=None, system_instruction=None, cached_content=None):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.cached_content = cached_content
+
+    @classmethod
+    def from_cached_content(cls, cache):
+        return cls(cache.model, cached_content=cache)
+
+
+class FakeCachedContent:
+    created = []
+
+    def __init__(self, **kwargs):
+        self.model = kwargs["model"]
+        self.kwargs = kwargs
+
+    @classmethod
+    def create(cls, **kwargs):
+        cache = cls(**kwargs)
+        cls.created.append(cache)
+        return cache
+
+    def update(self, ttl):
+        self.ttl = ttl
+
+
+@pytest.fixture
+def client(monkeypatch):
+    FakeCachedContent.created = []
+    monkeypatch.setattr(gemini_client.genai, "configure", lambda **kwargs: None)
+    monkeypatch.setattr(gemini_client.genai, "GenerativeModel", FakeModel)
+    monkeypatch.setattr(gemini_client.caching, "CachedContent", FakeCachedContent)
+    monkeypatch.setattr(gemini_client, "GEMINI_CONTEXT_CACHE", True)
+    return gemini_client.GeminiClient(api_key="test", model_name="gemini-test")
+
+
+@pytest.fixture
+def template():
+    template = PromptTemplate("test_advisor", ["ROL: maslahatchi", "QOIDALAR: aniq javob"])
+    template._pinned = PINNED
+    template.stats["pinned_tokens"] = 20
+    return template
+
+
+def test_cache_min_tokens_by_model(monkeypatch):
+    monkeypatch.setattr(gemini_client, "GEMINI_CACHE_MIN_TOKENS", None)
+
+    assert gemini_client.cache_min_tokens("models/gemini-1.5-flash-002") == 32768
+    assert gemini_client.cache_min_tokens("models/gemini-2.5-flash") == 1024
+    assert gemini_client.cache_min_tokens("models/unknown") == 32768
+
+
+def test_small_context_falls_back_without_pinned_text(client, template, monkeypatch):
+    monkeypatch.setattr(gemini_client, "GEMINI_CACHE_MIN_TOKENS", "100000")
+
+    async def scenario():
+        prepared = await client.prepare_context(template)
+        model = await client._model_for(template)
+        return prepared, model
+
+    prepared, model = asyncio.run(scenario())
+
+    assert not prepared
+    assert FakeCachedContent.created == []
+    # Keshsiz: faqat statik qism (OpenAI chat bilan bir xil), pinned matn yuborilmaydi
+    assert model.system_instruction == template.static
+    assert PINNED not in model.system_instruction
+    # Hajm o'zgarmaydi - kesh qayta urinilmaydi
+    assert client._cache_retry_at[template.name] == float("inf")
+
+
+def test_cached_context_includes_pinned_text(client, template, monkeypatch):
+    monkeypatch.setattr(gemini_client, "GEMINI_CACHE_MIN_TOKENS", "1")
+
+    async def scenario():
+        prepared = await client.prepare_context(template)
+        model = await client._model_for(template)
+        return prepared, model
+
+    prepared, model = asyncio.run(scenario())
+
+    assert prepared
+    (cache,) = FakeCachedContent.created
+    assert cache.kwargs["system_instruction"] == template.static
+    assert cache.kwargs["contents"] == [PINNED]
+    assert model.cached_content is cache
+    assert client.stats["cached_requests"] == 1
+
+
+def test_failed_cache_uses_static_instruction(client, template, monkeypatch):
+    monkeypatch.setattr(gemini_client, "GEMINI_CACHE_MIN_TOKENS", "1")
+
+    def fail(**kwargs):
+        raise RuntimeError("cache not supported")
+
+    monkeypatch.setattr(FakeCachedContent, "create", fail)
+
+    async def scenario():
+        prepared = await client.prepare_context(template)
+        return prepared, await client._model_for(template)
+
+    prepared, model = asyncio.run(scenario())
+
+    assert not prepared
+    assert client.stats["cache_errors"] == 1
+    assert model.system_instruction == template.static
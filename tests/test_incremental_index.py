@@ -0,0 +1,88 @@
+"""Manifest asosidagi bosqichma-bosqich yangilash: o'zgartirish, o'chirish, qo'shish, near-duplicate"""
+
+import json
+
+from conftest import LAW_IDS, chunk_counts, law_doc_id, write_law
+
+
+def keyword_hits(engine, keyword: str) -> list:
+    return [r["url"] for r in engine.search_laws(keyword, mode="keyword")]
+
+
+def test_initial_load_indexes_every_file(engine):
+    result = engine.update_index_from_files()
+
+    assert result["success"]
+    assert result["files_changed"] == len(LAW_IDS)
+    counts = chunk_counts(engine)
+    assert all(counts.get(law_doc_id(law_id)) for law_id in LAW_IDS)
+    assert set(engine._load_manifest()) == {law_doc_id(law_id) for law_id in LAW_IDS}
+
+
+def test_unchanged_files_are_skipped(engine):
+    engine.update_index_from_files()
+    before = chunk_counts(engine)
+
+    result = engine.update_index_from_files()
+
+    assert result["files_changed"] == 0
+    assert chunk_counts(engine) == before
+
+
+def test_modified_file_replaces_its_chunks(engine, laws_dir):
+    engine.update_index_from_files()
+    path = laws_dir / f"{LAW_IDS[0]}.json"
+    law = json.loads(path.read_text(encoding="utf-8"))
+    law["content"] += "\n\nYangi band: zebrakvagga yo'laklarida to'xtash taqiqlanadi."
+    path.write_text(json.dumps(law, ensure_ascii=False), encoding="utf-8")
+
+    result = engine.update_index_from_files()
+
+    assert result["files_changed"] == 1
+    assert law["url"] in keyword_hits(engine, "zebrakvagga")
+    # Boshqa qonunlar qayta indekslanmadi
+    assert set(chunk_counts(engine)) == {law_doc_id(law_id) for law_id in LAW_IDS}
+
+
+def test_deleted_file_removes_its_chunks(engine, laws_dir):
+    engine.update_index_from_files()
+    (laws_dir / f"{LAW_IDS[1]}.json").unlink()
+
+    result = engine.update_index_from_files()
+
+    assert result["files_removed"] == 1
+    assert law_doc_id(LAW_IDS[1]) not in chunk_counts(engine)
+    assert law_doc_id(LAW_IDS[1]) not in engine._load_manifest()
+
+
+def test_added_file_is_indexed(engine, laws_dir):
+    engine.update_index_from_files()
+    write_law(laws_dir, "555", "Velosipedchilar faqat maxsus yo'lakdan harakatlanadi. " * 20)
+
+    result = engine.update_index_from_files()
+
+    assert result["files_changed"] == 1
+    assert chunk_counts(engine).get(law_doc_id("555"))
+    assert "https://lex.uz/uz/docs/555" in keyword_hits(engine, "velosipedchilar")
+
+
+def test_duplicate_is_reindexed_when_original_is_deleted(engine, laws_dir):
+    # Xuddi shu hujjat boshqa raqam bilan (masalan qayta nashr)
+    law = json.loads((laws_dir / f"{LAW_IDS[0]}.json").read_text(encoding="utf-8"))
+    law["id"] = "999"
+    (laws_dir / "999.json").write_text(json.dumps(law, ensure_ascii=False), encoding="utf-8")
+    engine.update_index_from_files()
+
+    # Matni bir xil - faqat asl qonun chunklari saqlanadi
+    counts = chunk_counts(engine)
+    assert counts.get(law_doc_id(LAW_IDS[0]))
+    assert not counts.get(law_doc_id("999"))
+
+    (laws_dir / f"{LAW_IDS[0]}.json").unlink()
+    engine.update_index_from_files()
+
+    counts = chunk_counts(engine)
+    assert law_doc_id(LAW_IDS[0]) not in counts
+    assert counts.get(law_doc_id("999"))
+    assert law_doc_id("999") in engine._load_manifest()
+    assert not engine.reindex_pending
@@ -0,0 +1,127 @@
+"""Metadata inverted indeksi va filtrlar (kichik korpusda)"""
+
+import asyncio
+
+import pytest
+from llama_index.core.vector_stores.types import (
+    FilterCondition,
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+)
+
+from metadata_index import (
+    TRAFFIC_LAW_IDS,
+    MetadataIndex,
+    build_filters,
+    is_traffic_question,
+    traffic_filters,
+)
+
+# Qator raqami = ro'yxatdagi o'rni
+CORPUS = [
+    {"category": "qonunlar", "law_id": "5953883", "law": "YHQ", "source": "lex.uz", "date": "2022-06-09"},
+    {"category": "qonunlar", "law_id": "97664", "law": "MJtK", "source": "lex.uz", "date": "2024-01-15"},
+    {"category": "qarorlar", "law_id": "7984693", "source": "lex.uz", "version": 2, "date": "2026-01-18"},
+    {"category": "qarorlar", "law_id": "7985236", "source": "manual", "date": "2025-11-30"},
+    {"category": "qonunlar", "law_id": "5953883", "law": "YHQ", "source": "lex.uz", "title": "indekslanmaydi"},
+]
+
+
+@pytest.fixture
+def index():
+    return MetadataIndex.build(CORPUS)
+
+
+def rows(index, filters) -> set:
+    return index.rows_for(build_filters(filters))
+
+
+def test_postings(index):
+    assert index.rows == len(CORPUS)
+    assert index.values("category") == {"qonunlar": 3, "qarorlar": 2}
+    assert index.values("law_id")["5953883"] == 2
+    assert "title" not in index.postings
+
+
+def test_eq_and_in_filters(index):
+    assert rows(index, {"category": "qarorlar"}) == {2, 3}
+    assert rows(index, {"law_id": TRAFFIC_LAW_IDS}) == {0, 1, 4}
+    assert rows(index, {"version": 2}) == {2}
+
+
+def test_conditions_are_combined_with_and(index):
+    assert rows(index, {"category": "qarorlar", "source": "lex.uz"}) == {2}
+    assert rows(index, {"category": "qonunlar", "law_id": ["97664"]}) == {1}
+
+
+def test_date_range(index):
+    assert rows(index, {"date_from": "2025-01-01"}) == {2, 3}
+    assert rows(index, {"date_from": "2023-01-01", "date_to": "2025-12-31"}) == {1, 3}
+
+
+def test_empty_values_are_ignored(index):
+    assert build_filters({"category": "", "law_id": [], "source": None}) is None
+    assert build_filters(None) is None
+    assert rows(index, {"category": "", "law": "MJtK"}) == {1}
+
+
+def test_negation_and_or(index):
+    not_manual = MetadataFilters(filters=[MetadataFilter(key="source", value="manual", operator=FilterOperator.NE)])
+    assert index.rows_for(not_manual) == {0, 1, 2, 4}
+
+    either = MetadataFilters(filters=[
+        MetadataFilter(key="law", value="MJtK"),
+        MetadataFilter(key="version", value="2"),
+    ], condition=FilterCondition.OR)
+    assert index.rows_for(either) == {1, 2}
+
+
+def test_compact_renumbers_live_rows(index):
+    index.compact([0, 2, 4])
+
+    assert index.rows == 3
+    assert rows(index, {"law": "YHQ"}) == {0, 2}
+    assert rows(index, {"category": "qarorlar"}) == {1}
+
+
+def test_save_and_load(index, tmp_path):
+    index.save(tmp_path / "meta_index.json")
+
+    loaded = MetadataIndex.load(tmp_path / "meta_index.json")
+
+    assert loaded.rows == index.rows
+    assert rows(loaded, {"law_id": TRAFFIC_LAW_IDS}) == {0, 1, 4}
+    assert MetadataIndex.load(tmp_path / "missing.json") is None
+
+
+@pytest.mark.parametrize("question", [
+    "Qizil chiroqqa o'tsam jarima qancha?",
+    "Йўл белгиси 3.20 нимани билдиради?",
+    "Какой штраф за превышение скорости?",
+    "Haydovchilik guvohnomasi muddati",
+])
+def test_traffic_questions_are_limited_to_traffic_laws(question):
+    assert is_traffic_question(question)
+    assert traffic_filters(question) == {"law_id": TRAFFIC_LAW_IDS}
+
+
+@pytest.mark.parametrize("question", [
+    "Mehnat shartnomasini bekor qilish tartibi",
+    "Dori vositalarini ro'yxatdan o'tkazish",
+])
+def test_other_questions_are_not_filtered(question):
+    assert traffic_filters(question) is None
+
+
+def test_traffic_law_ids_match_law_files():
+    assert sorted(TRAFFIC_LAW_IDS) == ["5953883", "97664"]
+
+
+def test_retrieval_only_returns_filtered_documents(engine):
+    engine.update_index_from_files()
+
+    context = asyncio.run(engine.retrieve_context("qaror", filters={"law_id": ["7985236"]}))
+
+    assert context["success"]
+    assert {chunk["url"] for chunk in context["chunks"]} == {"https://lex.uz/uz/docs/7985236"}
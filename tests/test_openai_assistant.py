@@ -0,0 +1,99 @@
+"""Assistant oqimi: timeoutda aynan run (step emas) bekor qilinadi"""
+
+import asyncio
+from types import SimpleNamespace
+
+import openai_assistant
+
+
+def event(name: str, data) -> SimpleNamespace:
+    return SimpleNamespace(event=name, data=data)
+
+
+def text_delta(value: str) -> SimpleNamespace:
+    block = SimpleNamespace(type="text", text=SimpleNamespace(value=value))
+    return SimpleNamespace(delta=SimpleNamespace(content=[block]))
+
+
+class FakeStream:
+    """runs.stream(...) - hodisalarni beradi, keyin javobsiz osilib qoladi"""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self.events:
+            yield item
+        await asyncio.sleep(60)
+
+
+class FakeRuns:
+    def __init__(self, events):
+        self.events = events
+        self.cancelled = []
+
+    def stream(self, thread_id, assistant_id):
+        return FakeStream(self.events)
+
+    async def cancel(self, thread_id, run_id):
+        self.cancelled.append((thread_id, run_id))
+
+
+class FakeMessages:
+    async def create(self, **kwargs):
+        return SimpleNamespace(id="msg_1")
+
+
+def make_assistant(monkeypatch, tmp_path, events):
+    monkeypatch.setattr(openai_assistant, "ASSISTANT_ID", "asst_test")
+    monkeypatch.setattr(openai_assistant, "ASSISTANT_TIMEOUT", 0.2)
+    monkeypatch.setattr(openai_assistant, "THREADS_FILE", tmp_path / "user_threads.json")
+    assistant = openai_assistant.OpenAIAssistant()
+    runs = FakeRuns(events)
+    assistant.client = SimpleNamespace(
+        beta=SimpleNamespace(threads=SimpleNamespace(runs=runs, messages=FakeMessages()))
+    )
+    assistant.user_threads[1] = "thread_1"
+    return assistant, runs
+
+
+def test_timeout_cancels_run_not_step(monkeypatch, tmp_path):
+    run = SimpleNamespace(id="run_1", status="in_progress")
+    step = SimpleNamespace(id="step_1", status="in_progress")
+    assistant, runs = make_assistant(monkeypatch, tmp_path, [
+        event("thread.run.created", run),
+        event("thread.run.in_progress", run),
+        event("thread.run.step.created", step),
+        event("thread.run.step.in_progress", step),
+        event("thread.message.delta", text_delta("Salom")),
+    ])
+    texts = []
+
+    async def scenario():
+        result = await assistant.query(1, "savol", on_text=texts.append)
+        await asyncio.sleep(0)  # _cancel_run fon taskda
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert not result["success"]
+    assert texts == ["Salom"]
+    assert runs.cancelled == [("thread_1", "run_1")]
+
+
+def test_timeout_before_run_event_does_not_cancel(monkeypatch, tmp_path):
+    assistant, runs = make_assistant(monkeypatch, tmp_path, [])
+
+    result = asyncio.run(assistant.query(1, "savol", on_text=lambda text: None))
+
+    assert not result["success"]
+    assert runs.cancelled == []
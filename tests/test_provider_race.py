@@ -0,0 +1,137 @@
+"""Provayderlar poygasi: hedge kechikishlari, limitlar va breakerlar"""
+
+import asyncio
+import time
+
+from circuit_breaker import CircuitBreaker
+from provider_race import Provider, race
+
+
+# Poyga boshlangan payt (provayderlar boshlanish vaqti shunga nisbatan yoziladi)
+t0 = [0.0]
+
+
+def answer_after(delay: float, answer, starts: list, name: str):
+    async def factory():
+        starts.append((name, round(time.perf_counter() - t0[0], 2)))
+        await asyncio.sleep(delay)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+    return factory
+
+
+def test_hedge_starts_next_provider_after_delay():
+    async def scenario():
+        starts = []
+        first, second = Provider("first"), Provider("second", hedge_delay=0.1)
+        t0[0] = time.perf_counter()
+        result = await race([
+            (first, answer_after(1.0, "sekin javob", starts, "first")),
+            (second, answer_after(0.05, "tez javob", starts, "second")),
+        ])
+        return result, starts
+
+    result, starts = asyncio.run(scenario())
+
+    assert result.provider == "second"
+    assert result.launched == ["first", "second"]
+    assert starts[1][1] >= 0.1
+
+
+def test_failure_launches_next_without_waiting():
+    async def scenario():
+        starts = []
+        first, second = Provider("first"), Provider("second", hedge_delay=5.0)
+        t0[0] = time.perf_counter()
+        result = await race([
+            (first, answer_after(0.01, RuntimeError("boom"), starts, "first")),
+            (second, answer_after(0.01, "javob", starts, "second")),
+        ])
+        return result, starts
+
+    result, starts = asyncio.run(scenario())
+
+    assert result.provider == "second"
+    assert starts[1][1] < 1.0
+
+
+def test_provider_at_capacity_is_deferred_and_timer_rearmed():
+    async def scenario():
+        starts = []
+        first = Provider("first")
+        busy = Provider("busy", hedge_delay=0.1, max_concurrency=1)
+        last = Provider("last", hedge_delay=0.1)
+        # Boshqa so'rov busy ning yagona slotini band qilgan
+        blocker = asyncio.create_task(busy._run(lambda: asyncio.sleep(5)))
+        await asyncio.sleep(0)
+        t0[0] = time.perf_counter()
+        try:
+            result = await race([
+                (first, answer_after(1.0, "sekin javob", starts, "first")),
+                (busy, answer_after(0.01, "busy javobi", starts, "busy")),
+                (last, answer_after(0.01, "oxirgi javob", starts, "last")),
+            ])
+        finally:
+            blocker.cancel()
+        return result, starts, busy
+
+    result, starts, busy = asyncio.run(scenario())
+
+    assert result.provider == "last"
+    assert result.launched == ["first", "last"]
+    assert busy.stats["deferred"] == 1
+    # last busy ning hedge vaqtida emas, undan keyin o'z kechikishi o'tgach boshlanadi
+    assert dict(starts)["last"] >= 0.2
+
+
+def test_deferred_provider_runs_when_others_fail():
+    async def scenario():
+        starts = []
+        first = Provider("first")
+        busy = Provider("busy", hedge_delay=0.05, max_concurrency=1)
+        holder = asyncio.Event()
+
+        async def hold():
+            await holder.wait()
+
+        blocker = asyncio.create_task(busy._run(hold))
+        await asyncio.sleep(0)
+
+        async def first_fails():
+            await asyncio.sleep(0.1)
+            holder.set()
+            raise RuntimeError("boom")
+
+        t0[0] = time.perf_counter()
+        result = await race([
+            (first, first_fails),
+            (busy, answer_after(0.01, "busy javobi", starts, "busy")),
+        ])
+        await blocker
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert result.provider == "busy"
+
+
+def test_open_breaker_is_skipped():
+    async def scenario():
+        starts = []
+        breaker = CircuitBreaker("down", min_calls=1, open_seconds=60)
+        breaker.record_failure("boom")
+        down = Provider("down", breaker=breaker)
+        backup = Provider("backup", hedge_delay=5.0)
+        t0[0] = time.perf_counter()
+        result = await race([
+            (down, answer_after(0.01, "javob", starts, "down")),
+            (backup, answer_after(0.01, "zaxira javob", starts, "backup")),
+        ])
+        return result, down
+
+    result, down = asyncio.run(scenario())
+
+    assert result.provider == "backup"
+    assert result.launched == ["backup"]
+    assert down.stats["skipped"] == 1
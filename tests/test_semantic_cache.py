@@ -0,0 +1,73 @@
+"""Semantik javob keshi: o'xshashlik chegarasi, TTL, LRU va versiya"""
+
+from semantic_cache import SemanticAnswerCache, normalize_question
+
+
+def make_cache(**kwargs) -> SemanticAnswerCache:
+    kwargs.setdefault("threshold", 0.9)
+    return SemanticAnswerCache(**kwargs)
+
+
+def test_exact_lookup_uses_normalized_question():
+    cache = make_cache()
+    cache.store("Tezlik chegarasi qancha?", [1.0, 0.0], "60 km/soat")
+
+    assert normalize_question("  tezlik   CHEGARASI qancha ") == normalize_question("Tezlik chegarasi qancha?")
+    assert cache.lookup_exact("tezlik chegarasi qancha") == "60 km/soat"
+    assert cache.exact_hits == 1
+
+
+def test_similarity_threshold():
+    cache = make_cache(threshold=0.9)
+    cache.store("savol", [1.0, 0.0], "javob")
+
+    # cos = 0.95 - chegaradan yuqori
+    assert cache.lookup([0.95, 0.312]) == "javob"
+    # cos = 0.8 - chegaradan past
+    assert cache.lookup([0.8, 0.6]) is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_best_match_is_returned():
+    cache = make_cache(threshold=0.5)
+    cache.store("birinchi", [1.0, 0.0], "A")
+    cache.store("ikkinchi", [0.0, 1.0], "B")
+
+    assert cache.lookup([0.2, 0.9]) == "B"
+
+
+def test_expired_entries_are_not_returned():
+    cache = make_cache(ttl_seconds=60)
+    cache.store("savol", [1.0, 0.0], "javob")
+    cache._entries[normalize_question("savol")]["created"] -= 61
+
+    assert cache.lookup_exact("savol") is None
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = make_cache(max_entries=2)
+    cache.store("a", [1.0, 0.0, 0.0], "A")
+    cache.store("b", [0.0, 1.0, 0.0], "B")
+    cache.lookup_exact("a")  # "b" eng eski
+    cache.store("c", [0.0, 0.0, 1.0], "C")
+
+    assert cache.lookup_exact("b") is None
+    assert cache.lookup_exact("a") == "A"
+    assert cache.lookup_exact("c") == "C"
+    assert cache.evictions == 1
+
+
+def test_version_bump_drops_everything():
+    cache = make_cache()
+    cache.store("savol", [1.0, 0.0], "eski javob")
+
+    cache.bump_version("(indeks yangilandi)")
+
+    assert cache.version == 2
+    assert cache.lookup_exact("savol") is None
+    assert cache.lookup([1.0, 0.0]) is None
+    cache.store("savol", [1.0, 0.0], "yangi javob")
+    assert cache.lookup_exact("savol") == "yangi javob"
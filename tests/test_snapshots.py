@@ -0,0 +1,85 @@
+"""Snapshotlar: yangilash yangi snapshotda, almashtirish va orqaga qaytarish"""
+
+import asyncio
+
+from conftest import LAW_IDS, chunk_counts, law_doc_id
+from index_snapshots import SnapshotManager
+
+
+def test_update_swaps_to_new_snapshot(engine, laws_dir):
+    engine.update_index_from_files()
+    serving = engine.snapshot
+
+    (laws_dir / f"{LAW_IDS[2]}.json").unlink()
+    engine.update_index_from_files()
+
+    assert engine.snapshot is not serving
+    assert engine.snapshot.name != serving.name
+    assert law_doc_id(LAW_IDS[2]) not in chunk_counts(engine)
+    # Eski snapshotni olgan so'rov oxirigacha o'z ma'lumotlarini ko'radi
+    old_docs = {node.ref_doc_id for node in serving.vector_store.get_nodes()}
+    assert law_doc_id(LAW_IDS[2]) in old_docs
+
+
+def test_rollback_restores_previous_snapshot(engine, laws_dir):
+    engine.update_index_from_files()
+    first = engine.snapshot.name
+    (laws_dir / f"{LAW_IDS[2]}.json").unlink()
+    engine.update_index_from_files()
+
+    name = engine.rollback_index()
+
+    assert name == first
+    assert engine.snapshot.name == first
+    assert law_doc_id(LAW_IDS[2]) in chunk_counts(engine)
+    # BM25 almashtirish paytida yuklangan - so'rov uni event loopda o'qimaydi
+    assert engine.snapshot.bm25 is not None
+
+
+def test_rollback_without_history(engine):
+    engine.update_index_from_files()
+
+    assert engine.rollback_index() is None
+
+
+def test_retrieve_context_after_rollback(engine, laws_dir):
+    engine.update_index_from_files()
+    (laws_dir / f"{LAW_IDS[0]}.json").unlink()
+    engine.update_index_from_files()
+    engine.rollback_index()
+    engine.snapshot.bm25 = None
+
+    context = asyncio.run(engine.retrieve_context("yo'l harakati"))
+
+    assert context["success"]
+    assert engine.snapshot.bm25 is not None
+
+
+def test_prune_removes_crashed_builds_newer_than_current(tmp_path):
+    manager = SnapshotManager(tmp_path)
+    current = manager.create()
+    manager.activate(current)
+    crashed = manager.create()
+
+    # Jarayon qayta ishga tushdi - qurilayotganlar ro'yxati bo'sh, chala papka CURRENT dan yangi
+    restarted = SnapshotManager(tmp_path)
+    restarted.prune()
+
+    assert crashed > current
+    assert not (tmp_path / "snapshots" / crashed).exists()
+    assert restarted.current_name() == current
+
+
+def test_prune_keeps_build_in_progress(tmp_path):
+    manager = SnapshotManager(tmp_path, keep=1)
+    names = []
+    for _ in range(3):
+        names.append(manager.create())
+        manager.activate(names[-1])
+    staging = manager.create()
+
+    manager.prune()
+
+    assert (tmp_path / "snapshots" / staging).exists()
+    # Joriy va bitta oldingisi qoladi
+    assert manager.list() == names[1:]
@@ -0,0 +1,137 @@
+"""Oqimli javob: tahrirlar chastotasi, uzun matn va yakuniy tahrir zaxirasi"""
+
+import asyncio
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import EditMessageText
+
+from telegram_stream import STREAM_SUFFIX, TELEGRAM_MAX_CHARS, StreamSink, ThrottledEditor
+
+
+class FakeMessage:
+    """edit_text chaqiruvlarini yozadi; errors - navbatdagi chaqiruvlarda ko'tariladigan xatolar"""
+
+    def __init__(self, errors=None):
+        self.edits = []
+        self.errors = list(errors or [])
+
+    async def edit_text(self, text, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.edits.append((text, kwargs))
+
+
+def bad_request(text: str = "can't parse entities") -> TelegramBadRequest:
+    return TelegramBadRequest(EditMessageText(text="x"), text)
+
+
+def test_updates_are_throttled():
+    async def scenario():
+        message = FakeMessage()
+        editor = ThrottledEditor(message, interval=0.2, min_delta=1)
+        text = ""
+        for _ in range(10):
+            text += "bo'lak "
+            editor.update(text)
+            await asyncio.sleep(0.03)
+        await asyncio.sleep(0.25)
+        await editor.close()
+        return message, text
+
+    message, text = asyncio.run(scenario())
+
+    # 0.3 s davomida 10 ta yangilanish - interval 0.2 s bo'lgani uchun 2-3 ta tahrir
+    assert 1 <= len(message.edits) <= 3
+    assert message.edits[-1][0] == text + STREAM_SUFFIX
+
+
+def test_small_deltas_are_not_edited():
+    async def scenario():
+        message = FakeMessage()
+        editor = ThrottledEditor(message, interval=0.0, min_delta=30)
+        editor.update("qisqa")
+        await asyncio.sleep(0.05)
+        await editor.close()
+        return message
+
+    assert asyncio.run(scenario()).edits == []
+
+
+def test_long_stream_is_truncated_to_telegram_limit():
+    rendered = ThrottledEditor._render("x" * (TELEGRAM_MAX_CHARS + 500))
+
+    assert len(rendered) == TELEGRAM_MAX_CHARS
+    assert rendered.endswith("…" + STREAM_SUFFIX)
+
+
+def test_finish_rejects_too_long_text():
+    async def scenario():
+        message = FakeMessage()
+        editor = ThrottledEditor(message, interval=0.0)
+        return await editor.finish("x" * (TELEGRAM_MAX_CHARS + 1)), message
+
+    finished, message = asyncio.run(scenario())
+
+    assert not finished
+    assert message.edits == []
+
+
+def test_finish_falls_back_to_plain_text():
+    async def scenario():
+        message = FakeMessage(errors=[bad_request()])
+        editor = ThrottledEditor(message, interval=0.0)
+        return await editor.finish("a < b", parse_mode="HTML"), message
+
+    finished, message = asyncio.run(scenario())
+
+    assert finished
+    assert message.edits == [("a < b", {"parse_mode": None})]
+
+
+def test_finish_reports_failure():
+    async def scenario():
+        message = FakeMessage(errors=[bad_request(), bad_request("message to edit not found")])
+        editor = ThrottledEditor(message, interval=0.0)
+        return await editor.finish("javob")
+
+    assert not asyncio.run(scenario())
+
+
+def test_retry_after_is_respected():
+    async def scenario():
+        retry = TelegramRetryAfter(EditMessageText(text="x"), "flood", retry_after=0)
+        message = FakeMessage(errors=[retry])
+        editor = ThrottledEditor(message, interval=0.0)
+        return await editor.finish("javob"), message
+
+    finished, message = asyncio.run(scenario())
+
+    assert finished
+    assert [text for text, _ in message.edits] == ["javob"]
+
+
+def test_updates_after_close_are_ignored():
+    async def scenario():
+        message = FakeMessage()
+        editor = ThrottledEditor(message, interval=0.0, min_delta=1)
+        await editor.close()
+        editor.update("kech kelgan matn")
+        await asyncio.sleep(0.02)
+        return message
+
+    assert asyncio.run(scenario()).edits == []
+
+
+def test_sink_streams_only_the_first_provider():
+    shown = []
+    sink = StreamSink(shown.append)
+    assistant, gemini = sink.writer("assistant"), sink.writer("gemini")
+
+    assistant("A1")
+    gemini("G1")
+    assistant("A1 A2")
+    sink.release("assistant")  # assistant yutqazdi - xabar keyingi provayderga o'tadi
+    gemini("G1 G2")
+    assistant("A1 A2 A3")
+
+    assert shown == ["A1", "A1 A2", "G1 G2"]
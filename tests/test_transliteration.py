@@ -0,0 +1,57 @@
+"""Kirill -> lotin normalizatsiyasi (ikki xil o'qiladigan harflar alohida)"""
+
+import pytest
+
+from transliteration import is_uzbek_cyrillic, normalize_apostrophes, normalize_text, to_latin
+
+
+@pytest.mark.parametrize("cyrillic, latin", [
+    # ц: undoshdan oldin/so'z boshida - s, unlilar orasida - ts
+    ("цирк", "sirk"),
+    ("Цирк", "Sirk"),
+    ("лицензия", "litsenziya"),
+    ("милиция", "militsiya"),
+    # ё - yo
+    ("ёл", "yol"),
+    ("Ёқилғи", "Yoqilg'i"),
+    # ъ - tutuq belgisi
+    ("маъмурий", "ma'muriy"),
+    ("съезд", "s'yezd"),
+    # ғ / ў / қ / ҳ
+    ("ғалаба", "g'alaba"),
+    ("ўзбек", "o'zbek"),
+    ("қоида", "qoida"),
+    ("ҳайдовчи", "haydovchi"),
+    # е: so'z boshida va unlidan keyin - ye, undoshdan keyin - e
+    ("ерга", "yerga"),
+    ("Ер", "Yer"),
+    ("поезд", "poyezd"),
+    ("кейин", "keyin"),
+    ("мева", "meva"),
+    # Bosh harflar bilan yozilgan so'z butunlay bosh harfda qoladi
+    ("ШАРҲ", "SHARH"),
+    ("ЎЗБЕКИСТОН", "O'ZBEKISTON"),
+    ("Ўзбекистон", "O'zbekiston"),
+])
+def test_to_latin(cyrillic, latin):
+    assert to_latin(cyrillic) == latin
+
+
+def test_apostrophe_variants():
+    assert normalize_apostrophes("o‘zbek oʻzbek o`zbek o’zbek") == "o'zbek o'zbek o'zbek o'zbek"
+
+
+def test_uzbek_cyrillic_is_transliterated():
+    assert normalize_text("Йўл ҳаракати қоидалари") == "Yo'l harakati qoidalari"
+
+
+def test_russian_text_is_kept():
+    text = "Правила дорожного движения"
+
+    assert not is_uzbek_cyrillic(text)
+    assert normalize_text(text) == text
+
+
+def test_latin_text_only_normalizes_apostrophes():
+    assert normalize_text("Yoʻl harakati qoidalari") == "Yo'l harakati qoidalari"
+    assert normalize_text("") == ""
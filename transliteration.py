@@ -0,0 +1,125 @@
+"""
+🔤 O'ZBEK YOZUVI NORMALIZATSIYASI
+==================================
+Kirill -> lotin transliteratsiyasi va apostroflarni bir xillashtirish.
+
+Qonunlar (lex.uz) asosan kirillda, foydalanuvchilar esa lotinda va turli
+apostroflar bilan (o' / o‘ / oʻ / o`) yozadi. Indekslashda ham, so'rovda ham
+bitta ko'rinish ishlatiladi: lotin yozuvi + oddiy apostrof (').
+
+- Jadval asosida (str.translate), kontekstga bog'liq qoidalar: "е" -> "ye"
+  (so'z boshida va unlidan keyin), "ц" -> "s"/"ts"
+- Rus tilidagi matnlar (ўқғҳ harflarisiz, ы/щ yoki rus so'zlari bor) faqat apostrof bo'yicha
+"""
+
+import re
+import time
+from typing import Dict
+
+# Barcha apostrof ko'rinishlari -> "'"
+APOSTROPHE_VARIANTS = "‘’ʻʼ`´′ʹ"
+APOSTROPHE_TABLE = str.maketrans({ch: "'" for ch in APOSTROPHE_VARIANTS})
+
+# Kirill -> lotin (1995-yilgi rasmiy alifbo)
+CYRILLIC_TO_LATIN: Dict[str, str] = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "x", "ц": "s", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "'",
+    "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    "ў": "o'", "қ": "q", "ғ": "g'", "ҳ": "h",
+}
+_TABLE: Dict[int, str] = {}
+for _cyr, _lat in CYRILLIC_TO_LATIN.items():
+    _TABLE[ord(_cyr)] = _lat
+    _TABLE[ord(_cyr.upper())] = _lat[:1].upper() + _lat[1:]
+TRANSLIT_TABLE = {**_TABLE, **{ord(ch): "'" for ch in APOSTROPHE_VARIANTS}}
+
+_VOWELS = "аеёиоуўэюяАЕЁИОУЎЭЮЯ"
+# "е" so'z boshida yoki unli/ъ/ь dan keyin -> "ye"; "ц" unlilar orasida -> "ts"
+_YE_RE = re.compile(rf"(?<![^\W\d_])[еЕ]|(?<=[{_VOWELS}ъьЪЬ])[еЕ]")
+_TS_RE = re.compile(rf"(?<=[{_VOWELS}])[цЦ](?=[{_VOWELS}])")
+# Bosh harflar bilan yozilgan so'zlar (ШАРҲ -> SHARH, Sharh emas)
+_UPPER_WORD_RE = re.compile(r"\b[А-ЯЁЎҚҒҲ]{2,}\b")
+
+_UZBEK_LETTERS_RE = re.compile(r"[ўқғҳЎҚҒҲ]")
+# Rus tiliga xos harflar va o'zbek tilida uchramaydigan ko'p ishlatiladigan so'zlar
+_RUSSIAN_RE = re.compile(
+    r"[ыщЫЩ]|\b(?:и|в|во|на|не|что|по|для|как|это|или|при|от|до|за|статья|штраф|правила)\b",
+    re.IGNORECASE
+)
+_CYRILLIC_RE = re.compile(r"[а-яёА-ЯЁ]")
+
+
+def normalize_apostrophes(text: str) -> str:
+    """o‘ / oʻ / o` -> o'"""
+    return text.translate(APOSTROPHE_TABLE)
+
+
+def is_uzbek_cyrillic(text: str) -> bool:
+    """Matn o'zbek kirillida (rus tilida emas)"""
+    if _UZBEK_LETTERS_RE.search(text):
+        return True
+    return bool(_CYRILLIC_RE.search(text)) and not _RUSSIAN_RE.search(text)
+
+
+def _transliterate(text: str) -> str:
+    text = _YE_RE.sub(lambda m: "ye" if m.group(0) == "е" else "Ye", text)
+    text = _TS_RE.sub(lambda m: "ts" if m.group(0) == "ц" else "Ts", text)
+    return text.translate(TRANSLIT_TABLE)
+
+
+def to_latin(text: str) -> str:
+    """O'zbek kirill matnini lotinga o'girish (apostroflar ham normallashadi)"""
+    text = _UPPER_WORD_RE.sub(lambda m: _transliterate(m.group(0).lower()).upper(), text)
+    return _transliterate(text)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Indekslash va so'rov uchun yagona ko'rinish:
+    o'zbek kirilli -> lotin, apostroflar -> "'". Rus matni faqat apostrof bo'yicha.
+    """
+    if not text:
+        return text
+    if is_uzbek_cyrillic(text):
+        return to_latin(text)
+    return normalize_apostrophes(text)
+
+
+def benchmark() -> Dict[str, float]:
+    """Butun korpus (data/qonunlar + data/laws) ustida tezlikni o'lchash"""
+    import json
+    from pathlib import Path
+
+    texts = []
+    for path in Path("./data/qonunlar").glob("*.txt"):
+        texts.append(path.read_text(encoding="utf-8"))
+    for path in Path("./data/laws").rglob("*.json"):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict) and data.get("content"):
+            texts.append(data["content"])
+
+    chars = sum(len(text) for text in texts)
+    size_mb = sum(len(text.encode("utf-8")) for text in texts) / 1024 / 1024
+
+    start = time.perf_counter()
+    for text in texts:
+        normalize_text(text)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "documents": len(texts),
+        "chars": chars,
+        "size_mb": round(size_mb, 2),
+        "seconds": round(elapsed, 3),
+        "mb_per_sec": round(size_mb / elapsed, 1),
+        "chars_per_sec": int(chars / elapsed)
+    }
+
+
+if __name__ == "__main__":
+    for sample in ["Йўл ҳаракати қоидалари", "рўйхатдан ўтган", "Маъмурий жавобгарлик тўғрисидаги кодекс",
+                   "ЕТКАЗИШ ШАРҲИ", "цех, концерт, Европа", "o‘zbek oʻzbek o`zbek", "Правила дорожного движения"]:
+        print(f"{sample} -> {normalize_text(sample)}")
+    print(benchmark())
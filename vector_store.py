@@ -0,0 +1,612 @@
+"""
+🗂 MMAP VEKTOR BAZASI
+======================
+LlamaIndex uchun binar vektor bazasi (SimpleVectorStore JSON o'rniga).
+
+Embeddinglar bitta uzluksiz float32/float16/int8 matritsada saqlanadi va
+numpy.memmap orqali ochiladi - ishga tushish deyarli O(1), sahifalar esa
+OS page cache orqali barcha worker jarayonlar o'rtasida bo'lishiladi.
+
+int8: har bir qator o'z shkalasi bilan kvantlanadi (x ≈ q * scale, |q| <= 127).
+rescore_factor > 0 bo'lsa float32 nusxa ham yoziladi va top_k * rescore_factor
+nomzod to'liq aniqlikda qayta baholanadi (faqat shu qatorlar diskdan o'qiladi).
+
+ann_nprobe > 0 va qatorlar soni ann_min_rows dan ko'p bo'lsa IVF-flat indeksi
+(ann_index.py) orqali faqat eng yaqin klasterlar skorlanadi; kichik bazada aniq qidiruv.
+
+Metadata filtrlari (VectorStoreQuery.filters) metadata_index.py dagi inverted indeks
+orqali qatorlar to'plamiga aylanadi - faqat shu qatorlar (aniq) skorlanadi.
+
+Fayllar (persist_dir ichida):
+- vectors.bin     - normallashtirilgan embeddinglar matritsasi (n x dim)
+- scales.bin      - int8 uchun qatorlar shkalasi (float32, n)
+- vectors_full.bin - qayta baholash uchun float32 nusxa (ixtiyoriy)
+- ivf.npz         - ANN markazlari va qatorlar biriktirmasi (ixtiyoriy)
+- meta_index.json - metadata maydonlari -> qatorlar (filtrlar uchun)
+- chunks.bin      - node JSON'lari ketma-ket (utf-8)
+- chunks.idx      - har bir chunkning (offset, uzunlik) jadvali (int64)
+- ids.json        - qator -> (node_id, ref_doc_id), faqat kerak bo'lganda o'qiladi
+- store_meta.json - o'lcham, dtype va qatorlar soni
+"""
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ann_index import IVF_FILE, IVFIndex
+from metadata_index import META_INDEX_FILE, MetadataIndex
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import (
+    metadata_dict_to_node,
+    node_to_metadata_dict,
+)
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "store_meta.json"
+VECTORS_FILE = "vectors.bin"
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "chunks.idx"
+IDS_FILE = "ids.json"
+SCALES_FILE = "scales.bin"
+FULL_VECTORS_FILE = "vectors_full.bin"
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+INT8_MAX = 127
+
+# Skorlash bloklari (float16 matritsa to'liq float32 ga nusxalanmasligi uchun)
+SCORE_BLOCK_ROWS = 65536
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    """Vektorni birlik uzunlikka keltirish (cosine = dot product)"""
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return vector
+    return vector / norm
+
+
+def _quantize(vector: np.ndarray, dtype: str) -> Tuple[np.ndarray, float]:
+    """float32 vektorni saqlash turiga o'tkazish. Qaytaradi: (qiymatlar, shkala)"""
+    if dtype != "int8":
+        return vector.astype(dtype), 1.0
+    scale = float(np.abs(vector).max()) / INT8_MAX or 1.0
+    return np.clip(np.rint(vector / scale), -INT8_MAX, INT8_MAX).astype(np.int8), scale
+
+
+class MmapVectorStore(BasePydanticVectorStore):
+    """numpy.memmap asosidagi, matnni ham saqlovchi vektor bazasi"""
+
+    stores_text: bool = True
+    persist_dir: str
+    dtype: str = "float32"
+    rescore_factor: int = 0
+    ann_nprobe: int = 0
+    ann_min_rows: int = 20000
+    ann_nlist: int = 0
+
+    _dim: int = PrivateAttr(default=0)
+    _count: int = PrivateAttr(default=0)
+    _vectors: Optional[np.ndarray] = PrivateAttr(default=None)
+    _scales: Optional[np.ndarray] = PrivateAttr(default=None)
+    _full_vectors: Optional[np.ndarray] = PrivateAttr(default=None)
+    _ivf: Optional[IVFIndex] = PrivateAttr(default=None)
+    _meta_index: Optional[MetadataIndex] = PrivateAttr(default=None)
+    _offsets: Optional[np.ndarray] = PrivateAttr(default=None)
+    _chunks: Optional[np.ndarray] = PrivateAttr(default=None)
+    _ids: Optional[List[Tuple[str, str]]] = PrivateAttr(default=None)
+    _row_by_id: Optional[Dict[str, int]] = PrivateAttr(default=None)
+    _deleted: set = PrivateAttr(default_factory=set)
+    _pending_vectors: List[np.ndarray] = PrivateAttr(default_factory=list)
+    _pending_payloads: List[bytes] = PrivateAttr(default_factory=list)
+    _pending_ids: List[Tuple[str, str]] = PrivateAttr(default_factory=list)
+
+    def __init__(self, persist_dir: str, dtype: str = "float32", rescore_factor: int = 0, **kwargs: Any):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Qo'llab-quvvatlanmaydigan dtype: {dtype}")
+        super().__init__(persist_dir=str(persist_dir), dtype=dtype, rescore_factor=rescore_factor, **kwargs)
+        if self.ann_nprobe > 0:
+            self._ivf = IVFIndex.load(Path(self.persist_dir) / IVF_FILE)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MmapVectorStore"
+
+    @classmethod
+    def exists(cls, persist_dir: str) -> bool:
+        """Papkada saqlangan baza bormi"""
+        return (Path(persist_dir) / META_FILE).exists()
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str, rescore_factor: Optional[int] = None,
+                         **kwargs: Any) -> "MmapVectorStore":
+        """
+        Saqlangan bazani ochish (fayllar o'qilmaydi, faqat map qilinadi).
+        rescore_factor berilmasa saqlangan qiymat ishlatiladi; kwargs - ann_* sozlamalari.
+        """
+        with open(Path(persist_dir) / META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if rescore_factor is None:
+            rescore_factor = meta.get("rescore_factor", 0)
+        store = cls(persist_dir=persist_dir, dtype=meta["dtype"], rescore_factor=rescore_factor, **kwargs)
+        store._open_files(meta)
+        return store
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    @property
+    def count(self) -> int:
+        """Tirik (o'chirilmagan) chunklar soni"""
+        return self._count + len(self._pending_payloads) - len(self._deleted)
+
+    @property
+    def nbytes(self) -> int:
+        """Skorlash uchun o'qiladigan matritsa hajmi (baytlarda)"""
+        total = self._vectors.nbytes if self._vectors is not None else 0
+        if self._scales is not None:
+            total += self._scales.nbytes
+        return total
+
+    @property
+    def can_rescore(self) -> bool:
+        """To'liq aniqlikdagi qayta baholash mumkinmi"""
+        return self.rescore_factor > 0 and (self._full_vectors is not None or self.dtype == "float32")
+
+    # ================= FAYLLAR =================
+
+    def _open_files(self, meta: Dict[str, Any]):
+        """Matritsa va chunk fayllarini memmap orqali ochish"""
+        base = Path(self.persist_dir)
+        self._dim = meta["dim"]
+        self._count = meta["count"]
+        self._ids = None
+        self._row_by_id = None
+        self._meta_index = None
+        self._deleted = set()
+
+        self._scales = self._full_vectors = None
+
+        if self._count == 0:
+            self._vectors = self._offsets = self._chunks = None
+            return
+
+        self._vectors = np.memmap(
+            base / VECTORS_FILE, dtype=self.dtype, mode="r", shape=(self._count, self._dim)
+        )
+        self._offsets = np.memmap(
+            base / OFFSETS_FILE, dtype=np.int64, mode="r", shape=(self._count, 2)
+        )
+        self._chunks = np.memmap(base / CHUNKS_FILE, dtype=np.uint8, mode="r")
+        if self.dtype == "int8":
+            self._scales = np.memmap(base / SCALES_FILE, dtype=np.float32, mode="r", shape=(self._count,))
+        if meta.get("full_precision") and (base / FULL_VECTORS_FILE).exists():
+            self._full_vectors = np.memmap(
+                base / FULL_VECTORS_FILE, dtype=np.float32, mode="r", shape=(self._count, self._dim)
+            )
+
+    def _load_ids(self) -> List[Tuple[str, str]]:
+        """node/ref_doc id jadvalini kerak bo'lganda yuklash (delete, get_nodes)"""
+        if self._ids is None:
+            ids_file = Path(self.persist_dir) / IDS_FILE
+            if self._count and ids_file.exists():
+                with open(ids_file, "r", encoding="utf-8") as f:
+                    self._ids = [tuple(item) for item in json.load(f)]
+            else:
+                self._ids = []
+        return self._ids
+
+    def _all_ids(self) -> List[Tuple[str, str]]:
+        return self._load_ids() + self._pending_ids
+
+    def _row_index(self) -> Dict[str, int]:
+        """node_id -> qator (get_nodes uchun, kerak bo'lganda quriladi)"""
+        if self._row_by_id is None:
+            self._row_by_id = {node_id: row for row, (node_id, _) in enumerate(self._all_ids())}
+        return self._row_by_id
+
+    def _payload(self, row: int) -> bytes:
+        """Qator bo'yicha node JSON'ini olish"""
+        if row >= self._count:
+            return self._pending_payloads[row - self._count]
+        offset, length = self._offsets[row]
+        return self._chunks[offset:offset + length].tobytes()
+
+    def _row_vector(self, row: int) -> np.ndarray:
+        """Qator vektori float32 ko'rinishida (mavjud bo'lsa to'liq aniqlikdagi nusxadan)"""
+        if row >= self._count:
+            return self._pending_vectors[row - self._count]
+        if self._full_vectors is not None:
+            return np.asarray(self._full_vectors[row], dtype=np.float32)
+        vector = np.asarray(self._vectors[row], dtype=np.float32)
+        if self._scales is not None:
+            vector = vector * self._scales[row]
+        return vector
+
+    def _node(self, row: int) -> BaseNode:
+        return metadata_dict_to_node(json.loads(self._payload(row)))
+
+    def _row_metadata(self, row: int) -> Dict[str, Any]:
+        """Qator metadatasi (node obyektini qurmasdan)"""
+        return json.loads(json.loads(self._payload(row))["_node_content"]).get("metadata", {})
+
+    def _get_meta_index(self) -> MetadataIndex:
+        """Metadata indeksini yuklash; fayl bo'lmasa (eski baza) chunklardan qurish"""
+        if self._meta_index is None:
+            index = MetadataIndex.load(Path(self.persist_dir) / META_INDEX_FILE)
+            if index is None or index.rows != self._count:
+                index = MetadataIndex.build(self._row_metadata(row) for row in range(self._count))
+            for row in range(self._count, self._count + len(self._pending_payloads)):
+                index.add(row, self._row_metadata(row))
+            self._meta_index = index
+        return self._meta_index
+
+    def filter_rows(self, filters) -> np.ndarray:
+        """Metadata filtrlariga mos (o'chirilmagan) qatorlar, o'sish tartibida"""
+        rows = self._get_meta_index().rows_for(filters) - self._deleted
+        return np.array(sorted(rows), dtype=np.int64)
+
+    def filter_node_ids(self, filters) -> set:
+        """Filtrga mos chunklarning node_id lari (BM25 natijalarini cheklash uchun)"""
+        all_ids = self._all_ids()
+        return {all_ids[row][0] for row in self.filter_rows(filters)}
+
+    # ================= LLAMAINDEX API =================
+
+    def add(self, nodes: Sequence[BaseNode], **kwargs: Any) -> List[str]:
+        """Nodelarni bazaga qo'shish (persist() gacha xotirada turadi)"""
+        ids = []
+        for node in nodes:
+            embedding = np.asarray(node.get_embedding(), dtype=np.float32)
+            if self._dim == 0:
+                self._dim = embedding.shape[0]
+            elif embedding.shape[0] != self._dim:
+                raise ValueError(f"Embedding o'lchami mos emas: {embedding.shape[0]} != {self._dim}")
+
+            metadata = node_to_metadata_dict(node, remove_text=False, flat_metadata=False)
+            payload = {
+                "_node_content": metadata["_node_content"],
+                "_node_type": metadata["_node_type"],
+            }
+
+            self._pending_vectors.append(_normalize(embedding))
+            self._pending_payloads.append(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+            self._pending_ids.append((node.node_id, node.ref_doc_id or "None"))
+            if self._meta_index is not None:
+                self._meta_index.add(len(self._all_ids()) - 1, node.metadata)
+            ids.append(node.node_id)
+        self._row_by_id = None
+        return ids
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        """ref_doc_id ga tegishli barcha chunklarni o'chirish"""
+        for row, (_, row_ref_doc_id) in enumerate(self._all_ids()):
+            if row_ref_doc_id == ref_doc_id:
+                self._deleted.add(row)
+
+    def delete_nodes(self, node_ids: Optional[List[str]] = None, filters=None, **delete_kwargs: Any) -> None:
+        targets = set(node_ids or [])
+        for row, (node_id, _) in enumerate(self._all_ids()):
+            if node_id in targets:
+                self._deleted.add(row)
+
+    def clear(self) -> None:
+        self._count = 0
+        self._vectors = self._offsets = self._chunks = None
+        self._scales = self._full_vectors = None
+        self._ivf = None
+        self._meta_index = None
+        self._ids = []
+        self._row_by_id = None
+        self._deleted = set()
+        self._pending_vectors = []
+        self._pending_payloads = []
+        self._pending_ids = []
+
+    def get_nodes(self, node_ids: Optional[List[str]] = None, filters=None) -> List[BaseNode]:
+        """node_id lar bo'yicha nodelarni olish (berilgan tartibda)"""
+        if node_ids is None:
+            rows = range(len(self._all_ids()))
+        else:
+            row_index = self._row_index()
+            rows = [row_index[node_id] for node_id in node_ids if node_id in row_index]
+        return [self._node(row) for row in rows if row not in self._deleted]
+
+    def _scores(self, query_vector: np.ndarray) -> np.ndarray:
+        """Barcha qatorlar uchun cosine o'xshashlik (bloklab hisoblanadi)"""
+        parts = []
+        if self._vectors is not None:
+            for start in range(0, self._count, SCORE_BLOCK_ROWS):
+                block = np.asarray(self._vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+                scores = block @ query_vector
+                if self._scales is not None:
+                    scores *= self._scales[start:start + SCORE_BLOCK_ROWS]
+                parts.append(scores)
+        if self._pending_vectors:
+            parts.append(np.vstack(self._pending_vectors) @ query_vector)
+        if not parts:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(parts)
+
+    def _use_ann(self) -> bool:
+        """ANN faqat yoqilgan, o'qitilgan va baza yetarlicha katta bo'lganda (aks holda aniq qidiruv)"""
+        return (
+            self.ann_nprobe > 0 and self._ivf is not None and self._count >= self.ann_min_rows
+            and len(self._ivf) == self._count
+        )
+
+    def _scores_rows(self, query_vector: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Faqat berilgan (saqlangan) qatorlar uchun skor - ANN nomzodlari"""
+        scores = np.asarray(self._vectors[rows], dtype=np.float32) @ query_vector
+        if self._scales is not None:
+            scores *= self._scales[rows]
+        return scores
+
+    def _candidate_scores(self, query_vector: np.ndarray,
+                          rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Skorlanadigan qatorlar va ularning skorlari.
+        rows berilsa (metadata filtri) - faqat ular aniq skorlanadi;
+        aks holda ANN nomzodlari yoki barcha qatorlar.
+        """
+        total = len(self._pending_vectors) + self._count
+        if rows is not None:
+            stored, pending = rows[rows < self._count], rows[rows >= self._count]
+            parts = [self._scores_rows(query_vector, stored)] if stored.size else []
+            if pending.size:
+                parts.append(np.vstack([self._pending_vectors[row - self._count] for row in pending]) @ query_vector)
+            scores = np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+            return rows, scores
+
+        if not self._use_ann():
+            return np.arange(total), self._scores(query_vector)
+
+        rows = self._ivf.candidates(query_vector, self.ann_nprobe)
+        parts = [self._scores_rows(query_vector, rows)] if rows.size else []
+        if self._pending_vectors:
+            # Hali persist qilinmagan qatorlar doim aniq skorlanadi
+            rows = np.concatenate([rows, np.arange(self._count, total)])
+            parts.append(np.vstack(self._pending_vectors) @ query_vector)
+        scores = np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+        return rows, scores
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Eng o'xshash top-k chunklarni topish"""
+        if query.query_embedding is None or self.count == 0:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        query_vector = _normalize(np.asarray(query.query_embedding, dtype=np.float32))
+        filter_rows = self.filter_rows(query.filters) if query.filters else None
+        rows, scores = self._candidate_scores(query_vector, filter_rows)
+        if rows.size == 0:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        if self._deleted:
+            scores[np.isin(rows, list(self._deleted))] = -np.inf
+
+        # doc_ids / node_ids cheklovlari (id jadvali faqat shu holda yuklanadi)
+        if query.doc_ids or query.node_ids:
+            doc_ids = set(query.doc_ids or [])
+            node_ids = set(query.node_ids or [])
+            all_ids = self._all_ids()
+            mask = np.array([
+                (not doc_ids or all_ids[row][1] in doc_ids) and (not node_ids or all_ids[row][0] in node_ids)
+                for row in rows
+            ], dtype=bool)
+            scores[~mask] = -np.inf
+
+        top_k = min(query.similarity_top_k, scores.shape[0])
+        if self.can_rescore and self.dtype != "float32":
+            # Kvantlangan skor bo'yicha kengroq nomzodlar, so'ng float32 bilan aniq tartib
+            pool = min(top_k * self.rescore_factor, scores.shape[0])
+            candidates = np.argpartition(-scores, pool - 1)[:pool]
+            candidates = candidates[np.isfinite(scores[candidates])]
+            if candidates.size:
+                exact = np.vstack([self._row_vector(int(rows[i])) for i in candidates]) @ query_vector
+                scores = np.full_like(scores, -np.inf)
+                scores[candidates] = exact
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        candidates = candidates[np.argsort(-scores[candidates])]
+
+        nodes, similarities, ids = [], [], []
+        for i in candidates:
+            if not np.isfinite(scores[i]):
+                continue
+            node = self._node(int(rows[i]))
+            nodes.append(node)
+            similarities.append(float(scores[i]))
+            ids.append(node.node_id)
+
+        return VectorStoreQueryResult(nodes=nodes, similarities=similarities, ids=ids)
+
+    async def aquery(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Skorlash CPU ishi - event loopni bloklamaslik uchun alohida threadda"""
+        return await asyncio.to_thread(self.query, query, **kwargs)
+
+    def persist(self, persist_path: Optional[str] = None, fs=None) -> None:
+        """
+        Bazani diskka yozish (o'chirilganlar tashlab yuboriladi).
+        persist_path e'tiborga olinmaydi - baza doim o'z persist_dir ida saqlanadi.
+        """
+        base = Path(self.persist_dir)
+        base.mkdir(parents=True, exist_ok=True)
+
+        all_ids = self._all_ids()
+        live_rows = [row for row in range(len(all_ids)) if row not in self._deleted]
+
+        # float32 nusxa faqat kvantlangan baza va qayta baholash yoqilganda kerak
+        full_precision = self.rescore_factor > 0 and self.dtype != "float32"
+        names = [VECTORS_FILE, CHUNKS_FILE, OFFSETS_FILE, IDS_FILE]
+        if self.dtype == "int8":
+            names.append(SCALES_FILE)
+        if full_precision:
+            names.append(FULL_VECTORS_FILE)
+        tmp = {name: base / f"{name}.tmp" for name in names}
+        offsets = np.zeros((len(live_rows), 2), dtype=np.int64)
+        scales = np.ones(len(live_rows), dtype=np.float32)
+        position = 0
+
+        full_file = open(tmp[FULL_VECTORS_FILE], "wb") if full_precision else None
+        with open(tmp[VECTORS_FILE], "wb") as vf, open(tmp[CHUNKS_FILE], "wb") as cf:
+            for i, row in enumerate(live_rows):
+                if row < self._count and self._scales is not None and self.dtype == "int8":
+                    # Mavjud int8 qatorlar qayta kvantlanmaydi (xatolik yig'ilmasligi uchun)
+                    vector, scales[i] = np.asarray(self._vectors[row]), self._scales[row]
+                elif row < self._count and self._vectors.dtype == np.dtype(self.dtype) and self.dtype != "int8":
+                    vector = np.asarray(self._vectors[row])
+                else:
+                    vector, scales[i] = _quantize(self._row_vector(row), self.dtype)
+                vf.write(vector.tobytes())
+                if full_file is not None:
+                    full_file.write(self._row_vector(row).astype(np.float32).tobytes())
+
+                payload = self._payload(row)
+                cf.write(payload)
+                offsets[i] = (position, len(payload))
+                position += len(payload)
+
+        if full_file is not None:
+            full_file.close()
+        offsets.tofile(tmp[OFFSETS_FILE])
+        if self.dtype == "int8":
+            scales.tofile(tmp[SCALES_FILE])
+        with open(tmp[IDS_FILE], "w", encoding="utf-8") as f:
+            json.dump([all_ids[row] for row in live_rows], f, ensure_ascii=False)
+
+        for name, path in tmp.items():
+            os.replace(path, base / name)
+        for name in (SCALES_FILE, FULL_VECTORS_FILE):
+            if name not in tmp and (base / name).exists():
+                (base / name).unlink()
+
+        meta = {
+            "dim": self._dim,
+            "count": len(live_rows),
+            "dtype": self.dtype,
+            "rescore_factor": self.rescore_factor,
+            "full_precision": full_precision
+        }
+        meta_tmp = base / f"{META_FILE}.tmp"
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_tmp, base / META_FILE)
+
+        # Metadata indeksi qatorlar bilan birga ixchamlanadi
+        meta_index = self._get_meta_index()
+        meta_index.compact(live_rows)
+
+        # ANN: yangi qatorlar mavjud markazlarga biriktiriladi, o'chirilganlar tashlanadi
+        ivf = self._ivf if self._ivf is not None and len(self._ivf) == self._count else None
+        if ivf is not None:
+            if self._pending_vectors:
+                ivf.add(np.vstack(self._pending_vectors))
+            ivf.compact(live_rows)
+
+        # Yangi fayllarni qayta map qilish
+        self._pending_vectors = []
+        self._pending_payloads = []
+        self._pending_ids = []
+        self._open_files(meta)
+        meta_index.save(base / META_INDEX_FILE)
+        self._meta_index = meta_index
+        self._update_ann(ivf)
+        logger.info(f"💾 Vektor bazasi saqlandi: {meta['count']} ta chunk ({self.dtype})")
+
+    def _update_ann(self, ivf: Optional[IVFIndex]):
+        """IVF indeksini saqlash (kerak bo'lsa qayta o'qitish); kichik bazada indeks kerak emas"""
+        path = Path(self.persist_dir) / IVF_FILE
+        if self.ann_nprobe <= 0 or self._count < self.ann_min_rows:
+            self._ivf = None
+            if path.exists():
+                path.unlink()
+            return
+
+        if ivf is None or ivf.needs_training(self._count):
+            ivf = IVFIndex(nlist=self.ann_nlist)
+            # int8 qatorlarning musbat shkalasi yo'nalishni o'zgartirmaydi - biriktirish uchun yetarli
+            ivf.train(self._full_vectors if self._full_vectors is not None else self._vectors)
+        ivf.save(path)
+        self._ivf = ivf
+
+
+# ================= BENCHMARK =================
+
+def _synthetic_vectors(count: int, dim: int, seed: int = 0, spread: float = 0.5) -> np.ndarray:
+    """Klasterli sintetik embeddinglar (haqiqiy matn embeddinglariga o'xshash taqsimot)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(count // 50, 1), dim)).astype(np.float32)
+    noise = spread * rng.standard_normal((count, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + noise
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def benchmark(persist_dir: Optional[str] = None, count: int = 5000, dim: int = 768,
+              queries: int = 200, top_k: int = 10, rescore_factor: int = 4) -> List[Dict[str, Any]]:
+    """
+    Kvantlash sifati: float16 / int8 / int8 + qayta baholash uchun recall@k
+    (float32 aniq qidiruvga nisbatan), matritsa hajmi va so'rov vaqti.
+    persist_dir berilsa mavjud indeks vektorlari, aks holda sintetik vektorlar ishlatiladi.
+    """
+    import tempfile
+    import time
+
+    from llama_index.core.schema import TextNode
+
+    if persist_dir and MmapVectorStore.exists(persist_dir):
+        source = MmapVectorStore.from_persist_dir(persist_dir)
+        vectors = np.vstack([source._row_vector(row) for row in range(source._count)])
+    else:
+        vectors = _synthetic_vectors(count, dim)
+
+    rng = np.random.default_rng(1)
+    picked = vectors[rng.integers(0, len(vectors), queries)]
+    query_vectors = picked + 0.3 * rng.standard_normal(picked.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+
+    # Aniq javoblar (float32, to'liq skorlash)
+    k = min(top_k, len(vectors))
+    exact = [set(np.argsort(-(vectors @ q))[:k].tolist()) for q in query_vectors]
+    nodes = [TextNode(id_=str(i), text="", embedding=vector.tolist()) for i, vector in enumerate(vectors)]
+
+    results = []
+    configs = [("float32", 0), ("float16", 0), ("int8", 0), ("int8", rescore_factor)]
+    for dtype, factor in configs:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = MmapVectorStore(persist_dir=tmp_dir, dtype=dtype, rescore_factor=factor)
+            store.add(nodes)
+            store.persist()
+
+            hits, start = 0, time.perf_counter()
+            for q, expected in zip(query_vectors, exact):
+                result = store.query(VectorStoreQuery(query_embedding=q.tolist(), similarity_top_k=k))
+                hits += len(expected & {int(node_id) for node_id in result.ids})
+            elapsed = time.perf_counter() - start
+
+            results.append({
+                "dtype": dtype,
+                "rescore_factor": factor,
+                f"recall@{k}": round(hits / (k * len(query_vectors)), 4),
+                "matrix_mb": round(store.nbytes / 1024 / 1024, 2),
+                "ms_per_query": round(elapsed / len(query_vectors) * 1000, 2)
+            })
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.WARNING)
+    for row in benchmark(sys.argv[1] if len(sys.argv) > 1 else None):
+        print(row)